@@ -0,0 +1,427 @@
+"""
+Alert rules, evaluated by the collector on each cycle's new odds only
+
+Rules are a JSON list in the file named by ALERT_RULES (default
+alert_rules.json next to this module), for example:
+
+    [
+        {"id": "steam-1h", "kind": "move", "min_pp": 4, "window": "1h"},
+        {"id": "arsenal-evens", "kind": "crosses", "price": 2.0, "team": "Arsenal", "outcome": "Home"},
+        {"id": "fair-since-open", "kind": "fair_move", "min_pp": 3, "cooldown_minutes": 180}
+    ]
+
+Kinds:
+    move       implied probability moved at least min_pp within window
+               ("15m", "1h", "6h", "1d"...), either way unless direction is
+               "shorten" or "drift"
+    crosses    the price crossed `price` (direction "below", "above" or either)
+    fair_move  no-vig probability moved at least min_pp since the first
+               pre-match price seen; fires when the move reaches min_pp and
+               again only after it has dropped back below
+
+Optional filters on every rule: league, team (home or away), outcome
+(Home/Draw/Away) and bookmaker. A rule fires at most once per fixture,
+bookmaker and outcome within cooldown_minutes (default 60). With the db
+sink, the collector picks the last firings up from the alerts table when it
+restarts, so a restart doesn't repeat alerts.
+
+Alerts go to the sinks in ALERT_SINKS, comma separated (default "db"):
+    db              the alerts table (a re-run over the same rows adds nothing)
+    file:PATH       one JSON object per line appended to PATH
+    webhook:URL     POSTed as a JSON list, e.g. to a local receiver
+
+Usage:
+    python alerts.py [--check RULES_FILE]    recent alerts, or validate a rules file
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from datetime import datetime, timedelta
+
+import requests
+
+from odds_math import implied_prob
+from odds_state import KEEP_AFTER_KICKOFF
+from query_stats import connect
+
+ALERT_RULES = os.environ.get('ALERT_RULES', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         'alert_rules.json'))
+ALERT_SINKS = os.environ.get('ALERT_SINKS', 'db')
+
+KINDS = ('move', 'crosses', 'fair_move')
+
+DEFAULT_COOLDOWN_MINUTES = 60
+
+WEBHOOK_TIMEOUT_SECONDS = 5
+
+# (outcome, odds index, fair probability index) in SNAPSHOT_COLUMNS rows
+OUTCOMES = (('Home', 5, 10), ('Away', 6, 11), ('Draw', 7, 12))
+
+WINDOW_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_window(label):
+    """ "15m" / "1h" / "1d" as a timedelta"""
+    match = re.fullmatch(r'(\d+)\s*([mhd])', str(label).strip().lower())
+    if not match:
+        raise ValueError(f"window must look like 15m, 1h or 1d, not {label!r}")
+    return timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+
+
+class AlertRule:
+    """One user-defined rule (see the module docstring for the fields)"""
+
+    __slots__ = ('id', 'kind', 'min_pp', 'window', 'price', 'direction', 'league', 'team', 'outcome',
+                 'bookmaker', 'cooldown')
+
+    def __init__(self, spec):
+        self.id = str(spec['id'])
+        self.kind = spec['kind']
+        if self.kind not in KINDS:
+            raise ValueError(f"rule {self.id}: kind must be one of {', '.join(KINDS)}")
+        self.min_pp = float(spec['min_pp']) if self.kind != 'crosses' else None
+        self.window = parse_window(spec.get('window', '1h')) if self.kind == 'move' else None
+        self.price = float(spec['price']) if self.kind == 'crosses' else None
+        self.direction = spec.get('direction')
+        if self.direction not in (None, 'shorten', 'drift', 'below', 'above'):
+            raise ValueError(f"rule {self.id}: unknown direction {self.direction!r}")
+        self.league = spec.get('league')
+        self.team = spec.get('team')
+        self.outcome = spec.get('outcome')
+        self.bookmaker = spec.get('bookmaker')
+        self.cooldown = timedelta(minutes=float(spec.get('cooldown_minutes', DEFAULT_COOLDOWN_MINUTES)))
+
+    def applies_to(self, league, home_team, away_team, bookmaker, outcome):
+        return ((self.league is None or self.league == league)
+                and (self.team is None or self.team in (home_team, away_team))
+                and (self.outcome is None or self.outcome == outcome)
+                and (self.bookmaker is None or self.bookmaker == bookmaker))
+
+    def check(self, history, opening_fair, previous_odds, odds, fair):
+        """Message and value if this tick triggers the rule, else None
+
+        Args:
+            history: deque of (timestamp, probability) up to and including this tick
+            opening_fair: first pre-match no-vig probability seen (or None)
+            previous_odds, odds: the price before and at this tick
+            fair: no-vig probability at this tick (or None)
+        """
+        if self.kind == 'move':
+            timestamp, prob = history[-1]
+            cutoff = timestamp - self.window
+            # The level just before the window still counts: it held until the next tick
+            start = next((point for point in reversed(history) if point[0] <= cutoff), history[0])
+            delta_pp = (prob - start[1]) * 100
+            if self._direction_ok(delta_pp) and abs(delta_pp) >= self.min_pp:
+                return f"{delta_pp:+.1f}pp within {_window_label(self.window)}", delta_pp
+        elif self.kind == 'crosses':
+            if previous_odds is None:
+                return None
+            went_below = previous_odds >= self.price > odds
+            went_above = previous_odds <= self.price < odds
+            if (went_below and self.direction in (None, 'below')) or (went_above and self.direction in (None, 'above')):
+                return f"crossed {'below' if went_below else 'above'} {self.price:.2f} ({previous_odds:.2f} → {odds:.2f})", odds
+        elif self.kind == 'fair_move':
+            if opening_fair is None or fair is None:
+                return None
+            delta_pp = (fair - opening_fair) * 100
+            if self._direction_ok(delta_pp) and abs(delta_pp) >= self.min_pp:
+                return f"no-vig {opening_fair:.1%} → {fair:.1%} ({delta_pp:+.1f}pp since open)", delta_pp
+        return None
+
+    def _direction_ok(self, delta_pp):
+        # Shortening: implied probability up
+        return (self.direction is None or (self.direction == 'shorten' and delta_pp > 0)
+                or (self.direction == 'drift' and delta_pp < 0))
+
+
+def _window_label(window):
+    minutes = int(window.total_seconds() // 60)
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
+
+
+def load_rules(path=ALERT_RULES):
+    """Rules from a JSON file; no file means no rules"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        specs = json.load(f)
+    rules = [AlertRule(spec) for spec in specs]
+    ids = [rule.id for rule in rules]
+    duplicates = sorted({rule_id for rule_id in ids if ids.count(rule_id) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate rule id(s): {', '.join(duplicates)}")
+    return rules
+
+
+class OutcomeHistory:
+    """Recent ticks of one outcome at one bookmaker, as much as the longest window needs"""
+
+    __slots__ = ('ticks', 'last_odds', 'opening_fair')
+
+    def __init__(self):
+        # (timestamp, implied probability), oldest first
+        self.ticks = deque()
+        self.last_odds = None
+        self.opening_fair = None
+
+
+class AlertEngine:
+    """Evaluates the rules against new ticks only, with constant work per tick and rule
+
+    Feed it the collector's new odds rows (see OddsState.add_listener): only
+    the fixtures that changed in a cycle get there. The initial load only
+    warms up state; alerts wait in pending_alerts until drained and sent.
+    """
+
+    def __init__(self, rules, last_fired=None):
+        """
+        Args:
+            rules: AlertRule list
+            last_fired: {(rule id, league, home_team, away_team, bookmaker, outcome): fired_at}
+                from before a restart (see load_last_fired)
+        """
+        self.rules = list(rules)
+        windows = [rule.window for rule in self.rules if rule.window is not None]
+        self._keep = max(windows, default=timedelta(0))
+        # (league, home_team, away_team, bookmaker, outcome) -> OutcomeHistory
+        self._history = {}
+        # (rule id, league, home_team, away_team, bookmaker, outcome) -> last fired tick time
+        self._fired = dict(last_fired or {})
+        # Keys of fair_move rules that fired and haven't dropped back below min_pp since
+        self._over = set()
+        # (league, home_team, away_team) -> commence_time, for pruning
+        self._kickoffs = {}
+        self.pending_alerts = []
+
+    def consume(self, rows, initial_load=False):
+        """Process rows in SNAPSHOT_COLUMNS order"""
+        if not self.rules:
+            return
+        for row in rows:
+            row_id, league, home_team, away_team, bookmaker = row[:5]
+            timestamp, commence_time = row[8], row[9]
+            if commence_time is None or timestamp >= commence_time:
+                continue
+            self._kickoffs[(league, home_team, away_team)] = commence_time
+            for outcome, odds_index, fair_index in OUTCOMES:
+                key = (league, home_team, away_team, bookmaker, outcome)
+                odds, fair = row[odds_index], row[fair_index]
+                prob = implied_prob(odds)
+                history = self._history.get(key)
+                if history is None:
+                    history = self._history[key] = OutcomeHistory()
+                if prob is None or (history.ticks and timestamp <= history.ticks[-1][0]):
+                    continue
+                if history.opening_fair is None:
+                    history.opening_fair = fair
+                history.ticks.append((timestamp, prob))
+                # Keep one tick at or before the longest window's start
+                while len(history.ticks) > 2 and history.ticks[1][0] <= timestamp - self._keep:
+                    history.ticks.popleft()
+                previous_odds, history.last_odds = history.last_odds, odds
+
+                for rule in self.rules:
+                    # The initial load only replays whether fair moves are still over their threshold
+                    if (initial_load and rule.kind != 'fair_move') or not rule.applies_to(*key):
+                        continue
+                    hit = rule.check(history.ticks, history.opening_fair, previous_odds, odds, fair)
+                    fired_key = (rule.id,) + key
+                    last_fired = self._fired.get(fired_key)
+                    if rule.kind == 'fair_move':
+                        # Edge-triggered: a move that stays over min_pp fires once
+                        if hit is None:
+                            self._over.discard(fired_key)
+                            continue
+                        if fired_key in self._over:
+                            continue
+                        if initial_load:
+                            if last_fired is not None and timestamp >= last_fired:
+                                self._over.add(fired_key)
+                            continue
+                    elif hit is None:
+                        continue
+                    if last_fired is not None and timestamp - last_fired < rule.cooldown:
+                        continue
+                    self._fired[fired_key] = timestamp
+                    if rule.kind == 'fair_move':
+                        self._over.add(fired_key)
+                    message, value = hit
+                    self.pending_alerts.append({
+                        'rule_id': rule.id,
+                        'kind': rule.kind,
+                        'odds_id': row_id,
+                        'league': league,
+                        'home_team': home_team,
+                        'away_team': away_team,
+                        'bookmaker': bookmaker,
+                        'outcome': outcome,
+                        'odds': odds,
+                        'value': value,
+                        'message': f"{home_team} vs {away_team} ({league}) {outcome}: {message}",
+                        'fired_at': timestamp,
+                        'commence_time': commence_time
+                    })
+        self._prune()
+
+    def _prune(self):
+        cutoff = datetime.now() - KEEP_AFTER_KICKOFF
+        finished = {fixture for fixture, commence_time in self._kickoffs.items() if commence_time < cutoff}
+        if finished:
+            self._history = {key: history for key, history in self._history.items() if key[:3] not in finished}
+            self._fired = {key: fired for key, fired in self._fired.items() if key[1:4] not in finished}
+            self._over = {key for key in self._over if key[1:4] not in finished}
+            for fixture in finished:
+                del self._kickoffs[fixture]
+
+    def drain(self):
+        alerts, self.pending_alerts = self.pending_alerts, []
+        return alerts
+
+
+class DatabaseSink:
+    """Alerts table; the (rule, snapshot, outcome) key dedupes re-runs"""
+
+    name = 'db'
+
+    def send(self, alerts):
+        conn = connect()
+        cursor = conn.cursor()
+        save_alerts(cursor, alerts)
+        conn.commit()
+        conn.close()
+
+
+class FileSink:
+    """JSON lines appended to a file"""
+
+    def __init__(self, path):
+        self.name = f'file:{path}'
+        self.path = path
+
+    def send(self, alerts):
+        with open(self.path, 'a') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, default=str) + '\n')
+
+
+class WebhookSink:
+    """One POST of the cycle's alerts as a JSON list"""
+
+    def __init__(self, url):
+        self.name = f'webhook:{url}'
+        self.url = url
+
+    def send(self, alerts):
+        response = requests.post(self.url, data=json.dumps(alerts, default=str),
+                                 headers={'Content-Type': 'application/json'}, timeout=WEBHOOK_TIMEOUT_SECONDS)
+        response.raise_for_status()
+
+
+def make_sinks(spec=ALERT_SINKS):
+    """Sinks from an ALERT_SINKS string such as "db,file:alerts.jsonl" """
+    sinks = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        kind, _, target = entry.partition(':')
+        if kind == 'db':
+            sinks.append(DatabaseSink())
+        elif kind == 'file' and target:
+            sinks.append(FileSink(target))
+        elif kind == 'webhook' and target:
+            sinks.append(WebhookSink(target))
+        else:
+            raise ValueError(f"unknown alert sink {entry!r} (db, file:PATH or webhook:URL)")
+    return sinks
+
+
+def deliver(alerts, sinks):
+    """Send alerts to every sink; one failing sink doesn't stop the others
+
+    Returns:
+        list of (sink name, error) for the sinks that failed
+    """
+    failures = []
+    for sink in sinks:
+        try:
+            sink.send(alerts)
+        except Exception as e:
+            failures.append((sink.name, e))
+    return failures
+
+
+def save_alerts(cursor, alerts):
+    """Insert alerts (a re-run over the same rows adds nothing)"""
+    for alert in alerts:
+        cursor.execute("""
+            INSERT INTO alerts (rule_id, kind, odds_id, league, home_team, away_team, bookmaker, outcome,
+                                odds, value, message, fired_at, commence_time)
+            VALUES (%(rule_id)s, %(kind)s, %(odds_id)s, %(league)s, %(home_team)s, %(away_team)s,
+                    %(bookmaker)s, %(outcome)s, %(odds)s, %(value)s, %(message)s, %(fired_at)s,
+                    %(commence_time)s)
+            ON CONFLICT (rule_id, odds_id, outcome) DO NOTHING
+        """, alert)
+
+
+def load_last_fired(cursor):
+    """When each rule last fired per fixture, bookmaker and outcome, for fixtures the engine still tracks
+
+    Returns:
+        dict: {(rule_id, league, home_team, away_team, bookmaker, outcome): fired_at}, for AlertEngine
+    """
+    cursor.execute("""
+        SELECT rule_id, league, home_team, away_team, bookmaker, outcome, MAX(fired_at)
+        FROM alerts
+        WHERE commence_time >= %s
+        GROUP BY rule_id, league, home_team, away_team, bookmaker, outcome
+    """, (datetime.now() - KEEP_AFTER_KICKOFF,))
+    return {tuple(row[:6]): row[6] for row in cursor.fetchall()}
+
+
+def load_recent_alerts(limit=50):
+    """Latest alerts from the alerts table, newest first"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT fired_at, rule_id, message
+        FROM alerts
+        ORDER BY fired_at DESC, id DESC
+        LIMIT %s
+    """, (limit,))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recent alerts, or validate an alert rules file")
+    parser.add_argument('--check', metavar='RULES_FILE', help="parse a rules file and list its rules")
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.check:
+        if not os.path.exists(args.check):
+            print(f"❌ {args.check} not found")
+            return 1
+        try:
+            rules = load_rules(args.check)
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError) as e:
+            print(f"❌ {args.check}: {e}")
+            return 1
+        for rule in rules:
+            print(f"✅ {rule.id}: {rule.kind}")
+        return 0
+
+    for fired_at, rule_id, message in load_recent_alerts(args.limit):
+        print(f"{fired_at:%Y-%m-%d %H:%M}  [{rule_id}] {message}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Load test for the OddsEdge JSON API (api_server.py)
+
+Usage:
+    python api_loadtest.py [--url http://localhost:8081] [--concurrency 50] [--duration 10] [--revalidate]
+
+Each worker cycles through the endpoints until the duration is up. With
+--revalidate, workers send If-None-Match with the ETag they last received,
+the way a well-behaved polling client would.
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+DEFAULT_PATHS = [
+    '/api/odds',
+    '/api/movers?window=6h',
+    '/api/movers?window=Since%20Open',
+    '/api/cycle',
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def worker(session, base_url, paths, deadline, revalidate, latencies, statuses, etags):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        headers = {'Accept-Encoding': 'gzip'}
+        if revalidate and path in etags:
+            headers['If-None-Match'] = etags[path]
+
+        start = time.perf_counter()
+        try:
+            async with session.get(base_url + path, headers=headers) as response:
+                await response.read()
+                status = response.status
+                if 'ETag' in response.headers:
+                    etags[path] = response.headers['ETag']
+        except aiohttp.ClientError:
+            status = 'error'
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def run(base_url, concurrency, duration, paths, revalidate):
+    latencies = []
+    statuses = {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            worker(session, base_url, paths, deadline, revalidate, latencies, statuses, {})
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests:     {len(latencies)} in {elapsed:.1f}s ({concurrency} concurrent)")
+    print(f"Throughput:   {len(latencies) / elapsed:.0f} requests/sec")
+    print(f"Latency p50:  {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Latency p95:  {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Latency p99:  {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"Status codes: {dict(sorted(statuses.items(), key=lambda x: str(x[0])))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the OddsEdge JSON API")
+    parser.add_argument('--url', default='http://localhost:8081', help="API base URL")
+    parser.add_argument('--concurrency', type=int, default=50, help="concurrent clients")
+    parser.add_argument('--duration', type=float, default=10, help="test length in seconds")
+    parser.add_argument('--path', action='append', dest='paths', help="endpoint to hit (repeatable)")
+    parser.add_argument('--revalidate', action='store_true', help="send If-None-Match with the last ETag")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url.rstrip('/'), args.concurrency, args.duration, args.paths or DEFAULT_PATHS, args.revalidate))
@@ -0,0 +1,323 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import psycopg2
+from aiohttp import web
+
+from dashboard_snapshot import MOVERS_STORED, TIME_WINDOWS, get_dashboard_snapshot
+from odds_state import COLLECTION_INTERVAL_SECONDS, NOTIFY_CHANNEL, get_latest_cycle_id, get_odds_state
+from odds_stream import setup_streaming
+from query_stats import connect
+
+# Read-only JSON API over the same data the dashboard renders:
+#   GET /api/cycle                                             latest collection cycle id
+#   GET /api/odds[?league=]                                    latest odds per fixture
+#   GET /api/history?league=&home_team=&away_team=[&hours=24]  odds history for one fixture
+#   GET /api/movers[?window=6h&limit=10]                       biggest movers ranking
+#   GET /api/stream, /api/ws                                   live price changes (see odds_stream.py)
+#
+# Responses carry a weak ETag of the collection cycle id, so clients can
+# revalidate with If-None-Match and get a 304 until the next cycle lands.
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+API_PORT = int(os.environ.get('API_PORT', '8081'))
+
+# Fallback check for a new collection cycle when no notification arrives (seconds)
+POLL_INTERVAL_SECONDS = int(os.environ.get('REFRESH_POLL_SECONDS', '60'))
+
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+
+# Encoded responses kept per cycle
+RESPONSE_CACHE_SIZE = 1000
+
+ODDS_FIELDS = ('league', 'home_team', 'away_team', 'bookmaker',
+               'home_odds', 'away_odds', 'draw_odds', 'timestamp', 'commence_time')
+HISTORY_FIELDS = ('bookmaker', 'home_odds', 'away_odds', 'draw_odds', 'timestamp',
+                  'home_fair', 'away_fair', 'draw_fair')
+
+
+def read_cycle_id():
+    """Latest cycle id over a short-lived connection"""
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            return get_latest_cycle_id(cursor)
+    finally:
+        conn.close()
+
+
+class CycleListener:
+    """Tracks the latest collection cycle for this process via LISTEN/NOTIFY
+
+    The listening connection's socket is registered with the event loop, so
+    notifications are handled without a separate thread. A slow MAX(id) poll
+    covers anything missed while reconnecting.
+    """
+
+    def __init__(self):
+        self.cycle_id = None
+        # Monotonic time this process first saw the current cycle (None = unknown)
+        self.cycle_seen_at = None
+        self._conn = None
+        self._loop = None
+        self._poll_task = None
+        self._callbacks = []
+
+    def add_callback(self, callback):
+        """Call callback(payload) for every notification the collector sends"""
+        self._callbacks.append(callback)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self._reconnect()
+        self._poll_task = asyncio.create_task(self._poll_forever())
+
+    async def stop(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        if self._conn is not None:
+            self._loop.remove_reader(self._conn.fileno())
+            self._conn.close()
+
+    def _connect(self):
+        conn = connect()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            cycle_id = get_latest_cycle_id(cursor)
+        return conn, cycle_id
+
+    async def _reconnect(self):
+        while True:
+            try:
+                conn, cycle_id = await self._loop.run_in_executor(None, self._connect)
+                break
+            except psycopg2.Error as e:
+                print(f"Cycle listener connection error: {e}")
+                await asyncio.sleep(5)
+        self._conn = conn
+        self._loop.add_reader(conn.fileno(), self._on_readable)
+        self._set_cycle(cycle_id)
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            print(f"Cycle listener connection error: {e}")
+            self._loop.remove_reader(self._conn.fileno())
+            self._conn.close()
+            self._conn = None
+            asyncio.ensure_future(self._reconnect())
+            return
+
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                payload = {}
+            self._set_cycle(payload.get('cycle_id'))
+            for callback in self._callbacks:
+                callback(payload)
+
+    def _set_cycle(self, cycle_id):
+        if cycle_id is None or cycle_id == self.cycle_id:
+            return
+        if self.cycle_id is not None:
+            self.cycle_seen_at = time.monotonic()
+        self.cycle_id = cycle_id
+
+    async def _poll_forever(self):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            try:
+                cycle_id = await self._loop.run_in_executor(None, read_cycle_id)
+            except psycopg2.Error as e:
+                print(f"Cycle listener poll error: {e}")
+                continue
+            self._set_cycle(cycle_id)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag.replace('W/', '', 1):
+            return True
+    return False
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip (a q of 0 refuses it, also through *)"""
+    qualities = {}
+    for entry in (accept_encoding or '').split(','):
+        coding, *params = (part.strip() for part in entry.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
+
+def seconds_until_next_cycle(listener):
+    """max-age for responses: time left before the collector's next cycle is due"""
+    if listener.cycle_seen_at is None:
+        # Haven't seen a cycle start yet - always revalidate
+        return 0
+    elapsed = time.monotonic() - listener.cycle_seen_at
+    return max(0, min(COLLECTION_INTERVAL_SECONDS, int(COLLECTION_INTERVAL_SECONDS - elapsed)))
+
+def bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({'error': message}), content_type='application/json')
+
+
+async def cycle_json(request, build, *args):
+    """Serve build(cycle_id, *args) as JSON with cycle-based ETag, Cache-Control and gzip
+
+    Encoded bodies are cached per URL for the current cycle, so repeat requests
+    skip both the data layer and serialization.
+    """
+    listener = request.app['cycle_listener']
+    cycle_id = listener.cycle_id
+    etag = f'W/"{cycle_id}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f'public, max-age={seconds_until_next_cycle(listener)}',
+        'Vary': 'Accept-Encoding'
+    }
+
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return web.Response(status=304, headers=headers)
+
+    cache = request.app['responses']
+    if cache['cycle_id'] != cycle_id:
+        cache['cycle_id'] = cycle_id
+        cache['bodies'] = {}
+
+    entry = cache['bodies'].get(request.path_qs)
+    if entry is None:
+        data = await asyncio.get_running_loop().run_in_executor(None, build, cycle_id, *args)
+        body = json.dumps(data, default=_json_default, separators=(',', ':')).encode('utf-8')
+        gzipped = gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None
+        entry = (body, gzipped)
+        # A new cycle may have landed while building; don't cache a stale body under it
+        if cache['cycle_id'] == cycle_id and len(cache['bodies']) < RESPONSE_CACHE_SIZE:
+            cache['bodies'][request.path_qs] = entry
+
+    body, gzipped = entry
+    if gzipped is not None and accepts_gzip(request.headers.get('Accept-Encoding')):
+        headers['Content-Encoding'] = 'gzip'
+        body = gzipped
+
+    return web.Response(body=body, content_type='application/json', headers=headers)
+
+
+def build_odds(cycle_id, league):
+    rows = get_dashboard_snapshot(cycle_id).latest_odds()
+    return {
+        'cycle_id': cycle_id,
+        'odds': [dict(zip(ODDS_FIELDS, row)) for row in rows if league is None or row[0] == league]
+    }
+
+def build_history(cycle_id, league, home_team, away_team, hours):
+    state = get_odds_state()
+    state.sync(cycle_id)
+    rows = state.history(league, home_team, away_team, datetime.now() - timedelta(hours=hours))
+    return {
+        'cycle_id': cycle_id,
+        'league': league,
+        'home_team': home_team,
+        'away_team': away_team,
+        'history': [dict(zip(HISTORY_FIELDS, row)) for row in rows]
+    }
+
+def build_movers(cycle_id, window, limit):
+    movers = get_dashboard_snapshot(cycle_id).top_movers(window, limit)
+    # minutes_ago changes every minute; clients get latest_time instead
+    for mover in movers:
+        mover.pop('minutes_ago', None)
+    return {'cycle_id': cycle_id, 'window': window, 'movers': movers}
+
+
+async def handle_cycle(request):
+    listener = request.app['cycle_listener']
+    return web.json_response({'cycle_id': listener.cycle_id}, headers={'Cache-Control': 'no-cache'})
+
+async def handle_odds(request):
+    return await cycle_json(request, build_odds, request.query.get('league'))
+
+async def handle_history(request):
+    league = request.query.get('league')
+    home_team = request.query.get('home_team')
+    away_team = request.query.get('away_team')
+    if not (league and home_team and away_team):
+        raise bad_request("league, home_team and away_team are required")
+    try:
+        hours = int(request.query.get('hours', '24'))
+    except ValueError:
+        raise bad_request("hours must be an integer")
+    if hours <= 0:
+        raise bad_request("hours must be positive")
+    return await cycle_json(request, build_history, league, home_team, away_team, hours)
+
+async def handle_movers(request):
+    window = request.query.get('window', '6h')
+    if window not in TIME_WINDOWS:
+        raise bad_request(f"window must be one of: {', '.join(TIME_WINDOWS)}")
+    try:
+        limit = int(request.query.get('limit', '10'))
+    except ValueError:
+        raise bad_request("limit must be an integer")
+    if not 1 <= limit <= MOVERS_STORED:
+        raise bad_request(f"limit must be between 1 and {MOVERS_STORED}")
+    return await cycle_json(request, build_movers, window, limit)
+
+
+async def start_listener(app):
+    await app['cycle_listener'].start()
+
+async def stop_listener(app):
+    await app['cycle_listener'].stop()
+
+def create_app():
+    app = web.Application()
+    app['cycle_listener'] = CycleListener()
+    app['responses'] = {'cycle_id': None, 'bodies': {}}
+    app.on_startup.append(start_listener)
+    setup_streaming(app, app['cycle_listener'])
+    app.on_cleanup.append(stop_listener)
+    app.router.add_get('/api/cycle', handle_cycle)
+    app.router.add_get('/api/odds', handle_odds)
+    app.router.add_get('/api/history', handle_history)
+    app.router.add_get('/api/movers', handle_movers)
+    return app
+
+
+if __name__ == "__main__":
+    if not DATABASE_URL:
+        print("ERROR: DATABASE_URL not found in environment variables")
+        exit(1)
+
+    print(f"🌐 Starting OddsEdge API on port {API_PORT}...")
+    web.run_app(create_app(), host='0.0.0.0', port=API_PORT)
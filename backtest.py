@@ -0,0 +1,520 @@
+"""
+Backtesting: replay stored odds snapshots through a strategy and report P&L and CLV
+
+Usage:
+    python backtest.py [--source odds|FILE.parquet] [--strategy NAME|module:Class] [--param key=value ...]
+                       [--workers N] [--since YYYY-MM-DD] [--results results.csv] [--output bets.csv]
+    python backtest.py --export odds.parquet [--since YYYY-MM-DD]
+
+Fixtures that have kicked off are replayed tick by tick, in chronological
+order, from the odds table or from a Parquet export of it (--export writes
+one, ordered by timestamp). Rows are streamed in batches, never loaded all
+at once, and fixtures are sharded across worker processes (one per core by
+default), balanced by their number of snapshots; each worker reads only its
+shard's rows. A fixture is one match (league, teams and kickoff), so the
+reverse fixture or next season's meeting is a fixture of its own. A strategy
+therefore sees each fixture on its own, never the whole market.
+
+A strategy is a Strategy subclass whose on_tick(tick, book) is called for
+every pre-match snapshot; it bets through the fixture's Book (back() at the
+current price, hedge() with the hedging.py formulas). The report has:
+    bets      every bet with its CLV against the replayed closing line
+    fixtures  profit per outcome, guaranteed profit and expected P&L at the
+              no-vig closing probabilities, and settled P&L for fixtures
+              whose result is in --results (league, home_team, away_team,
+              result as Home/Draw/Away, and commence_time to tell repeated
+              pairings apart; results aren't collected)
+"""
+import argparse
+import heapq
+import importlib
+import math
+import os
+import sys
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from closing_lines import FIXTURE_COLUMNS, MATCH_COLUMNS, compute_clv
+from hedging import OUTCOMES, hedge_stakes
+from odds_math import implied_prob, no_vig_probabilities
+from odds_state import SNAPSHOT_COLUMNS
+from query_stats import connect
+
+Tick = namedtuple('Tick', [column.strip() for column in SNAPSHOT_COLUMNS.split(',')])
+
+# Rows fetched (or read from the file) per batch
+BATCH_SIZE = 20000
+
+# Hedge stakes below this aren't placed (what's left after rounding)
+MIN_STAKE = 0.01
+
+PRICE_FIELDS = {'Home': 'home_odds', 'Draw': 'draw_odds', 'Away': 'away_odds'}
+FAIR_FIELDS = ('home_fair', 'draw_fair', 'away_fair')
+
+FIXTURES_QUERY = """
+SELECT league, home_team, away_team, commence_time, COUNT(*)
+FROM odds
+WHERE commence_time < NOW()
+  AND commence_time >= %(since)s
+GROUP BY league, home_team, away_team, commence_time
+"""
+
+# Pre-match rows of the shard's matches only
+SHARD_QUERY = f"""
+SELECT {SNAPSHOT_COLUMNS}
+FROM odds
+JOIN unnest(%(leagues)s::text[], %(home_teams)s::text[], %(away_teams)s::text[], %(kickoffs)s::timestamp[])
+     AS shard(league, home_team, away_team, commence_time) USING (league, home_team, away_team, commence_time)
+WHERE commence_time >= %(since)s
+  AND commence_time < NOW()
+  AND timestamp < commence_time
+ORDER BY timestamp, id
+"""
+
+EXPORT_QUERY = f"""
+SELECT {SNAPSHOT_COLUMNS}
+FROM odds
+WHERE commence_time >= %(since)s
+ORDER BY timestamp, id
+"""
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class Strategy:
+    """Per-tick callbacks; each worker process has its own instance"""
+
+    def __init__(self, **params):
+        self.params = params
+
+    def on_tick(self, tick, book):
+        """Called for every pre-match snapshot, in chronological order"""
+
+
+class BackFavourite(Strategy):
+    """Back the favourite at the first price seen (params: stake)"""
+
+    def on_tick(self, tick, book):
+        if not book.bets:
+            favourite = min(OUTCOMES, key=book.price)
+            book.back(favourite, self.params.get('stake', 10.0))
+
+
+class FollowSteamAndHedge(Strategy):
+    """Back an outcome once it shortens move_pp from its first price, hedge once it shortens hedge_pct more
+
+    Params: stake, move_pp, hedge_pct, floor (None to equalize the hedge)
+    """
+
+    def on_tick(self, tick, book):
+        probs = {outcome: implied_prob(book.price(outcome)) for outcome in OUTCOMES}
+        if None in probs.values():
+            return
+        if 'opening' not in book.state:
+            book.state['opening'] = probs
+            return
+        if not book.bets:
+            move_pp = self.params.get('move_pp', 3.0)
+            for outcome in OUTCOMES:
+                if (probs[outcome] - book.state['opening'][outcome]) * 100 >= move_pp:
+                    book.back(outcome, self.params.get('stake', 10.0))
+                    book.state['entry'] = (outcome, book.price(outcome))
+                    return
+        elif not book.state.get('hedged'):
+            outcome, entry_odds = book.state['entry']
+            if book.price(outcome) <= entry_odds / (1 + self.params.get('hedge_pct', 10.0) / 100):
+                book.state['hedged'] = bool(book.hedge(self.params.get('floor')))
+
+
+class Book:
+    """A strategy's bets on one fixture while it replays
+
+    Holds the fixture (league, home_team, away_team, commence_time), its
+    latest tick, the bets so far, their profit per outcome (pnl, in OUTCOMES
+    order) and a state dict for the strategy.
+    """
+
+    __slots__ = ('fixture', 'tick', 'bets', 'pnl', 'state')
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.tick = None
+        self.bets = []
+        self.pnl = np.zeros(len(OUTCOMES))
+        self.state = {}
+
+    def price(self, outcome):
+        """Current odds of an outcome at the tick's bookmaker"""
+        return getattr(self.tick, PRICE_FIELDS[outcome])
+
+    def back(self, outcome, stake, kind='back'):
+        """Bet on an outcome at the current price; returns the bet (None if the price or stake is invalid)"""
+        odds = self.price(outcome)
+        if odds is None or odds <= 1 or not stake > 0:
+            return None
+        self.pnl -= stake
+        self.pnl[OUTCOMES.index(outcome)] += stake * odds
+        bet = {
+            'league': self.fixture[0],
+            'home_team': self.fixture[1],
+            'away_team': self.fixture[2],
+            'bookmaker': self.tick.bookmaker,
+            'outcome': outcome,
+            'kind': kind,
+            'odds': odds,
+            'stake': stake,
+            'odds_id': self.tick.id,
+            'placed_at': self.tick.timestamp,
+            'commence_time': self.tick.commence_time
+        }
+        self.bets.append(bet)
+        return bet
+
+    def hedge(self, floor=None):
+        """Lock in the book's profit at the current prices (see hedging.hedge_stakes)
+
+        Returns:
+            the hedge bets (empty if nothing to hedge or the floor can't be reached)
+        """
+        prices = [self.price(outcome) or np.nan for outcome in OUTCOMES]
+        stakes = hedge_stakes(self.pnl, prices, floor)
+        return [bet for outcome, stake in zip(OUTCOMES, stakes)
+                if stake >= MIN_STAKE and (bet := self.back(outcome, float(stake), kind='hedge')) is not None]
+
+
+def shard_fixtures(counts, shards):
+    """Split fixtures into at most `shards` groups with similar numbers of snapshots
+
+    Args:
+        counts: {(league, home_team, away_team, commence_time): snapshots}
+
+    Returns:
+        list of non-empty fixture lists (largest fixtures placed first, each on the lightest shard)
+    """
+    heap = [(0, i, []) for i in range(max(shards, 1))]
+    for fixture, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        load, i, fixtures = heapq.heappop(heap)
+        fixtures.append(fixture)
+        heapq.heappush(heap, (load + count, i, fixtures))
+    return [fixtures for _, _, fixtures in sorted(heap, key=lambda shard: shard[1]) if fixtures]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+class DatabaseSource:
+    """Snapshots streamed from the odds table with a server-side cursor"""
+
+    def __init__(self, since=EPOCH):
+        self.since = since
+
+    def fixtures(self):
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute(FIXTURES_QUERY, {'since': self.since})
+        counts = {tuple(row[:4]): row[4] for row in cursor.fetchall()}
+        conn.close()
+        return counts
+
+    def ticks(self, fixtures):
+        conn = connect()
+        try:
+            cursor = conn.cursor(name='backtest_shard')
+            cursor.itersize = BATCH_SIZE
+            leagues, home_teams, away_teams, kickoffs = (list(column) for column in zip(*fixtures))
+            cursor.execute(SHARD_QUERY, {'leagues': leagues, 'home_teams': home_teams, 'away_teams': away_teams,
+                                         'kickoffs': kickoffs, 'since': self.since})
+            for row in cursor:
+                yield Tick._make(row)
+        finally:
+            conn.close()
+
+
+class ParquetSource:
+    """Snapshots streamed in batches from a file written by export_parquet (ordered by timestamp)"""
+
+    def __init__(self, path, since=EPOCH):
+        self.path = path
+        self.since = since
+
+    def _batches(self, columns, row_filter=None):
+        """Rows of `columns`, batch by batch, keeping only those matching a pyarrow.dataset filter
+
+        The filter runs in Arrow before any row becomes Python objects, and
+        row groups its column statistics rule out are never read.
+        """
+        dataset = _pyarrow().dataset.dataset(self.path, format='parquet')
+        for batch in dataset.to_batches(columns=columns, filter=row_filter, batch_size=BATCH_SIZE):
+            yield zip(*(batch.column(name).to_pylist() for name in columns))
+
+    def fixtures(self):
+        field = _pyarrow().dataset.field
+        window = (field('commence_time') >= self.since) & (field('commence_time') < datetime.utcnow())
+        counts = Counter()
+        for rows in self._batches(MATCH_COLUMNS, window):
+            counts.update(rows)
+        return dict(counts)
+
+    def ticks(self, fixtures):
+        pyarrow = _pyarrow()
+        field = pyarrow.dataset.field
+        wanted = set(fixtures)
+        leagues, home_teams, away_teams, kickoffs = (list(set(column)) for column in zip(*wanted))
+        # Per column the filter keeps a superset of the shard; the exact match key is checked below.
+        # The file is ordered by timestamp, so the upper bound skips the later row groups.
+        shard = (field('league').isin(leagues) & field('home_team').isin(home_teams)
+                 & field('away_team').isin(away_teams)
+                 & field('commence_time').isin(pyarrow.array(kickoffs, pyarrow.timestamp('us')))
+                 & (field('timestamp') < field('commence_time')) & (field('timestamp') < max(kickoffs)))
+        for rows in self._batches(list(Tick._fields), shard):
+            for row in rows:
+                if (row[1], row[2], row[3], row[9]) in wanted:
+                    yield Tick._make(row)
+
+
+def open_source(source, since=EPOCH):
+    """'odds' for the database, otherwise the path of a Parquet export"""
+    if source == 'odds':
+        return DatabaseSource(since)
+    return ParquetSource(source, since)
+
+
+def export_parquet(path, since=EPOCH):
+    """Write the odds table (from `since` kickoffs) to a Parquet file, streaming it in batches
+
+    Returns:
+        number of rows written
+    """
+    pyarrow = _pyarrow()
+    schema = pyarrow.schema([
+        ('id', pyarrow.int64()),
+        ('league', pyarrow.string()),
+        ('home_team', pyarrow.string()),
+        ('away_team', pyarrow.string()),
+        ('bookmaker', pyarrow.string()),
+        ('home_odds', pyarrow.float64()),
+        ('away_odds', pyarrow.float64()),
+        ('draw_odds', pyarrow.float64()),
+        ('timestamp', pyarrow.timestamp('us')),
+        ('commence_time', pyarrow.timestamp('us')),
+        ('home_fair', pyarrow.float64()),
+        ('away_fair', pyarrow.float64()),
+        ('draw_fair', pyarrow.float64()),
+        ('overround', pyarrow.float64()),
+    ])
+    conn = connect()
+    written = 0
+    try:
+        cursor = conn.cursor(name='backtest_export')
+        cursor.execute(EXPORT_QUERY, {'since': since})
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                writer.write_table(pyarrow.table({name: list(values) for name, values in zip(schema.names, columns)},
+                                                 schema=schema))
+                written += len(rows)
+    finally:
+        conn.close()
+    return written
+
+
+def run_shard(source, fixtures, strategy_class, params, bookmaker):
+    """Replay one shard of fixtures (in a worker process)
+
+    Returns:
+        (bets, fixture rows, closing rows) as lists of dicts
+    """
+    strategy = strategy_class(**params)
+    books = {}
+    # match -> last pre-kickoff tick at `bookmaker`
+    closing = {}
+    for tick in source.ticks(fixtures):
+        if tick.commence_time is None or tick.timestamp >= tick.commence_time:
+            continue
+        match = (tick.league, tick.home_team, tick.away_team, tick.commence_time)
+        if tick.bookmaker == bookmaker:
+            closing[match] = tick
+        book = books.get(match)
+        if book is None:
+            book = books[match] = Book(match)
+        book.tick = tick
+        strategy.on_tick(tick, book)
+
+    bets = [bet for book in books.values() for bet in book.bets]
+    fixture_rows = [
+        dict(zip(MATCH_COLUMNS, match),
+             staked=sum(bet['stake'] for bet in book.bets),
+             **{f'pnl_{outcome.lower()}': float(pnl) for outcome, pnl in zip(OUTCOMES, book.pnl)})
+        for match, book in books.items() if book.bets
+    ]
+    closing_rows = [
+        dict(zip(MATCH_COLUMNS, match), closing_home=tick.home_odds, closing_draw=tick.draw_odds,
+             closing_away=tick.away_odds, **{f'close_{field}': getattr(tick, field) for field in FAIR_FIELDS})
+        for match, tick in closing.items()
+    ]
+    return bets, fixture_rows, closing_rows
+
+
+def run_backtest(strategy_class, params=None, source='odds', workers=None, bookmaker='pinnacle', since=EPOCH,
+                 results=None):
+    """Replay every kicked-off fixture through a strategy
+
+    Args:
+        strategy_class: Strategy subclass (importable, so worker processes can build it)
+        params: keyword arguments for the strategy
+        source: 'odds' or the path of a Parquet export
+        workers: processes to shard fixtures across (default: one per core)
+        bookmaker: whose last pre-kickoff price is the closing line
+        since: only fixtures kicking off from then
+        results: optional DataFrame of league, home_team, away_team, result (and commence_time)
+
+    Returns:
+        (bets, fixtures) DataFrames, see the module docstring
+    """
+    source = open_source(source, since)
+    workers = workers or os.cpu_count() or 1
+    shards = shard_fixtures(source.fixtures(), workers)
+    args = [(source, shard, strategy_class, params or {}, bookmaker) for shard in shards]
+    if len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            outputs = list(pool.map(run_shard, *zip(*args)))
+    else:
+        outputs = [run_shard(*shard_args) for shard_args in args]
+
+    bets = pd.DataFrame([bet for output in outputs for bet in output[0]])
+    fixtures = pd.DataFrame([row for output in outputs for row in output[1]])
+    closing = pd.DataFrame([row for output in outputs for row in output[2]],
+                           columns=MATCH_COLUMNS + ['closing_home', 'closing_draw', 'closing_away']
+                           + [f'close_{field}' for field in FAIR_FIELDS])
+    if bets.empty:
+        return bets, fixtures
+
+    bets = compute_clv(bets, closing[MATCH_COLUMNS + ['closing_home', 'closing_draw', 'closing_away']])
+    bets = bets.sort_values(['placed_at', 'odds_id'], ignore_index=True)
+    return bets, settle_fixtures(fixtures, closing, results)
+
+
+def settle_fixtures(fixtures, closing, results=None):
+    """Guaranteed profit, expected P&L at the no-vig close and, with results, settled P&L per fixture"""
+    fixtures = fixtures.merge(closing, on=MATCH_COLUMNS, how='left')
+    pnl = fixtures[[f'pnl_{outcome.lower()}' for outcome in OUTCOMES]].to_numpy(dtype=float)
+
+    fair = fixtures[[f'close_{field}' for field in FAIR_FIELDS]].to_numpy(dtype=float)
+    # Snapshots stored before the fair columns existed
+    missing = np.isnan(fair).any(axis=1)
+    if missing.any():
+        home, away, draw, _ = no_vig_probabilities(fixtures['closing_home'][missing], fixtures['closing_away'][missing],
+                                                   fixtures['closing_draw'][missing])
+        fair[missing] = np.column_stack([home, draw, away])
+
+    fixtures['guaranteed_profit'] = pnl.min(axis=1)
+    fixtures['expected_pnl'] = (pnl * fair).sum(axis=1)
+    fixtures.loc[np.isnan(fair).any(axis=1), 'expected_pnl'] = np.nan
+
+    fixtures['result'] = None
+    fixtures['settled_pnl'] = np.nan
+    if results is not None and len(results):
+        # Results without kickoffs only tell matches apart by their teams
+        key = FIXTURE_COLUMNS
+        if 'commence_time' in results:
+            key = MATCH_COLUMNS
+            results = results.assign(commence_time=pd.to_datetime(results['commence_time']))
+        fixtures = fixtures.drop(columns='result').merge(results[key + ['result']], on=key, how='left')
+        result = fixtures['result'].to_numpy()
+        fixtures['settled_pnl'] = np.select([result == outcome for outcome in OUTCOMES], list(pnl.T), np.nan)
+    return fixtures.drop(columns=[f'close_{field}' for field in FAIR_FIELDS])
+
+
+def summarize(bets, fixtures):
+    """Headline numbers of a backtest"""
+    if bets.empty:
+        return {'bets': 0, 'fixtures': 0}
+    staked = bets['stake'].sum()
+    matched = bets.dropna(subset=['closing_odds'])
+    settled = fixtures.dropna(subset=['settled_pnl'])
+    return {
+        'bets': len(bets),
+        'fixtures': len(fixtures),
+        'staked': staked,
+        'expected_pnl': fixtures['expected_pnl'].sum(),
+        'expected_roi_pct': fixtures['expected_pnl'].sum() / staked * 100,
+        'guaranteed_profit': fixtures['guaranteed_profit'].sum(),
+        'mean_clv_pct': matched['clv_pct'].mean() if len(matched) else math.nan,
+        'beat_close_pct': (matched['clv_pct'] > 0).mean() * 100 if len(matched) else math.nan,
+        'settled_fixtures': len(settled),
+        'settled_pnl': settled['settled_pnl'].sum()
+    }
+
+
+def load_strategy(name):
+    """A strategy class by name (from this module) or as module:Class"""
+    module_name, _, class_name = name.rpartition(':')
+    module = importlib.import_module(module_name) if module_name else sys.modules[__name__]
+    strategy_class = getattr(module, class_name, None)
+    if not (isinstance(strategy_class, type) and issubclass(strategy_class, Strategy)):
+        raise ValueError(f"{name} is not a Strategy")
+    return strategy_class
+
+
+def parse_param(text):
+    key, _, value = text.partition('=')
+    try:
+        return key, float(value)
+    except ValueError:
+        return key, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored odds through a betting strategy")
+    parser.add_argument('--source', default='odds', help="'odds' (the database) or a Parquet export")
+    parser.add_argument('--strategy', default='FollowSteamAndHedge', help="name in backtest.py or module:Class")
+    parser.add_argument('--param', action='append', default=[], type=parse_param, metavar='KEY=VALUE',
+                        help="strategy parameter (repeatable)")
+    parser.add_argument('--workers', type=int, help="processes (default: one per core)")
+    parser.add_argument('--bookmaker', default='pinnacle', help="closing line bookmaker")
+    parser.add_argument('--since', type=datetime.fromisoformat, default=EPOCH, help="first kickoff date")
+    parser.add_argument('--results', help="CSV of league, home_team, away_team, result (Home/Draw/Away) "
+                                          "and optionally commence_time")
+    parser.add_argument('--output', help="write the bets (with CLV) as CSV here")
+    parser.add_argument('--export', metavar='PARQUET', help="export the odds table to a Parquet file and exit")
+    args = parser.parse_args()
+
+    if args.export:
+        print(f"✅ {export_parquet(args.export, args.since)} snapshots written to {args.export}")
+        return 0
+
+    results = pd.read_csv(args.results) if args.results else None
+    bets, fixtures = run_backtest(load_strategy(args.strategy), dict(args.param), args.source, args.workers,
+                                  args.bookmaker, args.since, results)
+    if args.output and not bets.empty:
+        bets.to_csv(args.output, index=False)
+
+    summary = summarize(bets, fixtures)
+    print(f"Bets:              {summary['bets']} on {summary['fixtures']} fixtures")
+    if summary['bets']:
+        print(f"Staked:            {summary['staked']:.2f}")
+        print(f"Expected P&L:      {summary['expected_pnl']:+.2f} ({summary['expected_roi_pct']:+.2f}% at the no-vig close)")
+        print(f"Guaranteed profit: {summary['guaranteed_profit']:+.2f}")
+        print(f"Mean CLV:          {summary['mean_clv_pct']:+.2f}% (beat the close {summary['beat_close_pct']:.0f}%)")
+        if summary['settled_fixtures']:
+            print(f"Settled P&L:       {summary['settled_pnl']:+.2f} over {summary['settled_fixtures']} fixtures")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Closing lines: the last pre-kickoff price of every fixture, and CLV against them
+
+Usage:
+    python closing_lines.py entries.csv [--output clv.csv]
+
+The CSV needs league, home_team, away_team, commence_time (kickoff in UTC, as
+in the odds table), outcome (Home/Draw/Away) and odds columns; the output adds
+the closing price and CLV columns (see compute_clv).
+
+The collector takes an extra snapshot CLOSING_LEAD before each kickoff and
+stores it in closing_lines; fixtures whose capture was missed get their last
+pre-kickoff snapshot instead on the next cycle.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from query_stats import connect
+
+# Closing prices are captured this long before kickoff
+CLOSING_LEAD = timedelta(minutes=2)
+
+# Kicked-off fixtures still missing a closing line are filled in for this long
+BACKFILL_PERIOD = timedelta(days=1)
+
+FIXTURE_COLUMNS = ['league', 'home_team', 'away_team']
+
+# A match: the same pairing meets again (reverse fixture, next season, cup tie)
+MATCH_COLUMNS = FIXTURE_COLUMNS + ['commence_time']
+
+# Last snapshot before kickoff for each match and bookmaker
+_LAST_PRE_KICKOFF = """
+SELECT DISTINCT ON (league, home_team, away_team, commence_time, bookmaker)
+       league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds,
+       commence_time, id, timestamp, %(source)s
+FROM odds
+WHERE {condition}
+  AND timestamp < commence_time
+ORDER BY league, home_team, away_team, commence_time, bookmaker, timestamp DESC, id DESC
+"""
+
+STORE_QUERY = f"""
+INSERT INTO closing_lines (league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds,
+                           commence_time, odds_id, snapshot_time, source)
+{_LAST_PRE_KICKOFF.format(condition="(league, home_team, away_team, commence_time) IN %(matches)s")}
+ON CONFLICT (league, home_team, away_team, commence_time, bookmaker) DO UPDATE
+SET home_odds = EXCLUDED.home_odds,
+    away_odds = EXCLUDED.away_odds,
+    draw_odds = EXCLUDED.draw_odds,
+    odds_id = EXCLUDED.odds_id,
+    snapshot_time = EXCLUDED.snapshot_time,
+    source = EXCLUDED.source
+"""
+
+# Plan checked by query_plans.py
+BACKFILL_QUERY = f"""
+INSERT INTO closing_lines (league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds,
+                           commence_time, odds_id, snapshot_time, source)
+{_LAST_PRE_KICKOFF.format(condition="commence_time BETWEEN %(kickoff_from)s AND %(kickoff_to)s")}
+ON CONFLICT (league, home_team, away_team, commence_time, bookmaker) DO NOTHING
+"""
+
+
+class ClosingLineSchedule:
+    """Which fixtures are due a closing capture, given the collector's OddsState"""
+
+    def __init__(self, lead=CLOSING_LEAD):
+        self.lead = lead
+        # (league, home_team, away_team) -> commence_time of fixtures already captured
+        self.captured = {}
+
+    def due(self, kickoffs, now):
+        """Uncaptured fixtures kicking off within the lead time, grouped by league
+
+        Args:
+            kickoffs: {(league, home_team, away_team): commence_time}, see OddsState.kickoffs
+        """
+        due = {}
+        for fixture, commence_time in kickoffs.items():
+            if self.captured.get(fixture) != commence_time and commence_time - self.lead <= now < commence_time:
+                due.setdefault(fixture[0], []).append(fixture)
+        return due
+
+    def next_capture_time(self, kickoffs, now):
+        """When the next capture is due (None if no upcoming fixture needs one)"""
+        times = [commence_time - self.lead for fixture, commence_time in kickoffs.items()
+                 if self.captured.get(fixture) != commence_time and commence_time > now]
+        return min(times, default=None)
+
+    def mark_captured(self, fixtures, kickoffs, now):
+        for fixture in fixtures:
+            self.captured[fixture] = kickoffs[fixture]
+        cutoff = now - BACKFILL_PERIOD
+        self.captured = {fixture: commence_time for fixture, commence_time in self.captured.items()
+                         if commence_time >= cutoff}
+
+
+def store_closing_lines(cursor, matches, source='kickoff'):
+    """Store the latest pre-kickoff snapshot of these matches as their closing lines
+
+    Args:
+        matches: (league, home_team, away_team, commence_time) tuples
+    """
+    matches = tuple(tuple(match) for match in matches)
+    if matches:
+        cursor.execute(STORE_QUERY, {'matches': matches, 'source': source})
+
+
+def backfill_closing_lines(cursor, now=None):
+    """Closing lines for recently kicked-off fixtures that don't have one yet
+
+    Returns:
+        int: number of closing lines added
+    """
+    now = now or datetime.utcnow()
+    cursor.execute(BACKFILL_QUERY, {'kickoff_from': now - BACKFILL_PERIOD, 'kickoff_to': now,
+                                    'source': 'last_snapshot'})
+    return cursor.rowcount
+
+
+def load_closing_lines(matches, bookmaker='pinnacle'):
+    """Closing lines of these (league, home_team, away_team, commence_time) matches as a DataFrame
+
+    One query however many there are.
+    """
+    matches = tuple(tuple(match) for match in matches)
+    columns = MATCH_COLUMNS + ['closing_home', 'closing_draw', 'closing_away', 'closing_source']
+    if not matches:
+        return pd.DataFrame(columns=columns)
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT league, home_team, away_team, commence_time, home_odds, draw_odds, away_odds, source
+        FROM closing_lines
+        WHERE bookmaker = %s
+          AND (league, home_team, away_team, commence_time) IN %s
+    """, (bookmaker, matches))
+    rows = cursor.fetchall()
+    conn.close()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def compute_clv(entries, closing):
+    """Closing-line value of entry prices, vectorized over all entries
+
+    Args:
+        entries: DataFrame with league, home_team, away_team, commence_time, outcome, odds
+        closing: DataFrame from load_closing_lines (the closing prices per MATCH_COLUMNS)
+
+    Returns:
+        entries plus closing_odds, clv_pct (entry vs closing price),
+        clv_pp (closing minus entry implied probability), fair_close_prob
+        (closing price without margin) and ev_pct (expected return at the
+        fair closing probability); NaN where there is no closing line
+    """
+    merged = entries.merge(closing, on=MATCH_COLUMNS, how='left')
+    outcome = merged['outcome'].to_numpy()
+    home, draw, away = (merged[column].to_numpy(dtype=float)
+                        for column in ('closing_home', 'closing_draw', 'closing_away'))
+    closing_odds = np.select([outcome == 'Home', outcome == 'Draw', outcome == 'Away'], [home, draw, away], np.nan)
+    entry_odds = merged['odds'].to_numpy(dtype=float)
+
+    overround = 1 / home + 1 / draw + 1 / away
+    fair_close_prob = (1 / closing_odds) / overround
+
+    merged['closing_odds'] = closing_odds
+    merged['clv_pct'] = (entry_odds / closing_odds - 1) * 100
+    merged['clv_pp'] = (1 / closing_odds - 1 / entry_odds) * 100
+    merged['fair_close_prob'] = fair_close_prob
+    merged['ev_pct'] = (entry_odds * fair_close_prob - 1) * 100
+    return merged
+
+
+def closing_line_value(entries, bookmaker='pinnacle'):
+    """compute_clv against the stored closing lines (entries: DataFrame or list of dicts)"""
+    entries = pd.DataFrame(entries)
+    if 'commence_time' not in entries:
+        raise ValueError("entries need a commence_time column to tell repeated pairings apart")
+    entries['commence_time'] = pd.to_datetime(entries['commence_time'])
+    matches = entries[MATCH_COLUMNS].drop_duplicates().itertuples(index=False, name=None)
+    return compute_clv(entries, load_closing_lines(matches, bookmaker))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Closing-line value of entry prices")
+    parser.add_argument('entries', help="CSV with league, home_team, away_team, commence_time, outcome, odds")
+    parser.add_argument('--output', help="write the result as CSV here (default: print a summary)")
+    args = parser.parse_args()
+
+    result = closing_line_value(pd.read_csv(args.entries))
+    if args.output:
+        result.to_csv(args.output, index=False)
+
+    matched = result.dropna(subset=['closing_odds'])
+    print(f"Entries:          {len(result)} ({len(matched)} with a closing line)")
+    if len(matched):
+        print(f"Mean CLV:         {matched['clv_pct'].mean():+.2f}% price, {matched['clv_pp'].mean():+.2f}pp")
+        print(f"Beat the close:   {(matched['clv_pct'] > 0).mean() * 100:.0f}%")
+        print(f"Mean EV at close: {matched['ev_pct'].mean():+.2f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""
+Shared pytest fixtures
+"""
+import os
+
+import pytest
+
+import synthetic_data
+
+
+@pytest.fixture
+def scratch_cursor(request):
+    """Cursor on a fresh copy of the init_db.py tables in the test module's SCHEMA (skips without DATABASE_URL)"""
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        pytest.skip("DATABASE_URL not set")
+    with synthetic_data.scratch_schema(request.module.SCHEMA, database_url) as cursor:
+        yield cursor
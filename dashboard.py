@@ -1,10 +1,16 @@
 import streamlit as st
-import psycopg2
 from datetime import datetime, timedelta, timezone
 import os
-import pandas as pd
-import plotly.graph_objects as go
+import time
 import pytz
+from live_refresh import auto_refresh, current_cycle_id
+from dashboard_snapshot import MARKET_WATCH_SORTS, get_dashboard_snapshot
+from odds_state import get_odds_state
+from team_search import get_team_index
+from page_assets import league_flag_sprite, use_stylesheets
+from query_stats import query_stats
+from diagnostics import render_profile_panel, render_query_panel
+from profiler import phase, profiler
 
 # Page configuration with custom favicon
 st.set_page_config(
@@ -14,782 +20,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for branding and segmented control with modern typography
-st.markdown("""
-    <style>
-    /* Modern typography system */
-    .stApp {
-        font-size: 16px;
-    }
-    
-    .main-header {
-        font-size: 3rem;
-        font-weight: 700;
-        color: #ffffff;
-        margin-bottom: 0.5rem;
-        letter-spacing: -0.02em;
-    }
-    .sub-header {
-        font-size: 1.3rem;
-        color: rgba(255, 255, 255, 0.7);
-        margin-bottom: 3rem;
-        font-weight: 400;
-        letter-spacing: -0.01em;
-    }
-    
-    /* Modern expander/card styling */
-    .stExpander {
-        margin-bottom: 16px;
-    }
-    
-    .stExpander summary {
-        padding: 16px 20px !important;
-        border-radius: 14px !important;
-        border: 1px solid rgba(255, 255, 255, 0.08) !important;
-        background-color: rgba(0, 0, 0, 0.25) !important;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.15), 0 1px 3px rgba(0, 0, 0, 0.1) !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stExpander summary:hover {
-        background-color: rgba(0, 0, 0, 0.35) !important;
-        box-shadow: 0 4px 16px rgba(0, 0, 0, 0.2), 0 2px 6px rgba(0, 0, 0, 0.15) !important;
-    }
-    
-    .stExpander > div {
-        border-radius: 0 0 14px 14px !important;
-        border: 1px solid rgba(255, 255, 255, 0.08) !important;
-        border-top: none !important;
-        background-color: rgba(0, 0, 0, 0.15) !important;
-        padding: 20px 24px !important;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1) !important;
-    }
-    
-    /* Remove heavy dividers */
-    hr {
-        border: none;
-        border-top: 1px solid rgba(255, 255, 255, 0.05);
-        margin: 2.5rem 0;
-    }
-    
-    /* Increase spacing between sections */
-    .element-container {
-        margin-bottom: 2rem;
-    }
-    
-    /* Modern subheader styling */
-    h3 {
-        font-size: 1.5rem !important;
-        font-weight: 600 !important;
-        letter-spacing: -0.01em !important;
-        margin-bottom: 1.5rem !important;
-        margin-top: 2rem !important;
-    }
-    
-    /* Modern table styling */
-    .stDataFrame {
-        border-radius: 12px !important;
-        overflow: hidden !important;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1) !important;
-    }
-    
-    /* Responsive odds display */
-    .odds-table-container {
-        width: 100%;
-    }
-    
-    /* Desktop: show table, hide cards */
-    .odds-table-desktop {
-        display: table;
-        width: 100%;
-        border-collapse: collapse;
-    }
-    
-    .odds-cards-mobile {
-        display: none;
-    }
-    
-    /* Mobile card styling */
-    .odds-card-mobile {
-        background-color: rgba(0, 0, 0, 0.2);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 8px;
-        padding: 12px;
-        margin-bottom: 12px;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-    }
-    
-    .odds-card-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        margin-bottom: 10px;
-        padding-bottom: 8px;
-        border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    .odds-card-header strong {
-        color: #ffffff;
-        font-size: 1rem;
-    }
-    
-    .odds-card-updated {
-        color: rgba(255, 255, 255, 0.6);
-        font-size: 0.85rem;
-    }
-    
-    .odds-card-body {
-        display: flex;
-        flex-direction: column;
-        gap: 8px;
-    }
-    
-    .odds-card-row {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        padding: 6px 0;
-    }
-    
-    .odds-label {
-        color: rgba(255, 255, 255, 0.7);
-        font-size: 0.9rem;
-        font-weight: 500;
-    }
-    
-    .odds-value {
-        color: #ffffff;
-        font-size: 0.95rem;
-        text-align: right;
-    }
-    
-    /* Mobile responsive: hide table, show cards */
-    @media screen and (max-width: 768px) {
-        .odds-table-desktop {
-            display: none !important;
-        }
-        
-        .odds-cards-mobile {
-            display: block !important;
-        }
-        
-        /* Adjust main content for mobile */
-        .main .block-container {
-            max-width: 100% !important;
-            padding-left: 1rem !important;
-            padding-right: 1rem !important;
-        }
-        
-        /* Adjust header for mobile */
-        .main-header {
-            font-size: 2rem !important;
-        }
-        
-        .sub-header {
-            font-size: 1.1rem !important;
-        }
-        
-        /* Adjust expander padding for mobile */
-        .stExpander > div {
-            padding: 16px !important;
-        }
-        
-        /* Mobile sidebar improvements - make it full width and clear */
-        section[data-testid="stSidebar"] {
-            min-width: 100% !important;
-            max-width: 100% !important;
-            width: 100% !important;
-            background-color: rgba(0, 0, 0, 0.6) !important;
-            backdrop-filter: blur(10px) !important;
-            border-right: none !important;
-        }
-        
-        /* Navigation container styling */
-        section[data-testid="stSidebar"] nav {
-            padding: 8px 12px !important;
-        }
-        
-        /* Make navigation items very visible and clear on mobile */
-        section[data-testid="stSidebar"] nav a {
-            color: rgba(255, 255, 255, 0.9) !important;
-            opacity: 1 !important;
-            font-size: 1.15rem !important;
-            font-weight: 500 !important;
-            padding: 16px 18px !important;
-            margin: 6px 0 !important;
-            border-radius: 10px !important;
-            background-color: rgba(255, 255, 255, 0.08) !important;
-            border: 1px solid rgba(255, 255, 255, 0.15) !important;
-            display: flex !important;
-            align-items: center !important;
-            min-height: 52px !important;
-            transition: all 0.2s ease !important;
-            text-decoration: none !important;
-            width: 100% !important;
-            box-sizing: border-box !important;
-        }
-        
-        section[data-testid="stSidebar"] nav a:hover,
-        section[data-testid="stSidebar"] nav a:active {
-            color: #ffffff !important;
-            background-color: rgba(255, 255, 255, 0.15) !important;
-            border-color: rgba(255, 255, 255, 0.25) !important;
-            transform: translateX(4px);
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2) !important;
-        }
-        
-        /* Active navigation item - very prominent on mobile */
-        section[data-testid="stSidebar"] nav a[aria-current="page"],
-        section[data-testid="stSidebar"] nav a[class*="active"] {
-            color: #ffffff !important;
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.25), rgba(255, 255, 255, 0.15)) !important;
-            border: 2px solid rgba(255, 255, 255, 0.4) !important;
-            font-weight: 700 !important;
-            font-size: 1.2rem !important;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4), inset 0 1px 0 rgba(255, 255, 255, 0.2) !important;
-        }
-        
-        /* Make icons larger and more visible on mobile */
-        section[data-testid="stSidebar"] .nav-icon {
-            width: 22px !important;
-            height: 22px !important;
-            margin-right: 14px !important;
-            opacity: 1 !important;
-            flex-shrink: 0 !important;
-        }
-        
-        section[data-testid="stSidebar"] nav a::before {
-            width: 22px !important;
-            height: 22px !important;
-            margin-right: 14px !important;
-            opacity: 1 !important;
-        }
-        
-        /* Sidebar headings - make them stand out */
-        section[data-testid="stSidebar"] h3,
-        section[data-testid="stSidebar"] .stMarkdown h3 {
-            color: rgba(255, 255, 255, 0.95) !important;
-            font-weight: 700 !important;
-            font-size: 1.3rem !important;
-            margin-bottom: 16px !important;
-            margin-top: 12px !important;
-            padding-bottom: 8px !important;
-            border-bottom: 2px solid rgba(255, 255, 255, 0.2) !important;
-        }
-        
-        /* League buttons - more visible on mobile */
-        .stSidebar button[kind="secondary"] {
-            padding: 14px 18px !important;
-            font-size: 1.05rem !important;
-            color: rgba(255, 255, 255, 0.85) !important;
-            background-color: rgba(0, 0, 0, 0.4) !important;
-            border: 1px solid rgba(255, 255, 255, 0.2) !important;
-            min-height: 48px !important;
-            font-weight: 500 !important;
-        }
-        
-        .stSidebar button[kind="primary"] {
-            padding: 14px 18px !important;
-            font-size: 1.05rem !important;
-            font-weight: 700 !important;
-            min-height: 48px !important;
-            background-color: rgba(255, 255, 255, 0.2) !important;
-            border: 2px solid rgba(255, 255, 255, 0.3) !important;
-        }
-        
-        /* Ensure sidebar content is readable */
-        section[data-testid="stSidebar"] .stMarkdown,
-        section[data-testid="stSidebar"] p {
-            color: rgba(255, 255, 255, 0.85) !important;
-            font-size: 1rem !important;
-        }
-        
-        /* Ensure navigation text is clear */
-        section[data-testid="stSidebar"] nav a > div {
-            font-weight: inherit !important;
-        }
-    }
-    
-    /* Compact status text */
-    .status-text {
-        font-size: 0.85rem;
-        color: rgba(255, 255, 255, 0.5);
-        text-align: right;
-        margin-top: 0.5rem;
-        margin-bottom: 0;
-        padding-top: 0;
-    }
-    
-    /* Constrain main content column width and center it */
-    .main .block-container {
-        padding-top: 1rem !important;
-        max-width: 1400px !important;
-        margin-left: auto !important;
-        margin-right: auto !important;
-    }
-    
-    /* Reduce spacing after header */
-    .main .block-container > div:first-child {
-        margin-top: 0 !important;
-        padding-top: 0 !important;
-    }
-    
-    /* Compact spacing for tape view */
-    .element-container {
-        margin-bottom: 0.5rem !important;
-    }
-    
-    /* Market Watch table styling */
-    .tape-table {
-        width: 100%;
-        border-collapse: collapse;
-        margin-top: 0.5rem;
-    }
-    
-    .tape-table th {
-        background-color: rgba(0, 0, 0, 0.3);
-        color: rgba(255, 255, 255, 0.7);
-        font-size: 0.85rem;
-        font-weight: 600;
-        padding: 8px 12px;
-        text-align: left;
-        border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    .tape-table td {
-        padding: 10px 12px;
-        border-bottom: 1px solid rgba(255, 255, 255, 0.05);
-        font-size: 0.9rem;
-    }
-    
-    .tape-row {
-        cursor: pointer;
-        transition: background-color 0.2s ease;
-    }
-    
-    .tape-row:hover {
-        background-color: rgba(255, 255, 255, 0.05);
-    }
-    
-    .tape-row.selected {
-        background-color: rgba(255, 255, 255, 0.1);
-    }
-    
-    .strength-badge-tape {
-        display: inline-block;
-        padding: 2px 6px;
-        border-radius: 4px;
-        font-size: 0.7rem;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    .strength-badge-tape.strong {
-        background-color: rgba(255, 100, 100, 0.2);
-        color: #ff6464;
-        border: 1px solid rgba(255, 100, 100, 0.3);
-    }
-    
-    .strength-badge-tape.medium {
-        background-color: rgba(255, 200, 100, 0.2);
-        color: #ffc864;
-        border: 1px solid rgba(255, 200, 100, 0.3);
-    }
-    
-    /* Biggest Movers card styling */
-    .mover-card {
-        padding: 20px 24px;
-        margin-bottom: 16px;
-        border-radius: 14px;
-        border: 1px solid rgba(255, 255, 255, 0.08);
-        background-color: rgba(0, 0, 0, 0.25);
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.15), 0 1px 3px rgba(0, 0, 0, 0.1);
-        transition: all 0.3s ease;
-        backdrop-filter: blur(10px);
-    }
-    
-    .mover-card:hover {
-        background-color: rgba(0, 0, 0, 0.35);
-        box-shadow: 0 4px 16px rgba(0, 0, 0, 0.2), 0 2px 6px rgba(0, 0, 0, 0.15);
-        transform: translateY(-2px);
-    }
-    
-    .mover-match {
-        font-size: 1.15rem;
-        font-weight: 600;
-        color: #ffffff;
-        margin-bottom: 8px;
-        letter-spacing: -0.01em;
-    }
-    
-    .mover-details {
-        color: rgba(255, 255, 255, 0.75);
-        font-size: 0.95rem;
-        margin-top: 6px;
-        display: inline-block;
-        line-height: 1.6;
-    }
-    
-    /* Ensure flag emojis render properly */
-    .flag-emoji {
-        font-family: "Apple Color Emoji", "Segoe UI Emoji", "Noto Color Emoji", "Android Emoji", "EmojiSymbols", "EmojiOne Mozilla", "Twemoji Mozilla", "Segoe UI Symbol", sans-serif;
-        font-size: 1.2em;
-        display: inline-block;
-        line-height: 1;
-    }
-    
-    /* Segmented Control Styling - ONLY for Home/Draw/Away tabs inside expanders */
-    /* Completely exclude sidebar - use very specific selectors */
-    section[data-testid="stSidebar"] .stRadio,
-    [data-testid="stSidebar"] .stRadio,
-    .css-1d391kg .stRadio {
-        all: unset !important;
-        display: block !important;
-    }
-    
-    section[data-testid="stSidebar"] .stRadio > div,
-    [data-testid="stSidebar"] .stRadio > div,
-    .css-1d391kg .stRadio > div {
-        all: revert !important;
-    }
-    
-    section[data-testid="stSidebar"] .stRadio label,
-    [data-testid="stSidebar"] .stRadio label,
-    .css-1d391kg .stRadio label {
-        all: revert !important;
-    }
-    
-    /* Target ONLY radio buttons inside expander content (where Home/Draw/Away tabs are) */
-    .stExpander .element-container .stRadio > div {
-        display: flex !important;
-        gap: 6px !important;
-        margin-bottom: 12px !important;
-        flex-direction: row !important;
-    }
-    
-    .stExpander .element-container .stRadio > div[role="radiogroup"] {
-        display: flex !important;
-        gap: 6px !important;
-        width: 100% !important;
-        flex-direction: row !important;
-    }
-    
-    /* Compact tab styling - only in expanders */
-    .stExpander .element-container .stRadio > div > label,
-    .stExpander .element-container .stRadio > div[role="radiogroup"] > label {
-        flex: 1 !important;
-        padding: 6px 12px !important;
-        border-radius: 6px !important;
-        border: 1px solid rgba(255, 255, 255, 0.15) !important;
-        background-color: rgba(0, 0, 0, 0.3) !important;
-        color: rgba(255, 255, 255, 0.6) !important;
-        text-align: center !important;
-        cursor: pointer !important;
-        transition: all 0.2s ease !important;
-        font-weight: 500 !important;
-        position: relative !important;
-        margin-bottom: 0 !important;
-        display: flex !important;
-        flex-direction: row !important;
-        align-items: center !important;
-        justify-content: center !important;
-        min-height: 32px !important;
-        box-sizing: border-box !important;
-        font-size: 0.9rem !important;
-    }
-    
-    .stExpander .element-container .stRadio > div > label:hover,
-    .stExpander .element-container .stRadio > div[role="radiogroup"] > label:hover {
-        background-color: rgba(0, 0, 0, 0.4) !important;
-        color: rgba(255, 255, 255, 0.8) !important;
-    }
-    
-    /* Active tab styling - only in expanders */
-    .stExpander .element-container .stRadio > div > label:has(input[type="radio"]:checked),
-    .stExpander .element-container .stRadio > div[role="radiogroup"] > label:has(input[type="radio"]:checked) {
-        background-color: rgba(255, 255, 255, 0.15) !important;
-        color: rgba(255, 255, 255, 0.95) !important;
-        border-color: rgba(255, 255, 255, 0.25) !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Active tab underline - only in expanders */
-    .stExpander .element-container .stRadio > div > label:has(input[type="radio"]:checked)::after,
-    .stExpander .element-container .stRadio > div[role="radiogroup"] > label:has(input[type="radio"]:checked)::after {
-        content: '' !important;
-        position: absolute !important;
-        bottom: 0 !important;
-        left: 0 !important;
-        right: 0 !important;
-        height: 2px !important;
-        background-color: #4ECDC4 !important;
-        border-radius: 0 0 6px 6px !important;
-    }
-    
-    /* Hide default radio button circles - only in expanders */
-    .stExpander .element-container .stRadio input[type="radio"] {
-        position: absolute !important;
-        opacity: 0 !important;
-        width: 0 !important;
-        height: 0 !important;
-        margin: 0 !important;
-        pointer-events: none !important;
-    }
-    
-    /* Ensure proper spacing - only in expanders */
-    .stExpander .element-container .stRadio {
-        margin-bottom: 8px !important;
-    }
-    
-    /* Style the label text container - only in expanders */
-    .stExpander .element-container .stRadio label > div {
-        width: 100% !important;
-        text-align: center !important;
-    }
-    
-    /* Reduce sidebar width */
-    section[data-testid="stSidebar"] {
-        min-width: 18rem !important;
-        max-width: 18rem !important;
-    }
-    
-    /* Make sidebar feel secondary - reduce overall visual weight */
-    section[data-testid="stSidebar"] {
-        background-color: rgba(0, 0, 0, 0.3) !important;
-    }
-    
-    /* Lower contrast for sidebar headings */
-    section[data-testid="stSidebar"] h3,
-    section[data-testid="stSidebar"] .stMarkdown h3 {
-        color: rgba(255, 255, 255, 0.5) !important;
-        font-weight: 500 !important;
-    }
-    
-    /* Lower contrast for inactive navigation items */
-    section[data-testid="stSidebar"] nav a {
-        color: rgba(255, 255, 255, 0.4) !important;
-        opacity: 0.7 !important;
-    }
-    
-    section[data-testid="stSidebar"] nav a:hover {
-        color: rgba(255, 255, 255, 0.6) !important;
-        opacity: 0.85 !important;
-    }
-    
-    /* Keep active navigation item clearly highlighted */
-    section[data-testid="stSidebar"] nav a[aria-current="page"],
-    section[data-testid="stSidebar"] nav a[class*="active"],
-    section[data-testid="stSidebar"] nav a:has([data-baseweb="base-select"]),
-    section[data-testid="stSidebar"] nav a[href]:focus {
-        color: rgba(255, 255, 255, 0.95) !important;
-        opacity: 1 !important;
-        font-weight: 600 !important;
-        background-color: rgba(255, 255, 255, 0.08) !important;
-        border-radius: 4px !important;
-    }
-    
-    /* Lower contrast for sidebar text content */
-    section[data-testid="stSidebar"] .stMarkdown,
-    section[data-testid="stSidebar"] p {
-        color: rgba(255, 255, 255, 0.5) !important;
-    }
-    
-    /* Style league selection buttons in sidebar - lower contrast */
-    .stSidebar button[kind="secondary"] {
-        width: 100% !important;
-        text-align: left !important;
-        padding: 8px 12px !important;
-        margin-bottom: 4px !important;
-        border-radius: 4px !important;
-        border: 1px solid rgba(255, 255, 255, 0.08) !important;
-        background-color: rgba(0, 0, 0, 0.15) !important;
-        color: rgba(255, 255, 255, 0.5) !important;
-        transition: all 0.2s ease !important;
-    }
-    
-    .stSidebar button[kind="secondary"]:hover {
-        background-color: rgba(255, 255, 255, 0.08) !important;
-        border-color: rgba(255, 255, 255, 0.12) !important;
-        color: rgba(255, 255, 255, 0.7) !important;
-    }
-    
-    /* Keep primary (active) button prominent */
-    .stSidebar button[kind="primary"] {
-        background-color: rgba(255, 255, 255, 0.12) !important;
-        color: rgba(255, 255, 255, 0.95) !important;
-        border-color: rgba(255, 255, 255, 0.2) !important;
-        font-weight: 600 !important;
-    }
-    
-    .stSidebar button[kind="primary"]:hover {
-        background-color: rgba(255, 255, 255, 0.18) !important;
-        border-color: rgba(255, 255, 255, 0.25) !important;
-    }
-    
-    /* Sidebar navigation icons styling */
-    .nav-icon {
-        display: inline-block;
-        width: 16px;
-        height: 16px;
-        margin-right: 8px;
-        vertical-align: middle;
-        opacity: 0.7;
-        flex-shrink: 0;
-    }
-    
-    section[data-testid="stSidebar"] nav a,
-    section[data-testid="stSidebar"] a[href] {
-        display: flex !important;
-        align-items: center !important;
-    }
-    
-    section[data-testid="stSidebar"] nav a:hover .nav-icon,
-    section[data-testid="stSidebar"] a:hover .nav-icon {
-        opacity: 1;
-    }
-    
-    /* CSS fallback for Dashboard icon using ::before */
-    section[data-testid="stSidebar"] nav a[href="/"]::before,
-    section[data-testid="stSidebar"] nav a[href=""]::before {
-        content: '';
-        display: inline-block;
-        width: 16px;
-        height: 16px;
-        margin-right: 8px;
-        vertical-align: middle;
-        background-image: url("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='16' height='16' viewBox='0 0 24 24' fill='none' stroke='rgba(255,255,255,0.7)' stroke-width='2' stroke-linecap='round' stroke-linejoin='round'%3E%3Crect x='3' y='3' width='7' height='7'/%3E%3Crect x='14' y='3' width='7' height='7'/%3E%3Crect x='14' y='14' width='7' height='7'/%3E%3Crect x='3' y='14' width='7' height='7'/%3E%3C/svg%3E");
-        background-size: contain;
-        background-repeat: no-repeat;
-        background-position: center;
-        opacity: 0.7;
-        flex-shrink: 0;
-    }
-    
-    /* CSS fallback for Biggest Movers icon */
-    section[data-testid="stSidebar"] nav a[href*="Biggest_Movers"]::before,
-    section[data-testid="stSidebar"] nav a[href*="biggest"]::before {
-        content: '';
-        display: inline-block;
-        width: 16px;
-        height: 16px;
-        margin-right: 8px;
-        vertical-align: middle;
-        background-image: url("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='16' height='16' viewBox='0 0 24 24' fill='none' stroke='rgba(255,255,255,0.7)' stroke-width='2' stroke-linecap='round' stroke-linejoin='round'%3E%3Cpolyline points='23 6 13.5 15.5 8.5 10.5 1 18'/%3E%3Cpolyline points='17 6 23 6 23 12'/%3E%3C/svg%3E");
-        background-size: contain;
-        background-repeat: no-repeat;
-        background-position: center;
-        opacity: 0.7;
-        flex-shrink: 0;
-    }
-    
-    /* CSS fallback for Hedge Calculator icon */
-    section[data-testid="stSidebar"] nav a[href*="Hedge_Calculator"]::before,
-    section[data-testid="stSidebar"] nav a[href*="hedge"]::before {
-        content: '';
-        display: inline-block;
-        width: 16px;
-        height: 16px;
-        margin-right: 8px;
-        vertical-align: middle;
-        background-image: url("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='16' height='16' viewBox='0 0 24 24' fill='none' stroke='rgba(255,255,255,0.7)' stroke-width='2' stroke-linecap='round' stroke-linejoin='round'%3E%3Crect x='4' y='2' width='16' height='20' rx='2'/%3E%3Cline x1='8' y1='6' x2='16' y2='6'/%3E%3Cline x1='8' y1='10' x2='16' y2='10'/%3E%3Cline x1='8' y1='14' x2='16' y2='14'/%3E%3Cline x1='8' y1='18' x2='16' y2='18'/%3E%3C/svg%3E");
-        background-size: contain;
-        background-repeat: no-repeat;
-        background-position: center;
-        opacity: 0.7;
-        flex-shrink: 0;
-    }
-    </style>
-    <script>
-    // Add icons to sidebar navigation and capitalize Dashboard
-    function addNavIcons() {
-        const sidebar = document.querySelector('section[data-testid="stSidebar"]');
-        if (!sidebar) {
-            // Try alternative selector
-            setTimeout(addNavIcons, 100);
-            return;
-        }
-        
-        // Find all navigation links - try multiple selectors
-        let navLinks = sidebar.querySelectorAll('nav a');
-        if (navLinks.length === 0) {
-            navLinks = sidebar.querySelectorAll('a[href]');
-        }
-        if (navLinks.length === 0) {
-            navLinks = sidebar.querySelectorAll('[data-testid*="nav"] a, [class*="nav"] a');
-        }
-        
-        navLinks.forEach(link => {
-            // Skip if icon already added
-            if (link.querySelector('.nav-icon')) return;
-            
-            const text = link.textContent.trim();
-            const href = link.getAttribute('href') || '';
-            const textLower = text.toLowerCase();
-            
-            let iconSvg = '';
-            let shouldCapitalize = false;
-            
-            // Dashboard icon (grid/layout) - check for dashboard (case insensitive)
-            if (textLower === 'dashboard' || href === '/' || href === '' || href === '/dashboard' || href.includes('dashboard')) {
-                iconSvg = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="rgba(255,255,255,0.7)" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><rect x="3" y="3" width="7" height="7"></rect><rect x="14" y="3" width="7" height="7"></rect><rect x="14" y="14" width="7" height="7"></rect><rect x="3" y="14" width="7" height="7"></rect></svg>';
-                shouldCapitalize = true;
-            }
-            // Biggest Movers icon (trending up)
-            else if (textLower.includes('biggest movers') || textLower.includes('biggest_movers') || href.includes('Biggest_Movers') || href.includes('biggest')) {
-                iconSvg = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="rgba(255,255,255,0.7)" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polyline points="23 6 13.5 15.5 8.5 10.5 1 18"></polyline><polyline points="17 6 23 6 23 12"></polyline></svg>';
-            }
-            // Hedge Calculator icon (calculator)
-            else if (textLower.includes('hedge calculator') || textLower.includes('hedge_calculator') || href.includes('Hedge_Calculator') || href.includes('hedge')) {
-                iconSvg = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="rgba(255,255,255,0.7)" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><rect x="4" y="2" width="16" height="20" rx="2"></rect><line x1="8" y1="6" x2="16" y2="6"></line><line x1="8" y1="10" x2="16" y2="10"></line><line x1="8" y1="14" x2="16" y2="14"></line><line x1="8" y1="18" x2="16" y2="18"></line></svg>';
-            }
-            
-            if (iconSvg) {
-                const icon = document.createElement('span');
-                icon.className = 'nav-icon';
-                icon.innerHTML = iconSvg;
-                link.insertBefore(icon, link.firstChild);
-            }
-            
-            // Capitalize Dashboard text
-            if (shouldCapitalize && textLower === 'dashboard') {
-                const textNode = Array.from(link.childNodes).find(node => node.nodeType === 3);
-                if (textNode) {
-                    textNode.textContent = 'Dashboard';
-                } else {
-                    // If no direct text node, try to update the text content
-                    const currentText = link.textContent.trim();
-                    if (currentText.toLowerCase() === 'dashboard') {
-                        link.innerHTML = link.innerHTML.replace(/dashboard/gi, 'Dashboard');
-                    }
-                }
-            }
-        });
-    }
-    
-    // Run immediately and on load
-    addNavIcons();
-    
-    if (document.readyState === 'loading') {
-        document.addEventListener('DOMContentLoaded', addNavIcons);
-    }
-    
-    // Re-run after Streamlit navigation (using MutationObserver)
-    setTimeout(() => {
-        const sidebar = document.querySelector('section[data-testid="stSidebar"]');
-        if (sidebar) {
-            const observer = new MutationObserver(() => {
-                setTimeout(addNavIcons, 50);
-            });
-            observer.observe(sidebar, { childList: true, subtree: true });
-        }
-    }, 500);
-    
-    // Also run after a delay to catch late-rendered elements
-    setTimeout(addNavIcons, 1000);
-    setTimeout(addNavIcons, 2000);
-    </script>
-""", unsafe_allow_html=True)
+# Collect this rerun's queries for the admin panel
+query_stats.start_run()
+rerun_started = time.perf_counter()
+
+# Branding and layout styles (static/css), sent to the browser once per session
+use_stylesheets('dashboard', 'navigation', 'flags')
 
 # Header with compact status
 header_col1, header_col2 = st.columns([0.7, 0.3])
@@ -813,16 +49,37 @@ with time_window_col1:
                                     key="time_window_selector")
     st.session_state.time_window_selection = selected_window
 
-# Convert time window to timedelta
-if selected_window == "Since Open":
-    window_timedelta = None
-else:
-    hours = int(selected_window.replace("h", ""))
-    window_timedelta = timedelta(hours=hours)
+# Fair probabilities (margin removed) for the charts, shared with Biggest Movers
+if 'fair_probabilities' not in st.session_state:
+    st.session_state.fair_probabilities = False
+# The checkbox's own state is dropped while another page is shown, so restore it from the shared flag
+if 'fair_probabilities_toggle' not in st.session_state:
+    st.session_state.fair_probabilities_toggle = st.session_state.fair_probabilities
+with time_window_col2:
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.session_state.fair_probabilities = st.checkbox(
+        "Fair probabilities (no vig)", key="fair_probabilities_toggle",
+        help="Chart each outcome's probability with the bookmaker margin removed, and rank Biggest Movers by it"
+    )
+fair_probabilities = st.session_state.fair_probabilities
 
 # Search box
 search_query = st.text_input("Search matches", placeholder="Filter by team name...", key="match_search")
 
+# Market Watch filters and sort order
+KICKOFF_WITHIN_OPTIONS = {"6h": 6, "12h": 12, "24h": 24, "48h": 48, "72h": 72}
+MIN_MOVE_OPTIONS = {"Any": 0, "1pp+": 1, "2pp+": 2, "3pp+": 3, "5pp+": 5}
+MARKET_WATCH_PAGE_SIZE = 25
+
+filter_col1, filter_col2, filter_col3 = st.columns(3)
+with filter_col1:
+    kickoff_within = st.selectbox("Kickoff within", list(KICKOFF_WITHIN_OPTIONS),
+                                  index=len(KICKOFF_WITHIN_OPTIONS) - 1, key="kickoff_within")
+with filter_col2:
+    min_move = st.selectbox("Min move", list(MIN_MOVE_OPTIONS), key="min_move")
+with filter_col3:
+    market_watch_sort = st.selectbox("Sort by", MARKET_WATCH_SORTS, key="market_watch_sort")
+
 # Database connection
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
@@ -830,10 +87,6 @@ if not DATABASE_URL:
     st.error("Database connection not configured")
     st.stop()
 
-def get_db_connection():
-    """Create database connection"""
-    return psycopg2.connect(DATABASE_URL)
-
 # Helper functions for implied probability calculations
 def implied_prob(o):
     """Calculate implied probability from decimal odds"""
@@ -841,14 +94,6 @@ def implied_prob(o):
         return 1.0 / o
     return None
 
-def delta_pp(open_o, now_o):
-    """Calculate percentage point change in implied probability"""
-    open_prob = implied_prob(open_o)
-    now_prob = implied_prob(now_o)
-    if open_prob is not None and now_prob is not None:
-        return (now_prob - open_prob) * 100
-    return None
-
 def delta_odds_pct(open_o, now_o):
     """Calculate percentage change in odds"""
     if open_o and open_o > 0 and now_o and now_o > 0:
@@ -893,105 +138,35 @@ def is_pre_match(commence_time):
 
 def load_latest_odds():
     """Load the most recent odds for each match (next 3 days only)"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = """
-    SELECT league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds, timestamp, commence_time
-    FROM (
-        SELECT *, 
-               ROW_NUMBER() OVER (
-                   PARTITION BY league, home_team, away_team, bookmaker 
-                   ORDER BY timestamp DESC
-               ) as rn
-        FROM odds
-        WHERE timestamp >= NOW() - INTERVAL '24 hours'
-          AND (
-              commence_time IS NOT NULL 
-              AND commence_time >= CURRENT_DATE 
-              AND commence_time < CURRENT_DATE + INTERVAL '3 days'
-          )
-    ) ranked
-    WHERE rn = 1
-    ORDER BY league, home_team, bookmaker
-    """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return rows
+    return get_dashboard_snapshot(current_cycle_id()).latest_odds()
+
+def find_teams(query):
+    """Team names matching a search query (accent-insensitive, with aliases like "Atleti")"""
+    team_index = get_team_index()
+    team_index.refresh(current_cycle_id())
+    return team_index.search(query)
+
+def load_market_watch_page(window, league, teams, kickoff_within_hours, min_move_pp, sort, page):
+    """Load one page of Market Watch fixtures, filtered and sorted on the server"""
+    return get_dashboard_snapshot(current_cycle_id()).market_watch(
+        window, league=league, teams=teams, kickoff_within_hours=kickoff_within_hours,
+        min_move_pp=min_move_pp, sort=sort, page=page, page_size=MARKET_WATCH_PAGE_SIZE
+    )
+
+def change_market_watch_page(step):
+    st.session_state.market_watch_page += step
 
 def load_odds_history(league, home_team, away_team, hours=24):
     """Load historical odds for a specific match"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = """
-    SELECT bookmaker, home_odds, away_odds, draw_odds, timestamp
-    FROM odds
-    WHERE league = %s 
-        AND home_team = %s 
-        AND away_team = %s
-        AND timestamp >= NOW() - INTERVAL '%s hours'
-    ORDER BY timestamp ASC
-    """
-    
-    cursor.execute(query, (league, home_team, away_team, hours))
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return rows
+    return get_odds_state().history(league, home_team, away_team, datetime.now() - timedelta(hours=hours))
 
-def get_opening_odds(league, home_team, away_team, bookmaker, time_window=None):
+def get_opening_odds(league, home_team, away_team, bookmaker, window="Since Open"):
     """Get the first recorded odds for a match within time window (opening odds)
     
     Args:
-        time_window: timedelta object for time window, or None for "Since Open"
+        window: time window label ("1h", "3h", "6h", "24h" or "Since Open")
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    if time_window is None:
-        # "Since Open" - get earliest recorded odds
-        query = """
-        SELECT home_odds, away_odds, draw_odds, timestamp
-        FROM odds
-        WHERE league = %s 
-            AND home_team = %s 
-            AND away_team = %s
-            AND bookmaker = %s
-        ORDER BY timestamp ASC
-        LIMIT 1
-        """
-        cursor.execute(query, (league, home_team, away_team, bookmaker))
-    else:
-        # Get earliest odds within time window
-        cutoff_time = datetime.now() - time_window
-        query = """
-        SELECT home_odds, away_odds, draw_odds, timestamp
-        FROM odds
-        WHERE league = %s 
-            AND home_team = %s 
-            AND away_team = %s
-            AND bookmaker = %s
-            AND timestamp >= %s
-        ORDER BY timestamp ASC
-        LIMIT 1
-        """
-        cursor.execute(query, (league, home_team, away_team, bookmaker, cutoff_time))
-    
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        return {
-            'home_odds': row[0],
-            'away_odds': row[1],
-            'draw_odds': row[2],
-            'timestamp': row[3]
-        }
-    return None
+    return get_dashboard_snapshot(current_cycle_id()).opening_odds(league, home_team, away_team, bookmaker, window)
 
 def calculate_odds_change(opening_odds, current_odds):
     """Calculate percentage change and direction for odds"""
@@ -1010,170 +185,12 @@ def calculate_odds_change(opening_odds, current_odds):
         # No change
         return 0, "—", "gray"
 
-def get_biggest_mover_for_match(league, home_team, away_team, bookmaker, current_odds, time_window=None):
+def get_biggest_mover_for_match(league, home_team, away_team, bookmaker, window="Since Open"):
     """Get the biggest mover (by absolute implied probability delta) for a match
     
-    Returns: (outcome, opening_odds, current_odds, delta_pp, movement_text, movement_color, strength_badge)
-    """
-    opening = get_opening_odds(league, home_team, away_team, bookmaker, time_window)
-    if not opening:
-        return None
-    
-    home_delta_pp = delta_pp(opening['home_odds'], current_odds['home_odds'])
-    draw_delta_pp = delta_pp(opening['draw_odds'], current_odds['draw_odds'])
-    away_delta_pp = delta_pp(opening['away_odds'], current_odds['away_odds'])
-    
-    if all([home_delta_pp is not None, draw_delta_pp is not None, away_delta_pp is not None]):
-        deltas = [
-            (abs(home_delta_pp), home_delta_pp, 'Home', opening['home_odds'], current_odds['home_odds']),
-            (abs(draw_delta_pp), draw_delta_pp, 'Draw', opening['draw_odds'], current_odds['draw_odds']),
-            (abs(away_delta_pp), away_delta_pp, 'Away', opening['away_odds'], current_odds['away_odds'])
-        ]
-        max_abs_delta_pp, signed_delta_pp, outcome, opening_odds_val, current_odds_val = max(deltas, key=lambda x: x[0])
-        
-        # Determine movement
-        if current_odds_val < opening_odds_val:
-            movement_text = "shortened"
-            movement_color = "#44ff44"  # Green
-        else:
-            movement_text = "drifted"
-            movement_color = "#ff4444"  # Red
-        
-        # Determine strength badge
-        strength_badge = ""
-        if abs(signed_delta_pp) >= 5:
-            strength_badge = "STRONG"
-        elif abs(signed_delta_pp) >= 3:
-            strength_badge = "MEDIUM"
-        
-        return {
-            'outcome': outcome,
-            'opening_odds': opening_odds_val,
-            'current_odds': current_odds_val,
-            'delta_pp': signed_delta_pp,
-            'abs_delta_pp': abs(signed_delta_pp),
-            'movement_text': movement_text,
-            'movement_color': movement_color,
-            'strength_badge': strength_badge
-        }
-    
-    return None
-
-def calculate_no_vig_probability(home_odds, draw_odds, away_odds):
-    """Calculate no-vig implied probabilities from decimal odds"""
-    if not all([home_odds, draw_odds, away_odds]):
-        return None, None, None
-    
-    # Calculate implied probabilities (1/odds)
-    home_implied = 1.0 / home_odds
-    draw_implied = 1.0 / draw_odds
-    away_implied = 1.0 / away_odds
-    
-    # Total market margin (vig)
-    total_implied = home_implied + draw_implied + away_implied
-    
-    # Remove vig by normalizing
-    home_no_vig = home_implied / total_implied
-    draw_no_vig = draw_implied / total_implied
-    away_no_vig = away_implied / total_implied
-    
-    return home_no_vig, draw_no_vig, away_no_vig
-
-def get_biggest_movers():
-    """Get the top 10 matches with largest absolute implied probability changes"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get all unique matches from last 24 hours
-    # Exclude finished and in-play matches - only include future matches (commence_time > NOW)
-    query = """
-    SELECT DISTINCT league, home_team, away_team, bookmaker
-    FROM odds
-    WHERE timestamp >= NOW() - INTERVAL '24 hours'
-      AND commence_time IS NOT NULL 
-      AND commence_time > NOW()
+    Returns: dict with outcome, opening_odds, current_odds, delta_pp, movement_text, movement_color, strength_badge
     """
-    
-    cursor.execute(query)
-    matches = cursor.fetchall()
-    
-    movers = []
-    
-    for league, home_team, away_team, bookmaker in matches:
-        # Get opening odds (first in last 24h)
-        opening_query = """
-        SELECT home_odds, away_odds, draw_odds, timestamp
-        FROM odds
-        WHERE league = %s 
-          AND home_team = %s 
-          AND away_team = %s
-          AND bookmaker = %s
-          AND timestamp >= NOW() - INTERVAL '24 hours'
-        ORDER BY timestamp ASC
-        LIMIT 1
-        """
-        
-        cursor.execute(opening_query, (league, home_team, away_team, bookmaker))
-        opening_row = cursor.fetchone()
-        
-        # Get latest odds
-        latest_query = """
-        SELECT home_odds, away_odds, draw_odds, timestamp
-        FROM odds
-        WHERE league = %s 
-          AND home_team = %s 
-          AND away_team = %s
-          AND bookmaker = %s
-          AND timestamp >= NOW() - INTERVAL '24 hours'
-        ORDER BY timestamp DESC
-        LIMIT 1
-        """
-        
-        cursor.execute(latest_query, (league, home_team, away_team, bookmaker))
-        latest_row = cursor.fetchone()
-        
-        if opening_row and latest_row:
-            opening_home, opening_away, opening_draw, opening_time = opening_row
-            latest_home, latest_away, latest_draw, latest_time = latest_row
-            
-            # Calculate implied probability deltas (Δpp) for each outcome
-            home_delta_pp = delta_pp(opening_home, latest_home)
-            draw_delta_pp = delta_pp(opening_draw, latest_draw)
-            away_delta_pp = delta_pp(opening_away, latest_away)
-            
-            if all([home_delta_pp is not None, draw_delta_pp is not None, away_delta_pp is not None]):
-                # Find the largest absolute delta_pp
-                deltas = [
-                    (abs(home_delta_pp), home_delta_pp, 'Home', opening_home, latest_home),
-                    (abs(draw_delta_pp), draw_delta_pp, 'Draw', opening_draw, latest_draw),
-                    (abs(away_delta_pp), away_delta_pp, 'Away', opening_away, latest_away)
-                ]
-                max_abs_delta_pp, signed_delta_pp, outcome, opening_odds, latest_odds = max(deltas, key=lambda x: x[0])
-                
-                # Calculate implied probability percentage change for display (not percentage points)
-                prob_pct_change = implied_prob_pct_change(opening_odds, latest_odds)
-                
-                # Calculate minutes ago
-                minutes_ago = int((datetime.now() - latest_time).total_seconds() / 60)
-                
-                movers.append({
-                    'league': league,
-                    'home_team': home_team,
-                    'away_team': away_team,
-                    'outcome': outcome,
-                    'delta_pp': signed_delta_pp,  # Keep for internal ranking
-                    'abs_delta_pp': max_abs_delta_pp,  # Keep for internal ranking
-                    'prob_pct_change': prob_pct_change,  # For display
-                    'opening_odds': opening_odds,
-                    'latest_odds': latest_odds,
-                    'minutes_ago': minutes_ago
-                })
-    
-    conn.close()
-    
-    # Sort by absolute delta_pp descending and return top 10
-    movers.sort(key=lambda x: x['abs_delta_pp'], reverse=True)
-    return movers[:10]
+    return get_dashboard_snapshot(current_cycle_id()).biggest_mover(league, home_team, away_team, bookmaker, window)
 
 def get_odds_direction(history, odds_type):
     """Calculate odds movement direction"""
@@ -1190,23 +207,9 @@ def get_odds_direction(history, odds_type):
     else:
         return "—", "gray"
 
-# League to country code mapping for flag images
-LEAGUE_COUNTRY_CODES = {
-    'EPL': 'GB',
-    'Italy Serie A': 'IT',
-    'Spain La Liga': 'ES',
-    'Germany Bundesliga': 'DE',
-    'France Ligue One': 'FR'
-}
-
 def get_league_flag_html(league):
-    """Get flag as HTML img tag using CDN"""
-    country_code = LEAGUE_COUNTRY_CODES.get(league, '')
-    if country_code:
-        # Using flagcdn.com CDN for reliable flag images
-        flag_url = f"https://flagcdn.com/w20/{country_code.lower()}.png"
-        return f'<img src="{flag_url}" alt="{country_code}" style="width: 20px; height: 15px; vertical-align: middle; margin-right: 4px; border: 1px solid rgba(255,255,255,0.2);">'
-    return '⚽'  # Fallback to soccer ball emoji
+    """Get flag HTML for a league (inline sprite from the "flags" stylesheet, no image requests)"""
+    return league_flag_sprite(league)
 
 # League navigation mapping (database name -> display name with flag)
 # Using HTML img tags for flags in sidebar
@@ -1226,8 +229,13 @@ def get_league_flag(league):
 # Supported leagues (always show all, even if 0 matches)
 SUPPORTED_LEAGUES = ['EPL', 'Italy Serie A', 'Spain La Liga', 'Germany Bundesliga', 'France Ligue One']
 
-# Load current odds
-odds_data = load_latest_odds()
+# Merge only the snapshots committed since the last sync into the shared in-memory state
+# (used for the odds movement charts)
+with phase("data_load"):
+    get_odds_state().sync(current_cycle_id())
+
+    # Load current odds from the per-cycle snapshot
+    odds_data = load_latest_odds()
 
 # League navigation in sidebar
 # Initialize session state for selected league
@@ -1288,73 +296,46 @@ if not odds_data:
     st.warning("No odds data available yet. The data collector may still be gathering initial data.")
     st.info("Check back in a few minutes, or verify that the data collector is running.")
 else:
-    # Apply league filter
-    filtered_data = odds_data
-    if selected_league is not None:
-        filtered_data = [row for row in filtered_data if row[0] == selected_league]
-    
-    # Apply search filter
-    if search_query:
-        search_lower = search_query.lower()
-        filtered_data = [row for row in filtered_data 
-                        if search_lower in row[1].lower() or search_lower in row[2].lower()]
-    
-    # Define 72-hour rolling window (now + 5 minutes to now + 72 hours)
-    now_utc = datetime.now(timezone.utc)
-    window_start = now_utc + timedelta(minutes=5)
-    window_end = now_utc + timedelta(hours=72)
+    # Back to the first page whenever the filters change
+    market_watch_filters = (selected_league, search_query, kickoff_within, min_move, market_watch_sort, selected_window)
+    if st.session_state.get('market_watch_filters') != market_watch_filters:
+        st.session_state.market_watch_filters = market_watch_filters
+        st.session_state.market_watch_page = 0
+    
+    # Only the visible page of fixtures is built (and sent to the browser)
+    with phase("market_watch.query"):
+        search_teams = find_teams(search_query) if search_query.strip() else None
+        market_watch = load_market_watch_page(selected_window, selected_league, search_teams,
+                                              KICKOFF_WITHIN_OPTIONS[kickoff_within], MIN_MOVE_OPTIONS[min_move],
+                                              market_watch_sort, st.session_state.market_watch_page)
+    st.session_state.market_watch_page = market_watch['page']
     
     # Europe/Dublin timezone for local date grouping
     dublin_tz = pytz.timezone('Europe/Dublin')
     
-    # Filter matches within 72-hour window and group by local calendar date
-    matches_by_local_date = {}
-    for row in filtered_data:
-        commence_time = row[8] if row[8] else None
-        
-        # Skip matches without commence_time
-        if commence_time is None:
-            continue
-        
-        # Ensure commence_time is timezone-aware (assume UTC if naive)
-        if commence_time.tzinfo is None:
-            commence_time_utc = commence_time.replace(tzinfo=timezone.utc)
-        else:
-            commence_time_utc = commence_time.astimezone(timezone.utc)
-        
-        # Filter: window_start < kickoff_utc < window_end
-        if commence_time_utc <= window_start or commence_time_utc >= window_end:
-            continue
-        
-        # Convert to Europe/Dublin timezone for local date grouping
-        commence_time_local = commence_time_utc.astimezone(dublin_tz)
-        local_date = commence_time_local.date()
-        
-        league, home, away = row[0], row[1], row[2]
-        key = (league, home, away)
-        
-        if local_date not in matches_by_local_date:
-            matches_by_local_date[local_date] = {}
-        
-        if key not in matches_by_local_date[local_date]:
-            matches_by_local_date[local_date][key] = []
-        matches_by_local_date[local_date][key].append(row)
+    # Group the page by local calendar date when sorted by kickoff; other sort orders stay flat
+    page_groups = []
+    with phase("market_watch.grouping"):
+        for fixture in market_watch['fixtures']:
+            key = (fixture['league'], fixture['home_team'], fixture['away_team'])
+            local_date = fixture['commence_time'].astimezone(dublin_tz).date() if market_watch_sort == "Kickoff" else None
+            if not page_groups or page_groups[-1][0] != local_date:
+                page_groups.append((local_date, []))
+            page_groups[-1][1].append((key, fixture['rows']))
     
     # Display Market Watch with matches grouped by local date
-    if matches_by_local_date:
+    if page_groups:
         st.markdown("### Market Watch")
         
-        # Sort dates chronologically
-        sorted_dates = sorted(matches_by_local_date.keys())
-        
         # Process each date group
-        for local_date in sorted_dates:
-            # Format date header: "Monday 19 January"
-            date_header = local_date.strftime('%A %d %B')
-            st.markdown(f"#### {date_header}")
+        for local_date, date_matches in page_groups:
+            if local_date is not None:
+                # Format date header: "Monday 19 January"
+                date_header = local_date.strftime('%A %d %B')
+                st.markdown(f"#### {date_header}")
             
             # Display expanders for each match in this date
-            for (league, home, away), match_data in matches_by_local_date[local_date].items():
+            for (league, home, away), match_data in date_matches:
                 # Get latest odds for this match (from first bookmaker in match_data, should be Pinnacle)
                 latest_row = match_data[0]
                 bookmaker = latest_row[3]
@@ -1371,17 +352,12 @@ else:
                     else:
                         commence_time_utc = commence_time.astimezone(timezone.utc)
                     commence_time_local = commence_time_utc.astimezone(dublin_tz)
-                    kickoff_str = commence_time_local.strftime('%H:%M')
+                    kickoff_str = commence_time_local.strftime('%H:%M' if local_date is not None else '%a %d %b %H:%M')
                 else:
                     kickoff_str = "—"
                 
                 # Get biggest mover for expander label
-                current_odds_dict = {
-                    'home_odds': home_odds,
-                    'draw_odds': draw_odds,
-                    'away_odds': away_odds
-                }
-                biggest_mover = get_biggest_mover_for_match(league, home, away, bookmaker, current_odds_dict, window_timedelta)
+                biggest_mover = get_biggest_mover_for_match(league, home, away, bookmaker, selected_window)
                 
                 # Format biggest mover summary for expander label
                 if biggest_mover:
@@ -1398,7 +374,7 @@ else:
                 with flag_col:
                     st.markdown(league_flag_html, unsafe_allow_html=True)
                 with expander_col:
-                    with st.expander(expander_label, expanded=False):
+                    with st.expander(expander_label, expanded=False), phase("market_watch.expander"):
                         # Check if match has started
                         if not is_pre_match(commence_time):
                             st.warning("This match has started and is no longer tracked.")
@@ -1416,7 +392,7 @@ else:
                                 timestamp = row[7].strftime('%H:%M:%S')
                                 
                                 # Get opening odds for this bookmaker with time window
-                                opening = get_opening_odds(league, home, away, bookmaker, window_timedelta)
+                                opening = get_opening_odds(league, home, away, bookmaker, selected_window)
                                 
                                 # Format Home odds with Open, Current, and implied probability change
                                 if opening:
@@ -1518,7 +494,10 @@ else:
                                         'timestamp': row[4],
                                         'home_odds': row[1],
                                         'draw_odds': row[3],
-                                        'away_odds': row[2]
+                                        'away_odds': row[2],
+                                        'home_fair': row[5],
+                                        'draw_fair': row[7],
+                                        'away_fair': row[6]
                                     })
                                 
                                 history.sort(key=lambda x: x['timestamp'])
@@ -1531,11 +510,22 @@ else:
                                         unique_history.append(h)
                                 unique_history.reverse()
                                 
+                                if fair_probabilities:
+                                    # Stored at ingest; rows without a full 1X2 price have none
+                                    unique_history = [h for h in unique_history if h['home_fair'] is not None]
+                                
                                 if len(unique_history) >= 2:
                                     timestamps = [h['timestamp'] for h in unique_history]
-                                    home_vals = [float(h['home_odds']) for h in unique_history]
-                                    draw_vals = [float(h['draw_odds']) for h in unique_history]
-                                    away_vals = [float(h['away_odds']) for h in unique_history]
+                                    if fair_probabilities:
+                                        home_vals = [h['home_fair'] * 100 for h in unique_history]
+                                        draw_vals = [h['draw_fair'] * 100 for h in unique_history]
+                                        away_vals = [h['away_fair'] * 100 for h in unique_history]
+                                        value_format = "{:.1f}%"
+                                    else:
+                                        home_vals = [float(h['home_odds']) for h in unique_history]
+                                        draw_vals = [float(h['draw_odds']) for h in unique_history]
+                                        away_vals = [float(h['away_odds']) for h in unique_history]
+                                        value_format = "{:.2f}"
                                     
                                     home_open = home_vals[0]
                                     home_now = home_vals[-1]
@@ -1544,7 +534,7 @@ else:
                                     away_open = away_vals[0]
                                     away_now = away_vals[-1]
                                     
-                                    match_key_detail = f"{league}_{home}_{away}_{local_date}_detail_tab"
+                                    match_key_detail = f"{league}_{home}_{away}_{commence_time_local.date()}_detail_tab"
                                     selected_tab = st.radio(
                                         "Outcome",
                                         ["Home", "Draw", "Away"],
@@ -1553,9 +543,13 @@ else:
                                         label_visibility="collapsed"
                                     )
                                     
-                                    st.markdown("#### Odds Movement (Last 24h)")
+                                    st.markdown("#### Fair Probability Movement (Last 24h)" if fair_probabilities
+                                                else "#### Odds Movement (Last 24h)")
                                     
                                     def create_focused_graph(timestamps, values, outcome_name, color, open_val, now_val):
+                                        # Imported on first chart so sessions that never open one don't pay for it
+                                        import plotly.graph_objects as go
+                                        
                                         if values:
                                             y_min = min(values)
                                             y_max = max(values)
@@ -1579,7 +573,7 @@ else:
                                         fig.update_layout(
                                             height=400,
                                             xaxis_title="Time",
-                                            yaxis_title="Odds",
+                                            yaxis_title="Fair probability (%)" if fair_probabilities else "Odds",
                                             yaxis=dict(range=y_range) if y_range else {},
                                             hovermode='x unified',
                                             plot_bgcolor='rgba(0,0,0,0)',
@@ -1589,33 +583,56 @@ else:
                                         
                                         return fig
                                     
-                                    if selected_tab == "Home":
-                                        st.markdown(f"**Open:** {home_open:.2f} • **Now:** {home_now:.2f}")
-                                        fig_home = create_focused_graph(timestamps, home_vals, 'Home', '#FF6B6B', home_open, home_now)
-                                        st.plotly_chart(fig_home, use_container_width=True)
-                                    elif selected_tab == "Draw":
-                                        st.markdown(f"**Open:** {draw_open:.2f} • **Now:** {draw_now:.2f}")
-                                        fig_draw = create_focused_graph(timestamps, draw_vals, 'Draw', '#4ECDC4', draw_open, draw_now)
-                                        st.plotly_chart(fig_draw, use_container_width=True)
-                                    else:  # Away
-                                        st.markdown(f"**Open:** {away_open:.2f} • **Now:** {away_now:.2f}")
-                                        fig_away = create_focused_graph(timestamps, away_vals, 'Away', '#95E1D3', away_open, away_now)
-                                        st.plotly_chart(fig_away, use_container_width=True)
+                                    with phase("market_watch.chart"):
+                                        if selected_tab == "Home":
+                                            st.markdown(f"**Open:** {value_format.format(home_open)} • **Now:** {value_format.format(home_now)}")
+                                            fig_home = create_focused_graph(timestamps, home_vals, 'Home', '#FF6B6B', home_open, home_now)
+                                            st.plotly_chart(fig_home, use_container_width=True)
+                                        elif selected_tab == "Draw":
+                                            st.markdown(f"**Open:** {value_format.format(draw_open)} • **Now:** {value_format.format(draw_now)}")
+                                            fig_draw = create_focused_graph(timestamps, draw_vals, 'Draw', '#4ECDC4', draw_open, draw_now)
+                                            st.plotly_chart(fig_draw, use_container_width=True)
+                                        else:  # Away
+                                            st.markdown(f"**Open:** {value_format.format(away_open)} • **Now:** {value_format.format(away_now)}")
+                                            fig_away = create_focused_graph(timestamps, away_vals, 'Away', '#95E1D3', away_open, away_now)
+                                            st.plotly_chart(fig_away, use_container_width=True)
                             else:
                                 st.info("Not enough historical data yet. Check back after a few updates.")
-    else:
+        
+        # Pager
+        if market_watch['pages'] > 1:
+            prev_col, page_col, next_col = st.columns([0.2, 0.6, 0.2])
+            with prev_col:
+                st.button("← Previous", key="market_watch_prev", use_container_width=True,
+                          disabled=market_watch['page'] == 0, on_click=change_market_watch_page, args=(-1,))
+            with page_col:
+                st.markdown(f"<div style='text-align: center;'>Page {market_watch['page'] + 1} of {market_watch['pages']} · {market_watch['total']} fixtures</div>", unsafe_allow_html=True)
+            with next_col:
+                st.button("Next →", key="market_watch_next", use_container_width=True,
+                          disabled=market_watch['page'] >= market_watch['pages'] - 1, on_click=change_market_watch_page, args=(1,))
+    elif selected_league is None and search_teams is None and min_move == "Any" and kickoff_within == "72h":
         st.info("No fixtures in the next 72 hours.")
+    else:
+        st.info("No fixtures match the current filters.")
     
     # Auto-refresh toggle
     st.sidebar.markdown("<br>", unsafe_allow_html=True)
-    auto_refresh = st.sidebar.checkbox("Auto-refresh (60s)", value=False)
+    auto_refresh_enabled = st.sidebar.checkbox("Auto-refresh on new odds", value=False)
     
-    if auto_refresh:
-        st.sidebar.info("Page will refresh every 60 seconds")
-        import time
-        time.sleep(60)
-        st.rerun()
+    # Non-blocking: a shared watcher reruns this session when a new collection cycle lands
+    if not auto_refresh(auto_refresh_enabled):
+        # This server can't rerun sessions (see live_refresh.py); any rerun picks up new odds
+        st.sidebar.warning("Live refresh isn't available on this server. New odds show on your next refresh.")
+        st.sidebar.button("Refresh", key="manual_refresh", use_container_width=True)
+    elif auto_refresh_enabled:
+        st.sidebar.info("Page will refresh as soon as new odds are collected")
 
 # Footer
 st.markdown("---")
 st.caption("OddsEdge - Professional Odds Tracking | Data updates every 15 minutes")
+
+profiler.record("rerun", (time.perf_counter() - rerun_started) * 1000)
+
+# Query and phase timings (only with ADMIN_PANEL=1)
+render_query_panel()
+render_profile_panel()
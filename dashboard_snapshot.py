@@ -0,0 +1,469 @@
+import json
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+
+from odds_math import biggest_delta, biggest_fair_delta, delta_pp, implied_prob, implied_prob_pct_change
+from odds_state import get_odds_state
+from query_stats import connect
+
+# Bump whenever the payload layout changes; snapshots in an older format are ignored
+SNAPSHOT_VERSION = 3
+
+# Time windows offered by Market Watch and Biggest Movers (hours, None = since open)
+TIME_WINDOWS = {"1h": 1, "3h": 3, "6h": 6, "24h": 24, "Since Open": None}
+
+# "Since Open" movers only consider matches updated within this period
+SINCE_OPEN_RECENT = timedelta(days=7)
+
+# Ranked movers stored per window; pages show the top 10 that are still pre-match
+MOVERS_STORED = 20
+
+# Older snapshot rows are deleted once this many newer ones exist
+SNAPSHOTS_KEPT = 5
+
+# Position of each outcome's price in an OddsState snapshot
+PRICE_INDEX = {'Home': 3, 'Away': 4, 'Draw': 5}
+
+# Market Watch sort orders
+MARKET_WATCH_SORTS = ("Kickoff", "Biggest move", "League")
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _parse(value):
+    return datetime.fromisoformat(value) if value else None
+
+def _as_utc(value):
+    """Naive timestamps are stored in UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def build_snapshot(state, cycle_id, volatility=None):
+    """Precompute everything Market Watch and Biggest Movers display
+
+    Args:
+        state: synced OddsState holding the full history of upcoming fixtures
+        cycle_id: collection cycle the snapshot describes
+        volatility: VolatilityTracker fed by the same state, for the z-score
+            ranking (left empty without one)
+
+    Returns:
+        dict: JSON-serializable snapshot (see encode_snapshot)
+    """
+    now = datetime.now()
+    window_starts = {label: (now - timedelta(hours=hours) if hours else None)
+                     for label, hours in TIME_WINDOWS.items()}
+
+    # Split every fixture's history by bookmaker once
+    by_bookmaker = {}
+    for (league, home_team, away_team), history in state.fixture_histories().items():
+        for snapshot in history:
+            by_bookmaker.setdefault((league, home_team, away_team, snapshot[2]), []).append(snapshot)
+
+    # Market Watch: latest prices, opening prices and biggest mover per window
+    fixtures = []
+    for league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds, timestamp, commence_time in state.latest_odds():
+        snapshots = by_bookmaker.get((league, home_team, away_team, bookmaker), [])
+        opening_by_window = {}
+        mover_by_window = {}
+        for label, since in window_starts.items():
+            first = next((s for s in snapshots if since is None or s[0] >= since), None)
+            if first is None:
+                opening_by_window[label] = None
+                mover_by_window[label] = None
+                continue
+            first_time, _, _, open_home, open_away, open_draw, *_ = first
+            opening_by_window[label] = [open_home, open_away, open_draw, _iso(first_time)]
+            mover = biggest_delta((open_home, open_draw, open_away), (home_odds, draw_odds, away_odds))
+            mover_by_window[label] = list(mover) if mover else None
+
+        fixtures.append({
+            'league': league,
+            'home_team': home_team,
+            'away_team': away_team,
+            'bookmaker': bookmaker,
+            'home_odds': home_odds,
+            'away_odds': away_odds,
+            'draw_odds': draw_odds,
+            'timestamp': _iso(timestamp),
+            'commence_time': _iso(commence_time),
+            'opening': opening_by_window,
+            'mover': mover_by_window
+        })
+
+    # Biggest Movers: open-vs-latest within each window, ranked by absolute Δpp
+    # of the raw implied probability and, separately, of the no-vig probability
+    # (which ignores changes in the bookmaker's margin), and by z-score: the
+    # move relative to the outcome's own tick-to-tick noise
+    kickoff_cutoff = datetime.now(timezone.utc) + timedelta(minutes=5)
+    movers = {}
+    fair_movers = {}
+    zscore_movers = {}
+    for label, since in window_starts.items():
+        ranked = []
+        fair_ranked = []
+        zscore_ranked = []
+        for (league, home_team, away_team, bookmaker), snapshots in by_bookmaker.items():
+            commence_time = snapshots[-1][6]
+            if _as_utc(commence_time) <= kickoff_cutoff:
+                continue
+
+            if since is None:
+                recent = [s for s in snapshots if s[0] >= now - SINCE_OPEN_RECENT]
+                if not recent:
+                    continue
+                opening, latest = snapshots[0], recent[-1]
+                ticks = len(snapshots) - 1
+            else:
+                in_window = [s for s in snapshots if s[0] >= since]
+                if not in_window:
+                    continue
+                opening, latest = in_window[0], in_window[-1]
+                ticks = len(in_window) - 1
+
+            fixture = {
+                'league': league,
+                'home_team': home_team,
+                'away_team': away_team,
+                'latest_time': _iso(latest[0]),
+                'commence_time': _iso(commence_time)
+            }
+
+            mover = biggest_delta((opening[3], opening[5], opening[4]), (latest[3], latest[5], latest[4]))
+            if mover is not None:
+                outcome, signed_delta_pp, opening_odds, latest_odds = mover
+                ranked.append(dict(
+                    fixture,
+                    outcome=outcome,
+                    delta_pp=signed_delta_pp,
+                    abs_delta_pp=abs(signed_delta_pp),
+                    prob_pct_change=implied_prob_pct_change(opening_odds, latest_odds),
+                    opening_odds=opening_odds,
+                    latest_odds=latest_odds,
+                    opening_prob=implied_prob(opening_odds),
+                    latest_prob=implied_prob(latest_odds)
+                ))
+
+            fair_mover = biggest_fair_delta((opening[7], opening[9], opening[8]), (latest[7], latest[9], latest[8]))
+            if fair_mover is not None:
+                outcome, signed_delta_pp, opening_prob, latest_prob = fair_mover
+                fair_ranked.append(dict(
+                    fixture,
+                    outcome=outcome,
+                    delta_pp=signed_delta_pp,
+                    abs_delta_pp=abs(signed_delta_pp),
+                    prob_pct_change=(latest_prob / opening_prob - 1) * 100 if opening_prob else None,
+                    opening_odds=opening[PRICE_INDEX[outcome]],
+                    latest_odds=latest[PRICE_INDEX[outcome]],
+                    opening_prob=opening_prob,
+                    latest_prob=latest_prob
+                ))
+
+            if volatility is not None:
+                unusual = []
+                for outcome, price_index in PRICE_INDEX.items():
+                    stats = volatility.stats(league, home_team, away_team, bookmaker, outcome)
+                    move_pp = delta_pp(opening[price_index], latest[price_index])
+                    zscore = stats.zscore(move_pp, ticks) if stats is not None and move_pp is not None else None
+                    if zscore is not None:
+                        unusual.append((abs(zscore), zscore, outcome, move_pp, stats.sigma_pp))
+                if unusual:
+                    _, zscore, outcome, move_pp, sigma_pp = max(unusual, key=lambda x: x[0])
+                    opening_odds, latest_odds = opening[PRICE_INDEX[outcome]], latest[PRICE_INDEX[outcome]]
+                    zscore_ranked.append(dict(
+                        fixture,
+                        outcome=outcome,
+                        zscore=zscore,
+                        abs_zscore=abs(zscore),
+                        sigma_pp=sigma_pp,
+                        ticks=ticks,
+                        delta_pp=move_pp,
+                        abs_delta_pp=abs(move_pp),
+                        prob_pct_change=implied_prob_pct_change(opening_odds, latest_odds),
+                        opening_odds=opening_odds,
+                        latest_odds=latest_odds,
+                        opening_prob=implied_prob(opening_odds),
+                        latest_prob=implied_prob(latest_odds)
+                    ))
+
+        ranked.sort(key=lambda x: x['abs_delta_pp'], reverse=True)
+        movers[label] = ranked[:MOVERS_STORED]
+        fair_ranked.sort(key=lambda x: x['abs_delta_pp'], reverse=True)
+        fair_movers[label] = fair_ranked[:MOVERS_STORED]
+        zscore_ranked.sort(key=lambda x: x['abs_zscore'], reverse=True)
+        zscore_movers[label] = zscore_ranked[:MOVERS_STORED]
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'cycle_id': cycle_id,
+        'generated_at': _iso(now),
+        'fixtures': fixtures,
+        'movers': movers,
+        'fair_movers': fair_movers,
+        'zscore_movers': zscore_movers
+    }
+
+
+def encode_snapshot(snapshot):
+    """Compact wire format: zlib-compressed JSON"""
+    return zlib.compress(json.dumps(snapshot, separators=(',', ':')).encode('utf-8'))
+
+def decode_snapshot(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def save_snapshot(cursor, snapshot):
+    """Store a snapshot row (replacing any for the same cycle) and drop old ones"""
+    cursor.execute("""
+        INSERT INTO dashboard_snapshots (cycle_id, format_version, payload)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (cycle_id) DO UPDATE
+        SET format_version = EXCLUDED.format_version,
+            payload = EXCLUDED.payload,
+            created_at = CURRENT_TIMESTAMP
+    """, (snapshot['cycle_id'], snapshot['version'], psycopg2.Binary(encode_snapshot(snapshot))))
+
+    cursor.execute("""
+        DELETE FROM dashboard_snapshots
+        WHERE cycle_id NOT IN (
+            SELECT cycle_id FROM dashboard_snapshots ORDER BY cycle_id DESC LIMIT %s
+        )
+    """, (SNAPSHOTS_KEPT,))
+
+def publish_snapshot(state, volatility=None):
+    """Sync the collector's OddsState, then build and store this cycle's snapshot
+
+    Args:
+        volatility: VolatilityTracker listening to the state (see build_snapshot)
+
+    Returns:
+        dict: the snapshot that was written
+    """
+    state.sync()
+    snapshot = build_snapshot(state, state.watermark, volatility)
+
+    conn = connect()
+    cursor = conn.cursor()
+    save_snapshot(cursor, snapshot)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    return snapshot
+
+def load_latest_snapshot():
+    """Read the newest snapshot written by the collector (None if there isn't one yet)"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT payload
+        FROM dashboard_snapshots
+        WHERE format_version = %s
+        ORDER BY cycle_id DESC
+        LIMIT 1
+    """, (SNAPSHOT_VERSION,))
+    row = cursor.fetchone()
+    conn.close()
+
+    if row:
+        return decode_snapshot(row[0])
+    return None
+
+
+class DashboardSnapshot:
+    """Read-side view of a snapshot, with the same return shapes the pages already use"""
+
+    def __init__(self, data):
+        self.cycle_id = data['cycle_id']
+        self.generated_at = _parse(data['generated_at'])
+        self._latest_odds = []
+        self._opening = {}
+        self._mover = {}
+        for fixture in data['fixtures']:
+            key = (fixture['league'], fixture['home_team'], fixture['away_team'], fixture['bookmaker'])
+            self._latest_odds.append(key + (
+                fixture['home_odds'], fixture['away_odds'], fixture['draw_odds'],
+                _parse(fixture['timestamp']), _parse(fixture['commence_time'])
+            ))
+            self._opening[key] = fixture['opening']
+            self._mover[key] = fixture['mover']
+        self._movers = data['movers']
+        self._fair_movers = data['fair_movers']
+        self._zscore_movers = data['zscore_movers']
+        self._market_watch_fixtures = None
+
+    def latest_odds(self):
+        """Rows of (league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds, timestamp, commence_time)"""
+        return self._latest_odds
+
+    def opening_odds(self, league, home_team, away_team, bookmaker, window):
+        """Opening odds for a match within a time window label (e.g. "6h", "Since Open")"""
+        opening = self._opening.get((league, home_team, away_team, bookmaker), {}).get(window)
+        if opening is None:
+            return None
+        return {
+            'home_odds': opening[0],
+            'away_odds': opening[1],
+            'draw_odds': opening[2],
+            'timestamp': _parse(opening[3])
+        }
+
+    def biggest_mover(self, league, home_team, away_team, bookmaker, window):
+        """Biggest mover (by absolute implied probability delta) for a match within a time window label"""
+        mover = self._mover.get((league, home_team, away_team, bookmaker), {}).get(window)
+        if mover is None:
+            return None
+        outcome, signed_delta_pp, opening_odds, current_odds = mover
+
+        # Determine movement
+        if current_odds < opening_odds:
+            movement_text = "shortened"
+            movement_color = "#44ff44"  # Green
+        else:
+            movement_text = "drifted"
+            movement_color = "#ff4444"  # Red
+
+        # Determine strength badge
+        strength_badge = ""
+        if abs(signed_delta_pp) >= 5:
+            strength_badge = "STRONG"
+        elif abs(signed_delta_pp) >= 3:
+            strength_badge = "MEDIUM"
+
+        return {
+            'outcome': outcome,
+            'opening_odds': opening_odds,
+            'current_odds': current_odds,
+            'delta_pp': signed_delta_pp,
+            'abs_delta_pp': abs(signed_delta_pp),
+            'movement_text': movement_text,
+            'movement_color': movement_color,
+            'strength_badge': strength_badge
+        }
+
+    def _fixture_groups(self):
+        """latest_odds rows grouped per fixture, in first-seen order (built once per snapshot)"""
+        if self._market_watch_fixtures is None:
+            groups = {}
+            for row in self._latest_odds:
+                groups.setdefault(row[:3], []).append(row)
+            self._market_watch_fixtures = [
+                (key, rows, _as_utc(rows[0][8])) for key, rows in groups.items() if rows[0][8] is not None
+            ]
+        return self._market_watch_fixtures
+
+    def market_watch(self, window, league=None, teams=None, kickoff_within_hours=72,
+                     min_move_pp=0, sort="Kickoff", page=0, page_size=25):
+        """One page of Market Watch fixtures, filtered and sorted before anything is rendered
+
+        Args:
+            window: time window label the mover size is measured over
+            league: only this league (None = all)
+            teams: only fixtures involving one of these team names (None = all)
+            kickoff_within_hours: kickoff between 5 minutes and this many hours from now
+            min_move_pp: minimum absolute implied probability move of the biggest mover
+            sort: one of MARKET_WATCH_SORTS
+            page: zero-based page number (clamped to the last page)
+            page_size: fixtures per page
+
+        Returns:
+            dict: total, page, pages and fixtures - each fixture has league,
+            home_team, away_team, commence_time (UTC), abs_delta_pp and its
+            latest_odds rows (first row = bookmaker shown in the label)
+        """
+        now_utc = datetime.now(timezone.utc)
+        window_start = now_utc + timedelta(minutes=5)
+        window_end = now_utc + timedelta(hours=kickoff_within_hours)
+
+        matches = []
+        for (fixture_league, home_team, away_team), rows, commence_time in self._fixture_groups():
+            if league is not None and fixture_league != league:
+                continue
+            if commence_time <= window_start or commence_time >= window_end:
+                continue
+            if teams is not None and home_team not in teams and away_team not in teams:
+                continue
+
+            mover = self._mover.get(rows[0][:4], {}).get(window)
+            abs_delta_pp = abs(mover[1]) if mover else 0.0
+            if abs_delta_pp < min_move_pp:
+                continue
+
+            matches.append({
+                'league': fixture_league,
+                'home_team': home_team,
+                'away_team': away_team,
+                'commence_time': commence_time,
+                'abs_delta_pp': abs_delta_pp,
+                'rows': rows
+            })
+
+        if sort == "Biggest move":
+            matches.sort(key=lambda m: (-m['abs_delta_pp'], m['commence_time']))
+        elif sort == "League":
+            matches.sort(key=lambda m: (m['league'], m['commence_time'], m['home_team']))
+        else:
+            matches.sort(key=lambda m: (m['commence_time'], m['league'], m['home_team']))
+
+        pages = max(1, -(-len(matches) // page_size))
+        page = min(max(page, 0), pages - 1)
+        return {
+            'total': len(matches),
+            'page': page,
+            'pages': pages,
+            'fixtures': matches[page * page_size:(page + 1) * page_size]
+        }
+
+    def top_movers(self, window, limit=10, fair=False, zscore=False):
+        """Top movers for a time window label, skipping matches that have kicked off since the snapshot
+
+        Args:
+            fair: rank by the move in no-vig probability instead of raw implied probability
+            zscore: rank by how unusual the move is for the outcome (|z-score| of
+                its implied probability move; takes precedence over fair). Empty
+                when the snapshot was built without the collector's volatility state
+        """
+        now_utc = datetime.now(timezone.utc)
+        kickoff_cutoff = now_utc + timedelta(minutes=5)
+
+        movers = []
+        ranking = self._zscore_movers if zscore else self._fair_movers if fair else self._movers
+        for mover in ranking.get(window, []):
+            if _as_utc(_parse(mover['commence_time'])) <= kickoff_cutoff:
+                continue
+            latest_time = _as_utc(_parse(mover['latest_time']))
+            movers.append(dict(mover, minutes_ago=int((now_utc - latest_time).total_seconds() / 60)))
+            if len(movers) == limit:
+                break
+        return movers
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_dashboard_snapshot(cycle_id):
+    """Snapshot for the given collection cycle, loaded at most once per cycle per process
+
+    Falls back to building it from this process's OddsState when the collector
+    hasn't published a snapshot for the cycle (yet).
+    """
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot.cycle_id >= cycle_id:
+            return _snapshot
+
+        data = load_latest_snapshot()
+        if data is None or data['cycle_id'] < cycle_id:
+            state = get_odds_state()
+            state.sync(cycle_id)
+            data = build_snapshot(state, cycle_id)
+
+        _snapshot = DashboardSnapshot(data)
+        return _snapshot
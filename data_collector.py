@@ -1,9 +1,23 @@
 import requests
 import psycopg2
 import os
+import json
+import math
 import time
 from datetime import datetime
 
+from psycopg2.extras import execute_values
+
+from alerts import AlertEngine, deliver, load_last_fired, load_rules, make_sinks
+from closing_lines import ClosingLineSchedule, backfill_closing_lines, store_closing_lines
+from dashboard_snapshot import publish_snapshot
+from margin_rollups import catch_up_margin_rollups
+from odds_math import no_vig_probabilities
+from query_stats import connect
+from odds_state import COLLECTION_INTERVAL_SECONDS, NOTIFY_CHANNEL, OddsState, get_latest_cycle_id
+from steam_moves import SteamDetector, save_move_events
+from volatility import VolatilityTracker
+
 # Configuration
 API_KEY = os.environ.get('ODDS_API_KEY')
 DATABASE_URL = os.environ.get('DATABASE_URL')
@@ -17,9 +31,12 @@ LEAGUES = {
     'soccer_france_ligue_one': 'France Ligue One'
 }
 
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+
 def get_db_connection():
     """Create database connection"""
-    return psycopg2.connect(DATABASE_URL)
+    return connect()
 
 def fetch_odds(league_key):
     """Fetch odds from The Odds API for a specific league"""
@@ -42,14 +59,15 @@ def fetch_odds(league_key):
         return []
 
 def save_odds(odds_data, league_name):
-    """Save odds to database"""
-    if not odds_data:
-        return 0
+    """Save odds to database
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    Returns:
+        list: (home_team, away_team) for every match saved
+    """
+    if not odds_data:
+        return []
     
-    saved_count = 0
+    rows = []
     
     for match in odds_data:
         home_team = match.get('home_team')
@@ -84,44 +102,233 @@ def save_odds(odds_data, league_name):
                         elif outcome.get('name') == 'Draw':
                             draw_odds = outcome.get('price')
                     
-                    # Insert into database
                     if home_odds and away_odds:
-                        cursor.execute("""
-                            INSERT INTO odds (league, home_team, away_team, bookmaker, 
-                                            home_odds, away_odds, draw_odds, commence_time, timestamp)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                        """, (league_name, home_team, away_team, bookmaker_name,
-                              home_odds, away_odds, draw_odds, commence_time))
-                        
-                        saved_count += 1
+                        rows.append((league_name, home_team, away_team, bookmaker_name,
+                                     home_odds, away_odds, draw_odds, commence_time))
+    
+    if not rows:
+        return []
+    
+    # No-vig probabilities and overround for the whole batch at once (NULL where a price is missing)
+    fair = no_vig_probabilities([row[4] for row in rows], [row[5] for row in rows], [row[6] for row in rows])
+    rows = [row + tuple(None if math.isnan(value) else value for value in values)
+            for row, values in zip(rows, zip(*(column.tolist() for column in fair)))]
+    
+    # Insert into database
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    execute_values(cursor, """
+        INSERT INTO odds (league, home_team, away_team, bookmaker,
+                          home_odds, away_odds, draw_odds, commence_time,
+                          home_fair, away_fair, draw_fair, overround, timestamp)
+        VALUES %s
+    """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())")
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    return [(row[1], row[2]) for row in rows]
+
+def capture_closing_lines(odds_state, schedule, volatility=None):
+    """Take a final snapshot of the fixtures about to kick off and store their closing lines
     
+    One fetch per league with a fixture due; if a fetch fails, the latest snapshot
+    already saved is stored as the closing line instead. Fixtures are marked
+    captured even if storing fails, so a database error isn't retried in a loop
+    (with an API call each time) until kickoff; backfill_closing_lines stores
+    their closing line after kickoff instead.
+    
+    The rows saved make a new cycle, so it is published and announced like a
+    regular one (otherwise every dashboard rebuilds it, without volatility).
+    """
+    kickoffs = odds_state.kickoffs()
+    now = datetime.utcnow()
+    due = schedule.due(kickoffs, now)
+    if not due:
+        return
+    
+    fixtures = [fixture for league_fixtures in due.values() for fixture in league_fixtures]
+    changed_matches = {}
+    try:
+        league_keys = {league_name: league_key for league_key, league_name in LEAGUES.items()}
+        for league_name in due:
+            if league_name in league_keys:
+                changed_matches[league_name] = save_odds(fetch_odds(league_keys[league_name]), league_name)
+        
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            store_closing_lines(cursor, [fixture + (kickoffs[fixture],) for fixture in fixtures])
+            conn.commit()
+        finally:
+            conn.close()
+    finally:
+        schedule.mark_captured(fixtures, kickoffs, now)
+    print(f"🔒 Closing lines captured for {len(fixtures)} matches")
+    
+    if any(changed_matches.values()):
+        publish_snapshot(odds_state, volatility)
+        notify_cycle_complete(changed_matches)
+
+def wait_for_next_cycle(odds_state, schedule, seconds, volatility=None):
+    """Sleep until the next collection cycle, capturing closing lines for kickoffs in between"""
+    next_cycle = time.monotonic() + seconds
+    while True:
+        remaining = next_cycle - time.monotonic()
+        now = datetime.utcnow()
+        capture_at = schedule.next_capture_time(odds_state.kickoffs(), now)
+        if capture_at is None or (capture_at - now).total_seconds() >= remaining:
+            time.sleep(max(remaining, 0))
+            return
+        
+        time.sleep(max((capture_at - now).total_seconds(), 0))
+        try:
+            capture_closing_lines(odds_state, schedule, volatility)
+        except psycopg2.Error as e:
+            print(f"Error capturing closing lines: {e}")
+
+def record_move_events(events):
+    """Write steam-move detections to move_events"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    save_move_events(cursor, events)
     conn.commit()
     cursor.close()
     conn.close()
+
+def notify_cycle_complete(changed_matches):
+    """Tell listening dashboards that a collection cycle has been committed
+    
+    Args:
+        changed_matches: dict of league name -> list of (home_team, away_team) saved this cycle
+    """
+    conn = get_db_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    
+    cycle_id = get_latest_cycle_id(cursor)
+    
+    payload = {
+        'cycle_id': cycle_id,
+        'leagues': sorted(league for league, matches in changed_matches.items() if matches),
+        'fixtures': [[league, home, away]
+                     for league, matches in changed_matches.items()
+                     for home, away in matches]
+    }
+    message = json.dumps(payload)
+    if len(message.encode('utf-8')) > MAX_NOTIFY_PAYLOAD:
+        # Too many fixtures to list - listeners treat null as "everything in these leagues"
+        payload['fixtures'] = None
+        message = json.dumps(payload)
+    
+    cursor.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, message))
     
-    return saved_count
+    cursor.close()
+    conn.close()
 
 def main():
     """Main collection loop"""
     print("🎯 Starting Odds Collector (Pinnacle only)...")
     
+    # Collector's own copy of upcoming fixtures, used to precompute dashboard snapshots
+    odds_state = OddsState()
+    
+    # Sees every new snapshot as the state syncs (state is warmed up by the first sync)
+    steam_detector = SteamDetector()
+    odds_state.add_listener(steam_detector.consume)
+    
+    # Running per-outcome volatility for the z-score movers ranking (built from history on the first sync)
+    volatility = VolatilityTracker()
+    odds_state.add_listener(volatility.consume)
+    
+    # User-defined alert rules, checked against each cycle's new snapshots only
+    alert_rules = load_rules()
+    last_fired = None
+    if alert_rules:
+        # So alerts fired before a restart aren't repeated
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                last_fired = load_last_fired(cursor)
+        finally:
+            conn.close()
+    alert_engine = AlertEngine(alert_rules, last_fired)
+    alert_sinks = make_sinks()
+    odds_state.add_listener(alert_engine.consume)
+    if alert_engine.rules:
+        print(f"🔔 {len(alert_engine.rules)} alert rules loaded")
+    
+    # Fixtures already given a closing snapshot
+    closing_schedule = ClosingLineSchedule()
+    
     while True:
         print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Collecting odds...")
         
         total_saved = 0
+        changed_matches = {}
         
         for league_key, league_name in LEAGUES.items():
             odds_data = fetch_odds(league_key)
-            saved = save_odds(odds_data, league_name)
-            total_saved += saved
-            print(f"✅ {league_name}: {saved} Pinnacle matches saved")
+            saved_matches = save_odds(odds_data, league_name)
+            changed_matches[league_name] = saved_matches
+            total_saved += len(saved_matches)
+            print(f"✅ {league_name}: {len(saved_matches)} Pinnacle matches saved")
             time.sleep(1)  # Respect API rate limits
         
+        # Precompute what Market Watch and Biggest Movers display for this cycle
+        try:
+            publish_snapshot(odds_state, volatility)
+        except psycopg2.Error as e:
+            print(f"Error publishing dashboard snapshot: {e}")
+        
+        # Store the rapid moves spotted in this cycle's snapshots
+        move_events = steam_detector.drain()
+        if move_events:
+            try:
+                record_move_events(move_events)
+                print(f"⚡ {len(move_events)} rapid moves flagged")
+            except psycopg2.Error as e:
+                print(f"Error saving move events: {e}")
+        
+        # Send the alerts this cycle's snapshots fired
+        alerts = alert_engine.drain()
+        if alerts:
+            for sink_name, error in deliver(alerts, alert_sinks):
+                print(f"Error sending alerts to {sink_name}: {error}")
+            print(f"🔔 {len(alerts)} alerts fired")
+        
+        # Closing lines for kickoffs whose capture was missed (e.g. collector restarted)
+        try:
+            conn = get_db_connection()
+            backfilled = backfill_closing_lines(conn.cursor())
+            conn.commit()
+            conn.close()
+            if backfilled:
+                print(f"🔒 {backfilled} closing lines filled in from the last snapshot")
+        except psycopg2.Error as e:
+            print(f"Error backfilling closing lines: {e}")
+        
+        # Fold this cycle's overrounds into the hourly/daily margin rollups
+        try:
+            conn = get_db_connection()
+            catch_up_margin_rollups(conn)
+            conn.close()
+        except psycopg2.Error as e:
+            print(f"Error updating margin rollups: {e}")
+        
+        # Push the finished cycle to dashboards (LISTEN/NOTIFY)
+        if total_saved:
+            try:
+                notify_cycle_complete(changed_matches)
+            except psycopg2.Error as e:
+                print(f"Error notifying dashboards: {e}")
+        
         print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Collection complete! Total: {total_saved} matches")
         print("⏰ Collecting Pinnacle odds every 15 minutes. Press Ctrl+C to stop.")
         
-        # Wait 15 minutes
-        time.sleep(900)
+        # Wait 15 minutes (taking closing prices for any kickoff in between)
+        wait_for_next_cycle(odds_state, closing_schedule, COLLECTION_INTERVAL_SECONDS, volatility)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import os
+
+import streamlit as st
+
+from profiler import profiler
+from query_stats import explain, query_stats
+
+# Set ADMIN_PANEL=1 to show query and phase diagnostics in the sidebar
+ADMIN_PANEL_ENABLED = os.environ.get('ADMIN_PANEL', '').lower() in ('1', 'true', 'yes')
+
+
+def render_query_panel():
+    """Sidebar panel: this rerun's queries, top queries by total time and EXPLAIN on demand"""
+    if not ADMIN_PANEL_ENABLED:
+        return
+
+    with st.sidebar.expander("Query stats", expanded=False):
+        run_queries = query_stats.run_queries()
+        st.markdown(f"**This rerun:** {len(run_queries)} queries, "
+                    f"{sum(q['ms'] for q in run_queries):.1f} ms")
+        if run_queries:
+            st.dataframe([
+                {'ms': round(q['ms'], 1), 'rows': q['rows'], 'params': ', '.join(q['params']), 'query': q['fingerprint']}
+                for q in run_queries
+            ], hide_index=True, use_container_width=True)
+
+        top = query_stats.top(limit=10)
+        st.markdown("**Top queries (this process, by total time)**")
+        if not top:
+            st.caption("No queries recorded yet")
+            return
+        st.dataframe([
+            {'total ms': round(q['total_ms'], 1), 'calls': q['calls'], 'avg ms': round(q['avg_ms'], 1),
+             'max ms': round(q['max_ms'], 1), 'rows': q['rows'], 'query': q['fingerprint']}
+            for q in top
+        ], hide_index=True, use_container_width=True)
+
+        selected = st.selectbox("Explain query", [q['fingerprint'] for q in top], key="explain_query")
+        analyze = st.checkbox("ANALYZE (runs the query)", key="explain_analyze")
+        if st.button("EXPLAIN", key="explain_button"):
+            plan = explain(selected, analyze=analyze)
+            if plan is None:
+                st.caption("Only SELECT queries can be explained")
+            else:
+                st.code('\n'.join(plan), language=None)
+
+
+def render_profile_panel():
+    """Sidebar panel: p50/p95 per script phase across all sessions, with a JSON download"""
+    if not ADMIN_PANEL_ENABLED:
+        return
+
+    with st.sidebar.expander("Phase timings", expanded=False):
+        phases = profiler.summary()
+        if not phases:
+            st.caption("No phases recorded yet")
+            return
+        st.dataframe([
+            {'phase': name, 'p50 ms': stats['p50_ms'], 'p95 ms': stats['p95_ms'],
+             'max ms': stats['max_ms'], 'runs': stats['count']}
+            for name, stats in phases.items()
+        ], hide_index=True, use_container_width=True)
+        st.download_button("Download JSON", profiler.to_json(), file_name="phase_timings.json",
+                           mime="application/json", key="profile_download")
+        if st.button("Reset timings", key="profile_reset"):
+            profiler.reset()
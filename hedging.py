@@ -0,0 +1,302 @@
+"""
+Bulk hedging: equal-profit hedge stakes for many open positions at once
+
+Usage:
+    python hedging.py positions.csv [--fill-latest] [--output hedges.csv]
+
+Each position is a back bet (odds, stake) hedged with one bet that wins
+exactly when it loses, at hedge_odds: the stake s2 = s1 × o1 / o2 makes the
+profit the same whichever way it goes (the single-bet Hedge Calculator
+formula, applied to every row in one vectorized pass).
+
+For a 1X2 position the bet against it is the other two outcomes backed
+together; with --fill-latest (or fill_hedge_odds) missing hedge odds are
+taken from the latest stored prices of the fixture as that combined price,
+1 / (1/o_a + 1/o_b), and the hedge stake is split across the two outcomes.
+solve_three_way does the same per outcome directly, and can instead hold
+the other two outcomes at a profit floor.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+OUTCOMES = ('Home', 'Draw', 'Away')
+
+FIXTURE_COLUMNS = ['league', 'home_team', 'away_team']
+
+POSITION_COLUMNS = FIXTURE_COLUMNS + ['outcome', 'odds', 'stake', 'hedge_odds']
+
+
+def normalize_outcomes(positions):
+    """Outcome column as Home/Draw/Away; team names and any letter case are accepted"""
+    outcome = positions['outcome'].fillna('').astype(str).str.strip()
+    lowered = outcome.str.lower()
+    return pd.Series(np.select(
+        [lowered.isin(['home', '1']) | (lowered == positions['home_team'].astype(str).str.lower()),
+         lowered.isin(['draw', 'x']),
+         lowered.isin(['away', '2']) | (lowered == positions['away_team'].astype(str).str.lower())],
+        list(OUTCOMES), None
+    ), index=positions.index)
+
+
+def latest_prices(rows):
+    """DataFrame of the latest 1X2 prices per fixture from latest_odds rows
+
+    Args:
+        rows: (league, home_team, away_team, bookmaker, home_odds, away_odds,
+            draw_odds, timestamp, commence_time) tuples, e.g.
+            DashboardSnapshot.latest_odds(); the first row per fixture wins
+    """
+    frame = pd.DataFrame(rows, columns=FIXTURE_COLUMNS + ['bookmaker', 'latest_home', 'latest_away', 'latest_draw',
+                                                          'price_time', 'commence_time'])
+    return frame.drop_duplicates(FIXTURE_COLUMNS)[FIXTURE_COLUMNS + ['latest_home', 'latest_draw', 'latest_away',
+                                                                     'price_time']]
+
+
+def fill_hedge_odds(positions, prices):
+    """Fill missing hedge odds with the combined price of the other two outcomes
+
+    Args:
+        positions: DataFrame with POSITION_COLUMNS (hedge_odds may be missing)
+        prices: DataFrame from latest_prices
+
+    Returns:
+        positions plus hedge_source ("input", "latest" or None) and, for rows
+        filled from the latest prices, hedge_split_home/draw/away: the share
+        of the hedge stake to put on each outcome
+    """
+    positions = positions.reset_index(drop=True)
+    merged = positions.merge(prices, on=FIXTURE_COLUMNS, how='left')
+    outcome = normalize_outcomes(positions).to_numpy()
+    known = np.isin(outcome, OUTCOMES)
+    latest = merged[['latest_home', 'latest_draw', 'latest_away']].to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = np.where(latest > 1, 1 / latest, np.nan)
+    # Everything but the position's own outcome
+    against = implied * (outcome[:, None] != np.array(OUTCOMES)[None, :])
+    against_implied = against.sum(axis=1, where=~np.isnan(against), initial=0.0)
+    complete = ~np.isnan(implied).any(axis=1) & known
+    combined_odds = np.where(complete, 1 / np.where(against_implied > 0, against_implied, np.nan), np.nan)
+
+    given = pd.to_numeric(positions['hedge_odds'], errors='coerce').to_numpy(dtype=float)
+    fill = np.isnan(given) & ~np.isnan(combined_odds)
+
+    result = positions.copy()
+    result['outcome'] = np.where(known, outcome, positions['outcome'])
+    result['hedge_odds'] = np.where(fill, combined_odds, given)
+    result['hedge_source'] = np.where(fill, 'latest', np.where(np.isnan(given), None, 'input'))
+    split = against / against_implied[:, None]
+    for i, name in enumerate(OUTCOMES):
+        result[f'hedge_split_{name.lower()}'] = np.where(fill, split[:, i], np.nan)
+    result['price_time'] = merged['price_time'].where(fill)
+    return result
+
+
+def hedge_positions(positions):
+    """Equal-profit hedge of every position, vectorized
+
+    Args:
+        positions: DataFrame with odds, stake and hedge_odds columns (plus
+            optional outcome and hedge_split_* columns, see fill_hedge_odds)
+
+    Returns:
+        positions plus hedge_stake, profit_if_original_wins,
+        profit_if_hedge_wins, guaranteed_profit and roi_pct (guaranteed profit
+        over total outlay); with an outcome column also pnl_home/draw/away,
+        and stakes per outcome (hedge_stake_home/...) where a split is known.
+        Rows with a missing or invalid price or stake get NaN.
+    """
+    result = positions.copy()
+    o1 = pd.to_numeric(result['odds'], errors='coerce').to_numpy(dtype=float)
+    s1 = pd.to_numeric(result['stake'], errors='coerce').to_numpy(dtype=float)
+    o2 = pd.to_numeric(result['hedge_odds'], errors='coerce').to_numpy(dtype=float)
+    valid = (o1 > 1) & (o2 > 1) & (s1 > 0)
+    o1, s1, o2 = (np.where(valid, values, np.nan) for values in (o1, s1, o2))
+
+    s2 = s1 * o1 / o2
+    profit_original = s1 * (o1 - 1) - s2
+    profit_hedge = s2 * (o2 - 1) - s1
+    guaranteed = np.minimum(profit_original, profit_hedge)
+
+    result['hedge_stake'] = s2
+    result['profit_if_original_wins'] = profit_original
+    result['profit_if_hedge_wins'] = profit_hedge
+    result['guaranteed_profit'] = guaranteed
+    result['roi_pct'] = guaranteed / (s1 + s2) * 100
+
+    if 'outcome' in result:
+        outcome = result['outcome'].to_numpy()
+        for name in OUTCOMES:
+            result[f'pnl_{name.lower()}'] = np.where(outcome == name, profit_original, profit_hedge)
+            result.loc[~np.isin(outcome, OUTCOMES), f'pnl_{name.lower()}'] = np.nan
+            split_column = f'hedge_split_{name.lower()}'
+            if split_column in result:
+                result[f'hedge_stake_{name.lower()}'] = s2 * result[split_column].to_numpy(dtype=float)
+    return result
+
+
+def solve_three_way(odds, stake, odds_a, odds_b, floor=None):
+    """Stakes on the other two outcomes of a 1X2 market against a position
+
+    Every argument may be an array; they broadcast together, so a whole grid
+    of price/stake scenarios is one call.
+
+    Without a floor the stakes equalize the profit across all three outcomes
+    (each other outcome then returns stake × odds, like the position). With
+    a floor they are the smallest stakes that make each other outcome return
+    at least `floor` profit, leaving the rest of the upside on the position:
+    x_j = (floor + stake) / (o_j × (1 - 1/o_a - 1/o_b)), only possible while
+    the two prices together are priced under 100%.
+
+    Returns:
+        dict of arrays: stake_a, stake_b, profit_if_position_wins,
+        profit_if_a_wins, profit_if_b_wins and guaranteed_profit; NaN where
+        a price or the stake is invalid or the floor can't be reached
+    """
+    odds, stake, odds_a, odds_b = np.broadcast_arrays(*(np.asarray(values, dtype=float)
+                                                        for values in (odds, stake, odds_a, odds_b)))
+    valid = (odds > 1) & (stake > 0) & (odds_a > 1) & (odds_b > 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if floor is None:
+            returned = stake * odds
+        else:
+            # Return needed on either other outcome: floor + every stake
+            against_implied = 1 / odds_a + 1 / odds_b
+            returned = (floor + stake) / (1 - against_implied)
+            valid &= (against_implied < 1) & (returned > 0)
+        stake_a = np.where(valid, returned / odds_a, np.nan)
+        stake_b = np.where(valid, returned / odds_b, np.nan)
+
+    outlay = stake + stake_a + stake_b
+    profit_position = stake * odds - outlay
+    profit_a = stake_a * odds_a - outlay
+    profit_b = stake_b * odds_b - outlay
+    return {
+        'stake_a': stake_a,
+        'stake_b': stake_b,
+        'profit_if_position_wins': profit_position,
+        'profit_if_a_wins': profit_a,
+        'profit_if_b_wins': profit_b,
+        'guaranteed_profit': np.minimum(profit_position, np.minimum(profit_a, profit_b))
+    }
+
+
+def hedge_stakes(pnl, prices, floor=None):
+    """Stakes per outcome that lock in a whole book's profit, vectorized over books
+
+    The book may already hold bets on several outcomes: pnl is its profit
+    if each outcome wins. Without a floor the stakes equalize the profit
+    (nothing goes on the outcome that is already best); with a floor they
+    are the smallest that hold every other outcome at `floor`. For a single
+    back bet this is solve_three_way.
+
+    Args:
+        pnl: (..., 3) profit per outcome in OUTCOMES order
+        prices: (..., 3) current odds in OUTCOMES order
+        floor: minimum profit on the other outcomes, or None to equalize
+
+    Returns:
+        (..., 3) stakes; NaN where a price is invalid or the floor can't be reached
+    """
+    pnl, prices = np.broadcast_arrays(np.asarray(pnl, dtype=float), np.asarray(prices, dtype=float))
+    valid = (prices > 1).all(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if floor is None:
+            returned = pnl.max(axis=-1, keepdims=True) - pnl
+        else:
+            best = np.arange(len(OUTCOMES)) == pnl.argmax(axis=-1)[..., None]
+            implied = np.where(best, 0.0, 1 / prices)
+            against_implied = implied.sum(axis=-1, keepdims=True)
+            # Total extra outlay X solves X = sum((floor - pnl + X) / odds) over the other outcomes
+            outlay = ((floor - pnl) * implied).sum(axis=-1, keepdims=True) / (1 - against_implied)
+            returned = np.where(best, 0.0, floor - pnl + outlay)
+            valid &= (against_implied[..., 0] < 1) & (returned >= 0).all(axis=-1)
+        stakes = returned / prices
+    return np.where(valid[..., None], stakes, np.nan)
+
+
+def three_way_hedge(outcome, odds, stake, prices, floor=None):
+    """solve_three_way for a position on one of Home/Draw/Away
+
+    Args:
+        outcome: "Home", "Draw" or "Away"
+        odds, stake: the position
+        prices: {"Home": odds, "Draw": odds, "Away": odds}; the position's own
+            outcome is not used
+
+    Returns:
+        {outcome: {'stake': ..., 'profit': ...}} for all three outcomes (the
+        position's stake is its own), plus 'guaranteed_profit'
+    """
+    others = [name for name in OUTCOMES if name != outcome]
+    solved = solve_three_way(odds, stake, prices[others[0]], prices[others[1]], floor)
+    result = {
+        outcome: {'stake': stake, 'profit': float(solved['profit_if_position_wins'])},
+        others[0]: {'stake': float(solved['stake_a']), 'profit': float(solved['profit_if_a_wins'])},
+        others[1]: {'stake': float(solved['stake_b']), 'profit': float(solved['profit_if_b_wins'])},
+    }
+    return {name: result[name] for name in OUTCOMES} | {'guaranteed_profit': float(solved['guaranteed_profit'])}
+
+
+def scenario_grid(outcome, odds, stake, prices, shifts, floor=None):
+    """Guaranteed profit over a grid of price moves on the other two outcomes
+
+    Args:
+        outcome, odds, stake, prices, floor: as for three_way_hedge
+        shifts: relative price changes to try on each other outcome, e.g.
+            np.linspace(-0.2, 0.2, 21) for -20%..+20%
+
+    Returns:
+        (others, grid): the two other outcomes and a DataFrame of guaranteed
+        profit, indexed by the first one's odds, with a column per odds of
+        the second; computed in one vectorized solve
+    """
+    others = [name for name in OUTCOMES if name != outcome]
+    shifts = np.asarray(shifts, dtype=float)
+    odds_a = (prices[others[0]] * (1 + shifts))[:, None]
+    odds_b = (prices[others[1]] * (1 + shifts))[None, :]
+    solved = solve_three_way(odds, stake, odds_a, odds_b, floor)
+    grid = pd.DataFrame(solved['guaranteed_profit'], index=odds_a[:, 0].round(3), columns=odds_b[0].round(3))
+    return others, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Equal-profit hedges for a CSV of open positions")
+    parser.add_argument('positions', help="CSV with odds, stake and hedge_odds (and league, home_team, "
+                                          "away_team, outcome for --fill-latest)")
+    parser.add_argument('--fill-latest', action='store_true',
+                        help="fill missing hedge odds from the latest stored prices")
+    parser.add_argument('--output', help="write the result as CSV here (default: print it)")
+    args = parser.parse_args()
+
+    positions = pd.read_csv(args.positions)
+    for column in POSITION_COLUMNS:
+        if column not in positions:
+            positions[column] = np.nan
+    if args.fill_latest:
+        from dashboard_snapshot import get_dashboard_snapshot
+        from odds_state import get_latest_cycle_id
+        from query_stats import connect
+
+        conn = connect()
+        cycle_id = get_latest_cycle_id(conn.cursor())
+        conn.close()
+        positions = fill_hedge_odds(positions, latest_prices(get_dashboard_snapshot(cycle_id).latest_odds()))
+
+    result = hedge_positions(positions)
+    if args.output:
+        result.to_csv(args.output, index=False)
+    else:
+        print(result.to_string(index=False))
+
+    hedged = result.dropna(subset=['guaranteed_profit'])
+    print(f"\nPositions: {len(result)} ({len(hedged)} hedged), total hedge stake {hedged['hedge_stake'].sum():.2f}, "
+          f"total guaranteed profit {hedged['guaranteed_profit'].sum():+.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,10 +24,38 @@ CREATE TABLE IF NOT EXISTS odds (
     away_odds REAL NOT NULL,
     draw_odds REAL NOT NULL,
     commence_time TIMESTAMP,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    home_fair REAL,
+    away_fair REAL,
+    draw_fair REAL,
+    overround REAL
 )
 ''')
 
+# No-vig probabilities and overround are computed by the collector at ingest;
+# tables created before those columns existed get them and a one-off backfill
+cursor.execute('''
+SELECT 1 FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = 'odds' AND column_name = 'overround'
+''')
+if cursor.fetchone() is None:
+    cursor.execute('''
+    ALTER TABLE odds
+        ADD COLUMN home_fair REAL,
+        ADD COLUMN away_fair REAL,
+        ADD COLUMN draw_fair REAL,
+        ADD COLUMN overround REAL
+    ''')
+    cursor.execute('''
+    UPDATE odds
+    SET overround = 1 / home_odds + 1 / away_odds + 1 / draw_odds,
+        home_fair = (1 / home_odds) / (1 / home_odds + 1 / away_odds + 1 / draw_odds),
+        away_fair = (1 / away_odds) / (1 / home_odds + 1 / away_odds + 1 / draw_odds),
+        draw_fair = (1 / draw_odds) / (1 / home_odds + 1 / away_odds + 1 / draw_odds)
+    WHERE home_odds > 1 AND away_odds > 1 AND draw_odds > 1
+    ''')
+    print(f"Backfilled no-vig probabilities for {cursor.rowcount} odds rows")
+
 # Create index for faster queries
 cursor.execute('''
 CREATE INDEX IF NOT EXISTS idx_odds_timestamp ON odds(timestamp DESC)
@@ -41,6 +69,124 @@ cursor.execute('''
 CREATE INDEX IF NOT EXISTS idx_odds_commence_time ON odds(commence_time)
 ''')
 
+# Precomputed per-cycle dashboard data written by the collector
+cursor.execute('''
+CREATE TABLE IF NOT EXISTS dashboard_snapshots (
+    cycle_id BIGINT PRIMARY KEY,
+    format_version INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    payload BYTEA NOT NULL
+)
+''')
+
+# Rapid pre-match moves flagged by the collector (see steam_moves.py)
+cursor.execute('''
+CREATE TABLE IF NOT EXISTS move_events (
+    id SERIAL PRIMARY KEY,
+    odds_id INTEGER NOT NULL,
+    league TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    bookmaker TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    delta_pp REAL NOT NULL,
+    from_odds REAL NOT NULL,
+    to_odds REAL NOT NULL,
+    ticks INTEGER,
+    started_at TIMESTAMP NOT NULL,
+    detected_at TIMESTAMP NOT NULL,
+    commence_time TIMESTAMP,
+    UNIQUE (odds_id, outcome, kind)
+)
+''')
+
+cursor.execute('''
+CREATE INDEX IF NOT EXISTS idx_move_events_detected_at ON move_events(detected_at DESC)
+''')
+
+# Alerts fired by the user-defined rules (see alerts.py)
+cursor.execute('''
+CREATE TABLE IF NOT EXISTS alerts (
+    id SERIAL PRIMARY KEY,
+    rule_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    odds_id INTEGER NOT NULL,
+    league TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    bookmaker TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    odds REAL NOT NULL,
+    value REAL NOT NULL,
+    message TEXT NOT NULL,
+    fired_at TIMESTAMP NOT NULL,
+    commence_time TIMESTAMP,
+    UNIQUE (rule_id, odds_id, outcome)
+)
+''')
+
+cursor.execute('''
+CREATE INDEX IF NOT EXISTS idx_alerts_fired_at ON alerts(fired_at DESC)
+''')
+
+# Last pre-kickoff price of every fixture (see closing_lines.py)
+cursor.execute('''
+CREATE TABLE IF NOT EXISTS closing_lines (
+    league TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    bookmaker TEXT NOT NULL,
+    home_odds REAL NOT NULL,
+    away_odds REAL NOT NULL,
+    draw_odds REAL NOT NULL,
+    commence_time TIMESTAMP NOT NULL,
+    odds_id INTEGER NOT NULL,
+    snapshot_time TIMESTAMP NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (league, home_team, away_team, commence_time, bookmaker)
+)
+''')
+
+# Tables created when a closing line was keyed by the pairing alone get the
+# match key, so repeated pairings (reverse fixture, next season) each get one
+cursor.execute('''
+SELECT 1 FROM information_schema.key_column_usage
+WHERE table_schema = current_schema() AND table_name = 'closing_lines'
+  AND constraint_name = 'closing_lines_pkey' AND column_name = 'commence_time'
+''')
+if cursor.fetchone() is None:
+    cursor.execute('''
+    ALTER TABLE closing_lines
+        DROP CONSTRAINT closing_lines_pkey,
+        ADD PRIMARY KEY (league, home_team, away_team, commence_time, bookmaker)
+    ''')
+
+# Margin (overround) aggregates per league, folded in by the collector (see margin_rollups.py)
+cursor.execute('''
+CREATE TABLE IF NOT EXISTS margin_rollups (
+    granularity TEXT NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    league TEXT NOT NULL,
+    bookmaker TEXT NOT NULL,
+    hours_before INTEGER NOT NULL,
+    snapshots INTEGER NOT NULL,
+    overround_sum DOUBLE PRECISION NOT NULL,
+    overround_sq_sum DOUBLE PRECISION NOT NULL,
+    overround_min REAL NOT NULL,
+    overround_max REAL NOT NULL,
+    PRIMARY KEY (granularity, bucket, league, bookmaker, hours_before)
+)
+''')
+
+# Highest odds id each incremental aggregate has folded in
+cursor.execute('''
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+)
+''')
+
 conn.commit()
 cursor.close()
 conn.close()
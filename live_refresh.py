@@ -0,0 +1,209 @@
+import json
+import os
+import select
+import threading
+import time
+
+import psycopg2
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from odds_state import NOTIFY_CHANNEL, get_latest_cycle_id
+from query_stats import connect
+
+# Fallback check for a new collection cycle when no notification arrives (seconds)
+POLL_INTERVAL_SECONDS = int(os.environ.get('REFRESH_POLL_SECONDS', '60'))
+
+# Rerunning another session goes through Streamlit internals with no public
+# equivalent (Runtime._session_mgr, AppSession._client_state and
+# AppSession.request_rerun, the path Streamlit's own "run on save" takes).
+# They are checked against the pinned version (requirements.txt); if an
+# upgrade changes them, auto_refresh reports it and the page offers a manual
+# refresh instead (a rerun reads the watcher's latest cycle id).
+
+
+class CycleWatcher:
+    """One background listener per server process for finished collection cycles
+
+    The collector sends a NOTIFY on NOTIFY_CHANNEL after each committed cycle.
+    This thread LISTENs on a single connection, bumps the cycle id that the
+    dashboard caches are keyed on, and requests a rerun for every session that
+    has auto-refresh enabled. A slow MAX(id) poll covers notifications missed
+    while reconnecting.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self.cycle_id = None
+        # Payload of the latest notification: cycle_id, leagues, fixtures
+        self.last_change = None
+        self._conn = None
+        self._lock = threading.Lock()
+        # Whether sessions can be rerun from this thread (None until a session checks)
+        self.server_reruns = None
+        # session_id -> page_script_hash of the page that subscribed
+        self._subscribers = {}
+        self._thread = threading.Thread(target=self._run, name="cycle-watcher", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, session_id, page_script_hash):
+        with self._lock:
+            self._subscribers[session_id] = page_script_hash
+
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self._subscribers.pop(session_id, None)
+
+    def _connect(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = connect()
+            self._conn.autocommit = True
+            with self._conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return self._conn
+
+    def _disconnect(self, error):
+        print(f"Cycle watcher connection error: {error}")
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+
+    def poll(self):
+        """Read the latest cycle id, reconnecting if the connection was dropped"""
+        try:
+            with self._connect().cursor() as cursor:
+                return get_latest_cycle_id(cursor)
+        except psycopg2.Error as e:
+            self._disconnect(e)
+            return None
+
+    def wait_for_notifications(self):
+        """Block until the collector notifies or the poll interval passes
+
+        Returns:
+            list of notification payloads (dicts), [] on timeout, None on connection error
+        """
+        try:
+            conn = self._connect()
+            readable, _, _ = select.select([conn], [], [], self.poll_interval)
+            if not readable:
+                return []
+            conn.poll()
+            payloads = []
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    payloads.append(json.loads(notify.payload))
+                except ValueError:
+                    payloads.append({})
+            return payloads
+        except (psycopg2.Error, OSError) as e:
+            self._disconnect(e)
+            return None
+
+    def _run(self):
+        self.cycle_id = self.poll()
+        while True:
+            payloads = self.wait_for_notifications()
+
+            if payloads is None:
+                # Connection lost - back off, then catch up on anything missed
+                time.sleep(self.poll_interval)
+                new_cycle_id = self.poll()
+            elif payloads:
+                self.last_change = payloads[-1]
+                new_cycle_id = max((p.get('cycle_id') or 0) for p in payloads) or self.poll()
+            else:
+                new_cycle_id = self.poll()
+
+            if new_cycle_id is not None and new_cycle_id != self.cycle_id:
+                previous = self.cycle_id
+                self.cycle_id = new_cycle_id
+                # The first successful read only records the starting point
+                if previous is not None:
+                    self._wake_sessions()
+
+    def check_server_reruns(self, session_id):
+        """Whether the Streamlit internals _wake_sessions uses are there for this session"""
+        if self.server_reruns is None:
+            try:
+                session = Runtime.instance()._session_mgr.get_active_session_info(session_id).session
+                self.server_reruns = (session._client_state is not None
+                                      and callable(getattr(session, 'request_rerun')))
+            except (AttributeError, RuntimeError) as e:
+                print(f"Cycle watcher can't rerun sessions ({e}); pages offer a manual refresh instead")
+                self.server_reruns = False
+        return self.server_reruns
+
+    def _wake_sessions(self):
+        """Request a rerun for every subscribed session that is still on the subscribing page"""
+        if not Runtime.exists() or not self.server_reruns:
+            return
+
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+
+        try:
+            session_mgr = Runtime.instance()._session_mgr
+            for session_id, page_script_hash in subscribers:
+                session_info = session_mgr.get_active_session_info(session_id)
+                if session_info is None:
+                    # Viewer closed the tab
+                    self.unsubscribe(session_id)
+                    continue
+
+                client_state = session_info.session._client_state
+                if client_state.page_script_hash and client_state.page_script_hash != page_script_hash:
+                    # Viewer navigated to another page since subscribing
+                    continue
+
+                session_info.session.request_rerun(client_state)
+        except (AttributeError, TypeError) as e:
+            print(f"Cycle watcher can't rerun sessions ({e}); pages offer a manual refresh instead")
+            self.server_reruns = False
+
+
+@st.cache_resource
+def get_cycle_watcher():
+    """Shared watcher for the whole server process (created on first use)"""
+    return CycleWatcher()
+
+
+def current_cycle_id():
+    """Latest known cycle id, used as a cache key so data only reloads on a new cycle"""
+    watcher = get_cycle_watcher()
+    if watcher.cycle_id is None:
+        # Watcher hasn't completed its first read yet; don't share its connection
+        conn = connect()
+        try:
+            with conn.cursor() as cursor:
+                return get_latest_cycle_id(cursor)
+        finally:
+            conn.close()
+    return watcher.cycle_id
+
+
+def auto_refresh(enabled):
+    """Subscribe (or unsubscribe) the current session to reruns on new collection cycles
+
+    Non-blocking: the script finishes immediately and the shared watcher
+    triggers the next rerun as soon as the collector announces new odds.
+
+    Returns:
+        bool: False if the watcher can't rerun sessions on this Streamlit
+        version, so the page has to offer a manual refresh instead
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return True
+
+    watcher = get_cycle_watcher()
+    if not enabled:
+        watcher.unsubscribe(ctx.session_id)
+        return True
+    if not watcher.check_server_reruns(ctx.session_id):
+        return False
+    watcher.subscribe(ctx.session_id, ctx.page_script_hash)
+    return True
+
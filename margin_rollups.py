@@ -0,0 +1,210 @@
+"""
+Bookmaker margin (overround) rollups per league, by hour/day and time to kickoff
+
+Usage:
+    python margin_rollups.py [--rebuild]
+
+The collector stores each snapshot's overround at ingest (see
+odds_math.no_vig_probabilities). Every cycle it folds the rows added since the
+last run into margin_rollups: one row per granularity (hour, day), bucket,
+league, bookmaker and time-to-kickoff band, holding count, sum, sum of squares,
+min and max. Those add up, so a fold only reads the new odds rows (by id,
+after a watermark) and the margin page never reads the odds table at all.
+
+--rebuild drops the rollups and folds the whole odds table again in batches,
+e.g. after changing KICKOFF_BANDS.
+"""
+import argparse
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from odds_state import LATEST_CYCLE_QUERY
+from query_stats import connect
+
+GRANULARITIES = ('hour', 'day')
+
+# Lower bounds (hours before kickoff) of the time-to-kickoff bands; -1 = in play
+KICKOFF_BANDS = (168, 72, 48, 24, 12, 6, 3, 1, 0)
+IN_PLAY = -1
+
+# Odds ids folded per statement (and per transaction on a rebuild)
+ROLLUP_BATCH = 50000
+
+WATERMARK_NAME = 'margin_rollups'
+
+_BAND_SQL = "CASE WHEN o.timestamp >= o.commence_time THEN {in_play}\n{whens}\n     ELSE 0 END".format(
+    in_play=IN_PLAY,
+    whens='\n'.join(f"     WHEN o.commence_time - o.timestamp >= INTERVAL '{hours} hours' THEN {hours}"
+                    for hours in KICKOFF_BANDS if hours)
+)
+
+# Sums are taken in double precision (SUM of a REAL column is REAL);
+# plan checked by query_plans.py
+FOLD_QUERY = f"""
+INSERT INTO margin_rollups (granularity, bucket, league, bookmaker, hours_before,
+                            snapshots, overround_sum, overround_sq_sum, overround_min, overround_max)
+SELECT g.granularity, date_trunc(g.granularity, o.timestamp), o.league, o.bookmaker,
+       {_BAND_SQL},
+       COUNT(*), SUM(o.overround::float8), SUM(o.overround::float8 * o.overround::float8),
+       MIN(o.overround), MAX(o.overround)
+FROM odds o
+CROSS JOIN (VALUES {', '.join(f"('{granularity}')" for granularity in GRANULARITIES)}) AS g (granularity)
+WHERE o.id > %(after_id)s AND o.id <= %(up_to_id)s
+  AND o.overround IS NOT NULL
+  AND o.commence_time IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (granularity, bucket, league, bookmaker, hours_before) DO UPDATE
+SET snapshots = margin_rollups.snapshots + EXCLUDED.snapshots,
+    overround_sum = margin_rollups.overround_sum + EXCLUDED.overround_sum,
+    overround_sq_sum = margin_rollups.overround_sq_sum + EXCLUDED.overround_sq_sum,
+    overround_min = LEAST(margin_rollups.overround_min, EXCLUDED.overround_min),
+    overround_max = GREATEST(margin_rollups.overround_max, EXCLUDED.overround_max)
+"""
+
+SUMMARY_COLUMNS = ['snapshots', 'overround_sum', 'overround_sq_sum', 'overround_min', 'overround_max']
+
+
+def band_label(hours_before):
+    """Display label of a time-to-kickoff band, e.g. "6-12h" or "7d+\""""
+    if hours_before == IN_PLAY:
+        return "In play"
+    upper = next((hours for hours in reversed(KICKOFF_BANDS) if hours > hours_before), None)
+    if upper is None:
+        return f"{hours_before // 24}d+" if hours_before % 24 == 0 else f"{hours_before}h+"
+    return f"{hours_before}-{upper}h"
+
+
+def update_margin_rollups(cursor, batch_size=ROLLUP_BATCH):
+    """Fold the next batch of odds rows past the watermark into margin_rollups
+
+    The watermark moves in the same transaction, so a fold commits (or rolls
+    back) as a whole; call again until it returns 0 to catch up.
+
+    Returns:
+        int: odds ids covered by this batch (0 when already up to date)
+    """
+    cursor.execute("""
+        INSERT INTO rollup_watermarks (name, last_id) VALUES (%s, 0)
+        ON CONFLICT (name) DO NOTHING
+    """, (WATERMARK_NAME,))
+    cursor.execute("SELECT last_id FROM rollup_watermarks WHERE name = %s FOR UPDATE", (WATERMARK_NAME,))
+    after_id = cursor.fetchone()[0]
+    cursor.execute(LATEST_CYCLE_QUERY)
+    up_to_id = min(cursor.fetchone()[0], after_id + batch_size)
+    if up_to_id <= after_id:
+        return 0
+
+    cursor.execute(FOLD_QUERY, {'after_id': after_id, 'up_to_id': up_to_id})
+    cursor.execute("UPDATE rollup_watermarks SET last_id = %s WHERE name = %s", (up_to_id, WATERMARK_NAME))
+    return up_to_id - after_id
+
+
+def catch_up_margin_rollups(conn):
+    """Fold every odds row past the watermark, committing batch by batch
+
+    Returns:
+        int: odds ids covered
+    """
+    cursor = conn.cursor()
+    covered = 0
+    while True:
+        batch = update_margin_rollups(cursor)
+        conn.commit()
+        if not batch:
+            return covered
+        covered += batch
+
+
+def rebuild_margin_rollups(conn):
+    """Drop the rollups and fold the whole odds table again
+
+    Returns:
+        int: odds ids covered
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM margin_rollups")
+    cursor.execute("DELETE FROM rollup_watermarks WHERE name = %s", (WATERMARK_NAME,))
+    conn.commit()
+    return catch_up_margin_rollups(conn)
+
+
+def _summarize(frame):
+    """Mean, standard deviation, min and max margin (in %) from summed rollup rows"""
+    snapshots = frame['snapshots'].to_numpy(dtype=float)
+    mean = frame['overround_sum'].to_numpy(dtype=float) / snapshots
+    variance = frame['overround_sq_sum'].to_numpy(dtype=float) / snapshots - mean ** 2
+    frame['margin_pct'] = (mean - 1) * 100
+    frame['margin_std_pp'] = np.sqrt(np.clip(variance, 0, None)) * 100
+    frame['margin_min_pct'] = (frame['overround_min'].astype(float) - 1) * 100
+    frame['margin_max_pct'] = (frame['overround_max'].astype(float) - 1) * 100
+    return frame.drop(columns=SUMMARY_COLUMNS[1:])
+
+
+def load_margin_rollups(granularity, since, bookmaker='pinnacle'):
+    """Margin per league from the rollups alone
+
+    Returns:
+        (series, by_kickoff, by_league) DataFrames with snapshots, margin_pct,
+        margin_std_pp, margin_min_pct and margin_max_pct: series per league and
+        bucket of the granularity, by_kickoff per league and time-to-kickoff
+        band (with its label), by_league per league; all since the cutoff
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT bucket, league, hours_before, snapshots, overround_sum, overround_sq_sum,
+               overround_min, overround_max
+        FROM margin_rollups
+        WHERE granularity = %s
+          AND bucket >= %s
+          AND bookmaker = %s
+        ORDER BY bucket
+    """, (granularity, since, bookmaker))
+    rows = pd.DataFrame(cursor.fetchall(), columns=['bucket', 'league', 'hours_before'] + SUMMARY_COLUMNS)
+    conn.close()
+
+    aggregations = {'snapshots': 'sum', 'overround_sum': 'sum', 'overround_sq_sum': 'sum',
+                    'overround_min': 'min', 'overround_max': 'max'}
+    series = _summarize(rows.groupby(['league', 'bucket'], as_index=False).agg(aggregations))
+    by_kickoff = _summarize(rows.groupby(['league', 'hours_before'], as_index=False).agg(aggregations))
+    by_kickoff['band'] = by_kickoff['hours_before'].map(band_label)
+    by_league = _summarize(rows.groupby('league', as_index=False).agg(aggregations))
+    return series, by_kickoff, by_league
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_margin_rollups(cycle_id, granularity, days):
+    """load_margin_rollups over the last `days` days, read at most once per collection cycle per process"""
+    key = (granularity, days)
+    with _cache_lock:
+        if _cache.get('cycle_id') != cycle_id:
+            _cache.clear()
+            _cache['cycle_id'] = cycle_id
+        if key not in _cache:
+            since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+            _cache[key] = load_margin_rollups(granularity, since)
+        return _cache[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold new odds rows into the margin rollups")
+    parser.add_argument('--rebuild', action='store_true', help="drop the rollups and fold the whole odds table")
+    args = parser.parse_args()
+
+    conn = connect()
+    covered = rebuild_margin_rollups(conn) if args.rebuild else catch_up_margin_rollups(conn)
+    conn.close()
+
+    print(f"Folded {covered} odds ids into margin_rollups")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
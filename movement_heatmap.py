@@ -0,0 +1,159 @@
+"""
+Where prices are moving: pre-match movement per league (or fixture) and time bucket
+
+Usage:
+    python movement_heatmap.py [--period 24h] [--by league|fixture] [--metric total|max]
+
+A tick's movement is the largest change of any outcome's no-vig probability
+since the fixture's previous snapshot, in pp. HEATMAP_QUERY computes it with
+a window function and sums it per time bucket for leagues and for fixtures
+(GROUPING SETS) in one pass over the period's rows, instead of loading each
+fixture's history; the page reads it once per collection cycle.
+"""
+import argparse
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from odds_state import COLLECTION_INTERVAL_SECONDS
+from query_stats import connect
+
+# Period label -> (period, bucket width)
+PERIODS = {
+    "6h": (timedelta(hours=6), timedelta(minutes=15)),
+    "24h": (timedelta(hours=24), timedelta(hours=1)),
+    "3 days": (timedelta(days=3), timedelta(hours=3)),
+    "7 days": (timedelta(days=7), timedelta(hours=6)),
+}
+
+METRICS = {'total': 'total_pp', 'max': 'max_pp'}
+
+# How far before the period to look for each fixture's previous snapshot
+PREVIOUS_TICK_LOOKBACK = timedelta(seconds=2 * COLLECTION_INTERVAL_SECONDS)
+
+# Pre-match ticks only; fixture rows have home/away teams, league rows NULLs.
+# Plan checked by query_plans.py
+HEATMAP_QUERY = """
+WITH moves AS (
+    SELECT league, home_team, away_team, timestamp,
+           GREATEST(ABS(home_fair - LAG(home_fair) OVER w),
+                    ABS(draw_fair - LAG(draw_fair) OVER w),
+                    ABS(away_fair - LAG(away_fair) OVER w))::float8 * 100 AS move_pp
+    FROM odds
+    WHERE timestamp >= %(lookback_from)s
+      AND timestamp < commence_time
+      AND bookmaker = %(bookmaker)s
+    WINDOW w AS (PARTITION BY league, home_team, away_team ORDER BY timestamp, id)
+)
+SELECT league, home_team, away_team,
+       TIMESTAMP 'epoch' + FLOOR(EXTRACT(EPOCH FROM timestamp) / %(bucket_seconds)s)
+                           * %(bucket_seconds)s * INTERVAL '1 second' AS bucket,
+       SUM(move_pp), MAX(move_pp), COUNT(move_pp)
+FROM moves
+WHERE timestamp >= %(since)s
+  AND move_pp IS NOT NULL
+GROUP BY GROUPING SETS ((league, bucket), (league, home_team, away_team, bucket))
+"""
+
+COLUMNS = ['league', 'home_team', 'away_team', 'bucket', 'total_pp', 'max_pp', 'ticks']
+
+
+def heatmap_params(period, now=None, bookmaker='pinnacle'):
+    """HEATMAP_QUERY parameters for a PERIODS label, with `since` on a bucket boundary"""
+    length, bucket = PERIODS[period]
+    now = now or datetime.utcnow()
+    bucket_seconds = int(bucket.total_seconds())
+    epoch_seconds = int((now - length - datetime(1970, 1, 1)).total_seconds())
+    since = datetime(1970, 1, 1) + timedelta(seconds=epoch_seconds - epoch_seconds % bucket_seconds)
+    return {
+        'since': since,
+        'lookback_from': since - PREVIOUS_TICK_LOOKBACK,
+        'bucket_seconds': bucket_seconds,
+        'bookmaker': bookmaker
+    }
+
+
+def load_movement(period, bookmaker='pinnacle'):
+    """Movement per league and per fixture and bucket over a PERIODS label
+
+    Returns:
+        (by_league, by_fixture) DataFrames in long form (COLUMNS; by_league
+        without the teams, by_fixture with a "fixture" label column)
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(HEATMAP_QUERY, heatmap_params(period, bookmaker=bookmaker))
+    rows = pd.DataFrame(cursor.fetchall(), columns=COLUMNS)
+    conn.close()
+
+    fixture_rows = rows['home_team'].notna()
+    by_league = rows[~fixture_rows].drop(columns=['home_team', 'away_team']).reset_index(drop=True)
+    by_fixture = rows[fixture_rows].reset_index(drop=True)
+    by_fixture['fixture'] = by_fixture['home_team'] + " vs " + by_fixture['away_team']
+    return by_league, by_fixture
+
+
+def heatmap_matrix(frame, rows, metric='total', buckets=None, limit=None):
+    """Pivot long-form movement into a rows × buckets matrix (0 where nothing moved)
+
+    Args:
+        frame: by_league or by_fixture from load_movement
+        rows: the row label column ("league" or "fixture")
+        metric: a METRICS key
+        buckets: all the period's buckets, so quiet ones still get a column
+        limit: keep only the rows that moved most in total
+    """
+    matrix = frame.pivot_table(index=rows, columns='bucket', values=METRICS[metric],
+                               aggfunc='sum' if metric == 'total' else 'max', fill_value=0.0)
+    if buckets is not None:
+        matrix = matrix.reindex(columns=buckets, fill_value=0.0)
+    order = matrix.sum(axis=1).sort_values(ascending=False).index
+    matrix = matrix.loc[order]
+    return matrix.head(limit) if limit else matrix
+
+
+def period_buckets(period, now=None):
+    """Every bucket start of a PERIODS label up to now"""
+    params = heatmap_params(period, now)
+    return pd.date_range(params['since'], now or datetime.utcnow(), freq=f"{params['bucket_seconds']}s")
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_movement(cycle_id, period):
+    """load_movement for a period, read at most once per collection cycle per process"""
+    with _cache_lock:
+        if _cache.get('cycle_id') != cycle_id:
+            _cache.clear()
+            _cache['cycle_id'] = cycle_id
+        if period not in _cache:
+            _cache[period] = load_movement(period)
+        return _cache[period]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-match price movement per league or fixture and time bucket")
+    parser.add_argument('--period', choices=list(PERIODS), default="24h")
+    parser.add_argument('--by', choices=['league', 'fixture'], default='league')
+    parser.add_argument('--metric', choices=list(METRICS), default='total')
+    parser.add_argument('--limit', type=int, default=20, help="rows shown (most movement first)")
+    args = parser.parse_args()
+
+    by_league, by_fixture = load_movement(args.period)
+    frame = by_league if args.by == 'league' else by_fixture
+    if frame.empty:
+        print("No pre-match movement in this period")
+        return 0
+    matrix = heatmap_matrix(frame, args.by, args.metric, period_buckets(args.period), args.limit)
+    matrix.columns = [bucket.strftime('%d %H:%M') for bucket in matrix.columns]
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(matrix.round(1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
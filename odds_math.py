@@ -0,0 +1,78 @@
+# Implied probability helpers shared by the collector-side modules
+# (the Streamlit scripts keep their own copies)
+import numpy as np
+
+
+def implied_prob(o):
+    """Calculate implied probability from decimal odds"""
+    if o and o > 1:
+        return 1.0 / o
+    return None
+
+def delta_pp(open_o, now_o):
+    """Calculate percentage point change in implied probability"""
+    open_prob = implied_prob(open_o)
+    now_prob = implied_prob(now_o)
+    if open_prob is not None and now_prob is not None:
+        return (now_prob - open_prob) * 100
+    return None
+
+def implied_prob_pct_change(open_o, now_o):
+    """Calculate percentage change in implied probability (not percentage points)"""
+    open_prob = implied_prob(open_o)
+    now_prob = implied_prob(now_o)
+    if open_prob is not None and now_prob is not None and open_prob > 0:
+        return ((now_prob - open_prob) / open_prob) * 100
+    return None
+
+def biggest_delta(opening, current):
+    """Find the outcome with the largest absolute Δpp between two 1X2 prices
+
+    Args:
+        opening, current: (home_odds, draw_odds, away_odds)
+
+    Returns:
+        (outcome, signed_delta_pp, opening_odds, current_odds), or None if any price is invalid
+    """
+    deltas = []
+    for outcome, open_o, now_o in zip(('Home', 'Draw', 'Away'), opening, current):
+        delta = delta_pp(open_o, now_o)
+        if delta is None:
+            return None
+        deltas.append((abs(delta), delta, outcome, open_o, now_o))
+
+    _, signed_delta_pp, outcome, open_o, now_o = max(deltas, key=lambda x: x[0])
+    return outcome, signed_delta_pp, open_o, now_o
+
+def no_vig_probabilities(home_odds, away_odds, draw_odds):
+    """No-vig (fair) probabilities and overround of 1X2 prices, vectorized
+
+    Args:
+        home_odds, away_odds, draw_odds: equal-length sequences of decimal odds
+
+    Returns:
+        (home_fair, away_fair, draw_fair, overround) float arrays; NaN where
+        a price is missing or not above 1
+    """
+    prices = np.array([home_odds, away_odds, draw_odds], dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = np.where(prices > 1, 1 / prices, np.nan)
+    overround = implied.sum(axis=0)
+    home_fair, away_fair, draw_fair = implied / overround
+    return home_fair, away_fair, draw_fair, overround
+
+def biggest_fair_delta(opening, current):
+    """Find the outcome with the largest absolute Δpp in no-vig probability
+
+    Args:
+        opening, current: (home_fair, draw_fair, away_fair) probabilities
+
+    Returns:
+        (outcome, signed_delta_pp, opening_prob, current_prob), or None if any probability is missing
+    """
+    if None in opening or None in current:
+        return None
+    deltas = [(abs(now_p - open_p), (now_p - open_p) * 100, outcome, open_p, now_p)
+              for outcome, open_p, now_p in zip(('Home', 'Draw', 'Away'), opening, current)]
+    _, signed_delta_pp, outcome, open_p, now_p = max(deltas, key=lambda x: x[0])
+    return outcome, signed_delta_pp, open_p, now_p
@@ -0,0 +1,275 @@
+import threading
+from bisect import insort
+from collections import deque
+from datetime import datetime, timedelta
+
+from odds_math import delta_pp
+from query_stats import connect
+
+# Seconds between collection cycles
+COLLECTION_INTERVAL_SECONDS = 900
+
+# Postgres channel the collector notifies on after each finished collection cycle
+# (lives here rather than in data_collector so readers don't import the collector)
+NOTIFY_CHANNEL = 'odds_cycle'
+
+# Fixtures stay in memory until this long after kickoff
+KEEP_AFTER_KICKOFF = timedelta(days=1)
+
+# Price changes kept for streaming consumers (oldest dropped first)
+CHANGE_LOG_SIZE = 10000
+
+# A snapshot changes up to one price per outcome; each change gets its own id
+CHANGE_OUTCOMES = ('Home', 'Away', 'Draw')
+
+SNAPSHOT_COLUMNS = """id, league, home_team, away_team, bookmaker,
+       home_odds, away_odds, draw_odds, timestamp, commence_time,
+       home_fair, away_fair, draw_fair, overround"""
+
+# Queries run on every cycle (their plans are checked by query_plans.py)
+LATEST_CYCLE_QUERY = "SELECT COALESCE(MAX(id), 0) FROM odds"
+
+INITIAL_LOAD_QUERY = f"""
+SELECT {SNAPSHOT_COLUMNS}
+FROM odds
+WHERE commence_time >= NOW() - INTERVAL '1 day'
+ORDER BY id
+"""
+
+NEW_ROWS_QUERY = f"""
+SELECT {SNAPSHOT_COLUMNS}
+FROM odds
+WHERE id > %s
+ORDER BY id
+"""
+
+
+def change_id(row_id, outcome=CHANGE_OUTCOMES[-1]):
+    """Id of the change to one outcome's price in a snapshot (by default the snapshot's last)
+
+    Ids increase with the row id and then in CHANGE_OUTCOMES order, and are
+    the same in every process, so a stream client can resume from any of them.
+    """
+    return row_id * len(CHANGE_OUTCOMES) + CHANGE_OUTCOMES.index(outcome)
+
+
+def get_latest_cycle_id(cursor):
+    """Get the id of the latest collection cycle
+
+    The newest row id in the odds table changes exactly when the collector
+    commits new snapshots, and MAX(id) is a single primary-key index lookup.
+    """
+    cursor.execute(LATEST_CYCLE_QUERY)
+    return cursor.fetchone()[0]
+
+
+class OddsState:
+    """Shared in-memory model of upcoming fixtures and their full odds history
+
+    The first sync loads every snapshot for fixtures that haven't finished yet.
+    Every later sync only fetches rows with an id above the watermark (the
+    highest id already merged), so the bytes read from Postgres per refresh
+    are proportional to the new ticks. Ids come from the SERIAL primary key and
+    the collector is the only writer, so a lower id can never be committed
+    after a higher one has been read.
+
+    Snapshots are stored per fixture as
+    (timestamp, id, bookmaker, home_odds, away_odds, draw_odds, commence_time,
+    home_fair, away_fair, draw_fair, overround), sorted by timestamp; the no-vig
+    probabilities and overround come precomputed from the odds table. Incremental syncs also record every outcome whose
+    price moved, for streaming to API clients (see changes_since).
+    """
+
+    def __init__(self):
+        self.watermark = None
+        self.cycle_id = None
+        self.rows_last_sync = 0
+        # (league, home_team, away_team) -> list of snapshots
+        self._fixtures = {}
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def sync(self, cycle_id=None):
+        """Merge snapshots committed since the last sync
+
+        Args:
+            cycle_id: latest known collection cycle id; the DB is not touched
+                at all if it matches the last synced cycle
+
+        Returns:
+            int: number of new rows merged
+        """
+        if cycle_id is not None and cycle_id == self.cycle_id:
+            return 0
+
+        # One fetch at a time; readers keep using the current data meanwhile
+        with self._sync_lock:
+            if cycle_id is not None and cycle_id == self.cycle_id:
+                return 0
+
+            conn = connect()
+            cursor = conn.cursor()
+            initial_load = self.watermark is None
+            if initial_load:
+                cursor.execute(INITIAL_LOAD_QUERY)
+            else:
+                cursor.execute(NEW_ROWS_QUERY, (self.watermark,))
+            rows = cursor.fetchall()
+            if self.watermark is None and not rows:
+                # Empty window - start the watermark at the current end of the table
+                self.watermark = get_latest_cycle_id(cursor)
+            conn.close()
+
+            with self._lock:
+                # Everything is "new" on the first load, so don't log it as price changes
+                self._merge(rows, record_changes=not initial_load)
+                self._prune()
+
+            for listener in self._listeners:
+                listener(rows, initial_load)
+
+            self.cycle_id = cycle_id
+            self.rows_last_sync = len(rows)
+            return len(rows)
+
+    def add_listener(self, callback):
+        """Call callback(rows, initial_load) with the raw rows of every sync, in id order"""
+        self._listeners.append(callback)
+
+    def _merge(self, rows, record_changes=False):
+        for (row_id, league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds, timestamp, commence_time,
+             home_fair, away_fair, draw_fair, overround) in rows:
+            self.watermark = max(self.watermark or 0, row_id)
+
+            # Matches without a kickoff time are never displayed
+            if commence_time is None:
+                continue
+
+            snapshot = (timestamp, row_id, bookmaker, home_odds, away_odds, draw_odds, commence_time,
+                        home_fair, away_fair, draw_fair, overround)
+            history = self._fixtures.setdefault((league, home_team, away_team), [])
+            if not history or history[-1] <= snapshot:
+                if record_changes:
+                    previous = next((s for s in reversed(history) if s[2] == bookmaker), None)
+                    if previous is not None:
+                        self._record_changes(league, home_team, away_team, previous, snapshot)
+                history.append(snapshot)
+            else:
+                insort(history, snapshot)
+
+    def _record_changes(self, league, home_team, away_team, previous, snapshot):
+        timestamp, row_id, bookmaker = snapshot[0], snapshot[1], snapshot[2]
+        for index, outcome in enumerate(CHANGE_OUTCOMES, start=3):
+            old_price, new_price = previous[index], snapshot[index]
+            if old_price == new_price:
+                continue
+            self._changes.append({
+                'id': change_id(row_id, outcome),
+                'league': league,
+                'home_team': home_team,
+                'away_team': away_team,
+                'bookmaker': bookmaker,
+                'outcome': outcome,
+                'old': old_price,
+                'new': new_price,
+                'delta_pp': delta_pp(old_price, new_price),
+                'timestamp': timestamp
+            })
+
+    def changes_since(self, last_change_id):
+        """Price changes with an id above last_change_id (see change_id), oldest first
+
+        Each change is a dict with its change id, fixture, bookmaker, outcome,
+        old/new price and the implied probability move in percentage points.
+        """
+        with self._lock:
+            return [change for change in self._changes if change['id'] > last_change_id]
+
+    def _prune(self):
+        cutoff = datetime.now() - KEEP_AFTER_KICKOFF
+        finished = [key for key, history in self._fixtures.items() if history[-1][6] < cutoff]
+        for key in finished:
+            del self._fixtures[key]
+
+    def latest_odds(self):
+        """Most recent odds for each match (next 3 days only)
+
+        Same rows and order as the original latest-odds query:
+        (league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds, timestamp, commence_time)
+        """
+        now = datetime.now()
+        updated_since = now - timedelta(hours=24)
+        kickoff_from = datetime.combine(now.date(), datetime.min.time())
+        kickoff_to = kickoff_from + timedelta(days=3)
+
+        rows = []
+        with self._lock:
+            for (league, home_team, away_team), history in self._fixtures.items():
+                # Latest snapshot per bookmaker
+                seen_bookmakers = set()
+                for timestamp, _, bookmaker, home_odds, away_odds, draw_odds, commence_time, *_ in reversed(history):
+                    if timestamp < updated_since:
+                        break
+                    if bookmaker in seen_bookmakers:
+                        continue
+                    seen_bookmakers.add(bookmaker)
+                    if kickoff_from <= commence_time < kickoff_to:
+                        rows.append((league, home_team, away_team, bookmaker,
+                                     home_odds, away_odds, draw_odds, timestamp, commence_time))
+
+        rows.sort(key=lambda row: (row[0], row[1], row[3]))
+        return rows
+
+    def kickoffs(self):
+        """{(league, home_team, away_team): commence_time} of every fixture held"""
+        with self._lock:
+            return {key: history[-1][6] for key, history in self._fixtures.items()}
+
+    def fixture_histories(self):
+        """Copy of every fixture's snapshot list, keyed by (league, home_team, away_team)"""
+        with self._lock:
+            return {key: list(history) for key, history in self._fixtures.items()}
+
+    def history(self, league, home_team, away_team, since):
+        """Snapshots for one match since a cutoff, oldest first
+
+        Returns rows of (bookmaker, home_odds, away_odds, draw_odds, timestamp,
+        home_fair, away_fair, draw_fair)
+        """
+        with self._lock:
+            history = self._fixtures.get((league, home_team, away_team), [])
+            return [(bookmaker, home_odds, away_odds, draw_odds, timestamp, home_fair, away_fair, draw_fair)
+                    for timestamp, _, bookmaker, home_odds, away_odds, draw_odds, _, home_fair, away_fair, draw_fair, _ in history
+                    if timestamp >= since]
+
+    def opening_odds(self, league, home_team, away_team, bookmaker, since=None):
+        """First recorded odds for a match and bookmaker, optionally since a cutoff"""
+        with self._lock:
+            history = self._fixtures.get((league, home_team, away_team), [])
+            for timestamp, _, snapshot_bookmaker, home_odds, away_odds, draw_odds, *_ in history:
+                if snapshot_bookmaker != bookmaker:
+                    continue
+                if since is not None and timestamp < since:
+                    continue
+                return {
+                    'home_odds': home_odds,
+                    'away_odds': away_odds,
+                    'draw_odds': draw_odds,
+                    'timestamp': timestamp
+                }
+        return None
+
+
+_odds_state = None
+_odds_state_lock = threading.Lock()
+
+
+def get_odds_state():
+    """Process-wide OddsState shared by every session"""
+    global _odds_state
+    with _odds_state_lock:
+        if _odds_state is None:
+            _odds_state = OddsState()
+        return _odds_state
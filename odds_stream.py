@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+
+from aiohttp import WSMsgType, web
+
+from odds_state import change_id, get_odds_state
+
+# Live price-change stream for the JSON API (api_server.py):
+#   GET /api/stream[?league=EPL&fixture=Arsenal vs Chelsea]   Server-Sent Events
+#   GET /api/ws                                                WebSocket
+#
+# Each event is one outcome whose price moved:
+#   {"league", "home_team", "away_team", "bookmaker", "outcome", "old", "new", "delta_pp", "timestamp"}
+#
+# league/fixture may be repeated; with neither, every change is sent. WebSocket
+# clients change their subscription at any time by sending
+#   {"leagues": [...], "fixtures": ["Home vs Away", ...]}
+# SSE event ids are change ids (odds_state.change_id), one per outcome, so
+# clients that reconnect with Last-Event-ID get exactly the changes they
+# missed, as long as they are still in the OddsState change log.
+
+# Events buffered per client before it is treated as a slow consumer and dropped
+CLIENT_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE', '256'))
+
+# Comment line sent on idle SSE connections so proxies don't time them out (seconds)
+KEEPALIVE_SECONDS = 15
+
+# Queue marker telling a client's writer it was dropped
+_DROPPED = None
+
+
+def fixture_label(home_team, away_team):
+    return f"{home_team} vs {away_team}"
+
+def tick_event(change):
+    """Compact wire form of an OddsState price change"""
+    event = {key: value for key, value in change.items() if key != 'id'}
+    event['timestamp'] = change['timestamp'].isoformat()
+    return event
+
+
+class StreamClient:
+    def __init__(self, leagues=(), fixtures=()):
+        self.queue = asyncio.Queue(maxsize=CLIENT_BUFFER_SIZE)
+        self.dropped = False
+        self.subscribe(leagues, fixtures)
+
+    def subscribe(self, leagues=(), fixtures=()):
+        self.leagues = set(leagues)
+        self.fixtures = set(fixtures)
+
+    def wants(self, change):
+        if not self.leagues and not self.fixtures:
+            return True
+        return (change['league'] in self.leagues
+                or fixture_label(change['home_team'], change['away_team']) in self.fixtures)
+
+
+class TickBroadcaster:
+    """Fans price changes out to connected stream clients
+
+    On every collector notification the shared OddsState does its incremental
+    sync and the changes it logged are published once, then copied into each
+    subscribed client's bounded queue. Publishing never waits on a client: a
+    client whose queue is full is disconnected instead of slowing the rest.
+    """
+
+    def __init__(self):
+        self.clients = set()
+        # Highest change id already published
+        self.last_id = None
+        self.dropped_clients = 0
+        self._publish_lock = asyncio.Lock()
+
+    async def start(self):
+        state = get_odds_state()
+        await asyncio.get_running_loop().run_in_executor(None, state.sync)
+        self.last_id = change_id(state.watermark or 0)
+
+    def on_notify(self, payload):
+        """CycleListener callback: publish whatever the new cycle changed"""
+        asyncio.ensure_future(self.publish_new_changes(payload.get('cycle_id')))
+
+    async def publish_new_changes(self, cycle_id=None):
+        async with self._publish_lock:
+            if self.last_id is None:
+                return
+            state = get_odds_state()
+            await asyncio.get_running_loop().run_in_executor(None, state.sync, cycle_id)
+            changes = state.changes_since(self.last_id)
+            if not changes:
+                return
+            self.last_id = changes[-1]['id']
+            for change in changes:
+                self.publish(change)
+
+    def publish(self, change):
+        for client in list(self.clients):
+            if not client.wants(change):
+                continue
+            try:
+                client.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                self.drop(client)
+
+    def drop(self, client):
+        self.clients.discard(client)
+        client.dropped = True
+        self.dropped_clients += 1
+        # Make room for the marker so the writer wakes up and closes the connection
+        client.queue.get_nowait()
+        client.queue.put_nowait(_DROPPED)
+
+    def connect(self, leagues=(), fixtures=()):
+        client = StreamClient(leagues, fixtures)
+        self.clients.add(client)
+        return client
+
+    def disconnect(self, client):
+        self.clients.discard(client)
+
+
+def _sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+async def handle_sse(request):
+    broadcaster = request.app['ticks']
+    client = broadcaster.connect(request.query.getall('league', []), request.query.getall('fixture', []))
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        # Stop nginx-style proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+    await response.prepare(request)
+
+    try:
+        # The client is subscribed before the replay, so changes published
+        # meanwhile are both replayed and queued; send them once
+        replayed_id = 0
+        last_event_id = request.headers.get('Last-Event-ID')
+        if last_event_id and last_event_id.isdigit():
+            for change in get_odds_state().changes_since(int(last_event_id)):
+                if change['id'] <= broadcaster.last_id and client.wants(change):
+                    await response.write(_sse('tick', tick_event(change), change['id']))
+                    replayed_id = change['id']
+
+        while True:
+            try:
+                change = await asyncio.wait_for(client.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                await response.write(b": keepalive\n\n")
+                continue
+            if change is _DROPPED:
+                await response.write(_sse('dropped', {'error': "client too slow, reconnect to resume"}))
+                break
+            if change['id'] <= replayed_id:
+                continue
+            await response.write(_sse('tick', tick_event(change), change['id']))
+    except ConnectionResetError:
+        pass
+    finally:
+        broadcaster.disconnect(client)
+
+    return response
+
+
+async def handle_ws(request):
+    broadcaster = request.app['ticks']
+    ws = web.WebSocketResponse(heartbeat=KEEPALIVE_SECONDS)
+    await ws.prepare(request)
+    client = broadcaster.connect(request.query.getall('league', []), request.query.getall('fixture', []))
+
+    async def send_changes():
+        while True:
+            change = await client.queue.get()
+            if change is _DROPPED:
+                await ws.close(code=1008, message=b"client too slow")
+                return
+            await ws.send_json(tick_event(change))
+
+    sender = asyncio.create_task(send_changes())
+    try:
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            try:
+                subscription = json.loads(message.data)
+                client.subscribe(subscription.get('leagues', []), subscription.get('fixtures', []))
+            except (ValueError, AttributeError, TypeError):
+                await ws.send_json({'error': 'expected {"leagues": [...], "fixtures": [...]}'})
+    finally:
+        sender.cancel()
+        broadcaster.disconnect(client)
+
+    return ws
+
+
+async def handle_stream_stats(request):
+    broadcaster = request.app['ticks']
+    return web.json_response({
+        'clients': len(broadcaster.clients),
+        'dropped_clients': broadcaster.dropped_clients,
+        'last_id': broadcaster.last_id
+    }, headers={'Cache-Control': 'no-cache'})
+
+
+async def start_broadcaster(app):
+    await app['ticks'].start()
+
+def setup_streaming(app, listener):
+    """Register the stream routes and hook the broadcaster to the cycle listener"""
+    broadcaster = TickBroadcaster()
+    app['ticks'] = broadcaster
+    listener.add_callback(broadcaster.on_notify)
+    app.on_startup.append(start_broadcaster)
+    app.router.add_get('/api/stream', handle_sse)
+    app.router.add_get('/api/stream/stats', handle_stream_stats)
+    app.router.add_get('/api/ws', handle_ws)
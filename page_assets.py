@@ -0,0 +1,107 @@
+import base64
+import functools
+import hashlib
+import json
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# League to country code mapping for flag images (static/flags/<code>.svg)
+LEAGUE_COUNTRY_CODES = {
+    'EPL': 'GB',
+    'Italy Serie A': 'IT',
+    'Spain La Liga': 'ES',
+    'Germany Bundesliga': 'DE',
+    'France Ligue One': 'FR'
+}
+
+# Runs in a same-origin component iframe and manages <style> tags in the app's <head>
+APPLY_STYLESHEETS_SCRIPT = """<script>
+(function () {
+    const sheets = %s;
+    const doc = window.parent.document;
+    doc.head.querySelectorAll('style[data-oddsedge-sheet]').forEach(function (el) {
+        el.disabled = !(el.dataset.oddsedgeSheet in sheets);
+    });
+    Object.keys(sheets).forEach(function (name) {
+        const sheet = sheets[name];
+        let el = doc.head.querySelector('style[data-oddsedge-sheet="' + name + '"]');
+        if (sheet.css !== null && (!el || el.dataset.version !== sheet.version)) {
+            if (!el) {
+                el = doc.createElement('style');
+                el.dataset.oddsedgeSheet = name;
+                doc.head.appendChild(el);
+            }
+            el.textContent = sheet.css;
+            el.dataset.version = sheet.version;
+        }
+        if (el) {
+            el.disabled = false;
+        }
+    });
+})();
+</script>"""
+
+
+def _flag_stylesheet():
+    """.league-flag plus one class per country with the SVG inlined as base64"""
+    rules = [
+        ".league-flag { display: inline-block; width: 20px; height: 15px; vertical-align: middle; "
+        "margin-right: 4px; border: 1px solid rgba(255,255,255,0.2); background-size: 100% 100%; }"
+    ]
+    for country_code in sorted(set(LEAGUE_COUNTRY_CODES.values())):
+        with open(os.path.join(STATIC_DIR, 'flags', f'{country_code.lower()}.svg'), 'rb') as f:
+            encoded = base64.b64encode(f.read().strip()).decode('ascii')
+        rules.append(f'.flag-{country_code.lower()} {{ background-image: url("data:image/svg+xml;base64,{encoded}"); }}')
+    return '\n'.join(rules) + '\n'
+
+
+@functools.lru_cache(maxsize=None)
+def load_stylesheet(name):
+    """CSS text and content version of static/css/<name>.css ("flags" is generated)
+
+    Read once per process.
+    """
+    if name == 'flags':
+        css = _flag_stylesheet()
+    else:
+        with open(os.path.join(STATIC_DIR, 'css', f'{name}.css'), encoding='utf-8') as f:
+            css = f.read()
+    return css, hashlib.sha1(css.encode('utf-8')).hexdigest()[:12]
+
+
+def use_stylesheets(*names):
+    """Apply these stylesheets to the current page, sending each at most once per session
+
+    The CSS is added to the app's <head>, tagged with a content hash, and
+    stays there across reruns and page switches. Reruns of the same page send
+    nothing at all; switching pages sends a few hundred bytes to switch the
+    other page's sheets off (plus the CSS of any sheet not sent yet).
+    """
+    sheets = {name: load_stylesheet(name) for name in names}
+    wanted = {name: version for name, (_, version) in sheets.items()}
+
+    sent = st.session_state.setdefault('_stylesheets_sent', {})
+    if st.session_state.get('_stylesheets_active') == wanted:
+        return
+
+    payload = {
+        name: {'version': version, 'css': css if sent.get(name) != version else None}
+        for name, (css, version) in sheets.items()
+    }
+    # Keep "</style>"-like sequences in the CSS from closing the <script> early
+    components.html(APPLY_STYLESHEETS_SCRIPT % json.dumps(payload).replace('</', '<\\/'), height=0)
+
+    sent.update(wanted)
+    st.session_state._stylesheets_active = wanted
+
+
+def league_flag_sprite(league):
+    """Flag for a league as a <span> styled by the "flags" stylesheet (⚽ for unknown leagues)"""
+    country_code = LEAGUE_COUNTRY_CODES.get(league, '')
+    if country_code:
+        return f'<span class="league-flag flag-{country_code.lower()}" title="{country_code}"></span>'
+    return '⚽'
@@ -1,7 +1,14 @@
 import streamlit as st
-import psycopg2
-from datetime import datetime, timedelta, timezone
 import os
+import time
+from datetime import datetime
+from dashboard_snapshot import get_dashboard_snapshot
+from live_refresh import current_cycle_id
+from page_assets import league_flag_sprite, use_stylesheets
+from query_stats import query_stats
+from diagnostics import render_profile_panel, render_query_panel
+from profiler import phase, profiler
+from steam_moves import RECENT_EVENTS_HOURS, get_recent_move_events
 
 # Page configuration
 st.set_page_config(
@@ -10,191 +17,12 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS with modern typography and spacing
-st.markdown("""
-    <style>
-    /* Modern typography system */
-    .stApp {
-        font-size: 16px;
-    }
-    
-    .main-header {
-        font-size: 3rem;
-        font-weight: 700;
-        color: #ffffff;
-        margin-bottom: 0.5rem;
-        letter-spacing: -0.02em;
-    }
-    .sub-header {
-        font-size: 1.3rem;
-        color: rgba(255, 255, 255, 0.7);
-        margin-bottom: 1.5rem;
-        font-weight: 400;
-        letter-spacing: -0.01em;
-    }
-    
-    /* Modern card styling - compact rows */
-    .mover-card {
-        padding: 10px 18px;
-        margin-bottom: 6px;
-        border-radius: 8px;
-        border: 1px solid rgba(255, 255, 255, 0.08);
-        background-color: rgba(0, 0, 0, 0.25);
-        box-shadow: 0 2px 6px rgba(0, 0, 0, 0.12), 0 1px 2px rgba(0, 0, 0, 0.08);
-        transition: all 0.3s ease;
-        backdrop-filter: blur(10px);
-    }
-    
-    .mover-card:hover {
-        background-color: rgba(0, 0, 0, 0.35);
-        box-shadow: 0 3px 12px rgba(0, 0, 0, 0.18), 0 1px 4px rgba(0, 0, 0, 0.12);
-        transform: translateY(-1px);
-    }
-    
-    .mover-match {
-        font-size: 1.05rem;
-        font-weight: 600;
-        color: #ffffff;
-        margin-bottom: 3px;
-        letter-spacing: -0.01em;
-        line-height: 1.35;
-    }
-    
-    .mover-details {
-        color: rgba(255, 255, 255, 0.75);
-        font-size: 0.9rem;
-        margin-top: 2px;
-        display: inline-block;
-        line-height: 1.4;
-    }
-    
-    .mover-line-primary {
-        font-size: 1.05rem;
-        font-weight: 600;
-        color: #ffffff;
-        margin-bottom: 4px;
-        line-height: 1.4;
-    }
-    
-    .mover-line-secondary {
-        font-size: 0.85rem;
-        color: rgba(255, 255, 255, 0.6);
-        line-height: 1.4;
-    }
-    
-    .strength-badge {
-        display: inline-block;
-        padding: 2px 6px;
-        border-radius: 4px;
-        font-size: 0.7rem;
-        font-weight: 600;
-        margin-left: 6px;
-        vertical-align: middle;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    .strength-badge.strong {
-        background-color: rgba(255, 100, 100, 0.2);
-        color: #ff6464;
-        border: 1px solid rgba(255, 100, 100, 0.3);
-    }
-    
-    .strength-badge.medium {
-        background-color: rgba(255, 200, 100, 0.2);
-        color: #ffc864;
-        border: 1px solid rgba(255, 200, 100, 0.3);
-    }
-    
-    /* Subtle animated arrow indicators */
-    @keyframes gentleMoveUp {
-        0%, 100% {
-            transform: translateY(0);
-            opacity: 0.6;
-        }
-        50% {
-            transform: translateY(-3px);
-            opacity: 0.8;
-        }
-    }
-    
-    @keyframes gentleMoveDown {
-        0%, 100% {
-            transform: translateY(0);
-            opacity: 0.6;
-        }
-        50% {
-            transform: translateY(3px);
-            opacity: 0.8;
-        }
-    }
-    
-    .arrow-shortening {
-        display: inline-block;
-        animation: gentleMoveUp 2.5s ease-in-out infinite;
-        opacity: 0.65;
-    }
-    
-    .arrow-drifting {
-        display: inline-block;
-        animation: gentleMoveDown 2.5s ease-in-out infinite;
-        opacity: 0.65;
-    }
-    
-    /* Live indicator - subtle pulsing dot */
-    @keyframes subtlePulse {
-        0%, 100% {
-            opacity: 0.6;
-            transform: scale(1);
-        }
-        50% {
-            opacity: 1;
-            transform: scale(1.1);
-        }
-    }
-    
-    .live-indicator {
-        display: inline-block;
-        width: 6px;
-        height: 6px;
-        border-radius: 50%;
-        margin-left: 6px;
-        vertical-align: middle;
-        animation: subtlePulse 2s ease-in-out infinite;
-        box-shadow: 0 0 4px currentColor;
-    }
-    
-    .live-indicator.live-shortening {
-        background-color: #44ff44;
-        color: #44ff44;
-    }
-    
-    .live-indicator.live-drifting {
-        background-color: #ff4444;
-        color: #ff4444;
-    }
-    
-    /* Remove heavy dividers */
-    hr {
-        border: none;
-        border-top: 1px solid rgba(255, 255, 255, 0.05);
-        margin: 2rem 0;
-    }
-    
-    /* Increase spacing between sections */
-    .element-container {
-        margin-bottom: 2rem;
-    }
-    
-    /* Constrain main content column width and center it */
-    .main .block-container {
-        max-width: 950px !important;
-        margin-left: auto !important;
-        margin-right: auto !important;
-        padding-top: 1rem !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
+# Collect this rerun's queries for the admin panel
+query_stats.start_run()
+rerun_started = time.perf_counter()
+
+# Page styles (static/css), sent to the browser once per session
+use_stylesheets('biggest_movers', 'navigation', 'flags')
 
 # Hero Header Section
 st.markdown('<p class="main-header">📊 Biggest Movers</p>', unsafe_allow_html=True)
@@ -211,16 +39,35 @@ selected_window = st.selectbox("Time Window", time_window_options,
 # Update session state for sharing with dashboard
 st.session_state.time_window_selection = selected_window
 
-# Convert time window to timedelta and subtitle text
+# Rank by no-vig probability (shared with the dashboard's charts)
+if 'fair_probabilities' not in st.session_state:
+    st.session_state.fair_probabilities = False
+# The checkbox's own state is dropped while another page is shown, so restore it from the shared flag
+if 'biggest_movers_fair' not in st.session_state:
+    st.session_state.biggest_movers_fair = st.session_state.fair_probabilities
+st.session_state.fair_probabilities = st.checkbox(
+    "Fair probabilities (no vig)", key="biggest_movers_fair",
+    help="Rank by the move in probability with the bookmaker margin removed, so margin changes don't count as moves"
+)
+fair_probabilities = st.session_state.fair_probabilities
+
+# Absolute move, or move relative to the outcome's own tick-to-tick noise
+RANK_OPTIONS = ["Biggest move (Δpp)", "Most unusual (z-score)"]
+rank_by = st.selectbox("Rank by", RANK_OPTIONS, key="biggest_movers_rank",
+                       help="z-score: the move divided by what the outcome's usual tick-to-tick volatility "
+                            "would produce over the same number of updates")
+rank_by_zscore = rank_by == RANK_OPTIONS[1]
+
+# Subtitle text for the time window
 if selected_window == "Since Open":
-    window_timedelta = None  # Special case - use all history
     window_label = "Since Open"
 else:
-    hours = int(selected_window.replace("h", ""))
-    window_timedelta = timedelta(hours=hours)
     window_label = f"Last {selected_window}"
 
-st.markdown(f'<p class="sub-header">Top 10 matches with largest odds movement ({window_label})</p>', unsafe_allow_html=True)
+if rank_by_zscore:
+    st.markdown(f'<p class="sub-header">Top 10 matches with the most unusual odds movement ({window_label})</p>', unsafe_allow_html=True)
+else:
+    st.markdown(f'<p class="sub-header">Top 10 matches with largest odds movement ({window_label})</p>', unsafe_allow_html=True)
 
 # Database connection
 DATABASE_URL = os.environ.get('DATABASE_URL')
@@ -229,331 +76,176 @@ if not DATABASE_URL:
     st.error("Database connection not configured")
     st.stop()
 
-def get_db_connection():
-    """Create database connection"""
-    return psycopg2.connect(DATABASE_URL)
-
 # Helper functions for implied probability calculations
-def implied_prob(o):
-    """Calculate implied probability from decimal odds"""
-    if o and o > 1:
-        return 1.0 / o
-    return None
-
-def delta_pp(open_o, now_o):
-    """Calculate percentage point change in implied probability"""
-    open_prob = implied_prob(open_o)
-    now_prob = implied_prob(now_o)
-    if open_prob is not None and now_prob is not None:
-        return (now_prob - open_prob) * 100
-    return None
-
 def delta_odds_pct(open_o, now_o):
     """Calculate percentage change in odds"""
     if open_o and open_o > 0 and now_o and now_o > 0:
         return (now_o / open_o - 1) * 100
     return None
 
-def implied_prob_pct_change(open_o, now_o):
-    """Calculate percentage change in implied probability (not percentage points)"""
-    open_prob = implied_prob(open_o)
-    now_prob = implied_prob(now_o)
-    if open_prob is not None and now_prob is not None and open_prob > 0:
-        return ((now_prob - open_prob) / open_prob) * 100
-    return None
+def get_league_flag_html(league):
+    """Get flag HTML for a league (inline sprite from the "flags" stylesheet, no image requests)"""
+    return league_flag_sprite(league)
 
-def is_pre_match(commence_time):
-    """Check if a match is still pre-match (kickoff is more than 5 minutes away)
+def get_biggest_movers(window, fair=False):
+    """Get the top 10 matches with largest absolute implied probability changes
     
-    Args:
-        commence_time: datetime object (timezone-aware or naive)
+    Rankings are precomputed by the collector once per cycle, so this runs no SQL
+    per page view.
     
-    Returns:
-        bool: True if match is pre-match, False if match has started or is within 5 minutes
+    Args:
+        window: time window label ("1h", "3h", "6h", "24h" or "Since Open")
+        fair: rank by no-vig probability instead of raw implied probability
     """
-    if commence_time is None:
-        return False  # No kickoff time means we can't determine, exclude it
-    
-    # Get current time in UTC
-    now_utc = datetime.now(timezone.utc)
-    
-    # Ensure commence_time is timezone-aware (assume UTC if naive)
-    if commence_time.tzinfo is None:
-        commence_time = commence_time.replace(tzinfo=timezone.utc)
-    else:
-        # Convert to UTC if it has timezone info
-        commence_time = commence_time.astimezone(timezone.utc)
-    
-    # Define cutoff: now + 5 minutes
-    cutoff_time = now_utc + timedelta(minutes=5)
-    
-    # Match is pre-match if kickoff > cutoff_time
-    return commence_time > cutoff_time
+    return get_dashboard_snapshot(current_cycle_id()).top_movers(window, fair=fair)
 
-def get_league_flag_html(league):
-    """Get flag as HTML img tag using CDN"""
-    LEAGUE_COUNTRY_CODES = {
-        'EPL': 'GB',
-        'Italy Serie A': 'IT',
-        'Spain La Liga': 'ES',
-        'Germany Bundesliga': 'DE',
-        'France Ligue One': 'FR'
-    }
+def get_unusual_movers(window):
+    """Get the top 10 matches whose move is largest relative to their own volatility
     
-    country_code = LEAGUE_COUNTRY_CODES.get(league, '')
-    if country_code:
-        flag_url = f"https://flagcdn.com/w20/{country_code.lower()}.png"
-        return f'<img src="{flag_url}" alt="{country_code}" style="width: 20px; height: 15px; vertical-align: middle; margin-right: 4px; border: 1px solid rgba(255,255,255,0.2);">'
-    return '⚽'
-
-def get_biggest_movers(time_window=None):
-    """Get the top 10 matches with largest absolute no-vig probability changes
+    Ranked by |z-score| from the collector's running per-outcome statistics,
+    precomputed once per cycle like get_biggest_movers.
     
     Args:
-        time_window: timedelta object for time window, or None for "Since Open"
+        window: time window label ("1h", "3h", "6h", "24h" or "Since Open")
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Calculate the cutoff time if window is specified (using UTC)
-    now_utc = datetime.now(timezone.utc)
-    cutoff_pre_match = now_utc + timedelta(minutes=5)  # 5 minutes buffer
-    
-    if time_window is None:
-        # "Since Open" - use all history, but still filter for recent matches only
-        cutoff_time = None
-    else:
-        cutoff_time = now_utc - time_window
-    
-    # Get all unique matches within the window
-    # Exclude finished and in-play matches - only include pre-match (commence_time > NOW + 5 minutes)
-    if time_window is None:
-        query = """
-        SELECT DISTINCT league, home_team, away_team, bookmaker
-        FROM odds
-        WHERE timestamp >= NOW() - INTERVAL '7 days'
-          AND commence_time IS NOT NULL 
-          AND commence_time > %s
-        """
-        cursor.execute(query, (cutoff_pre_match,))
+    return get_dashboard_snapshot(current_cycle_id()).top_movers(window, zscore=True)
+
+# Display Biggest Movers
+with phase("movers.load"):
+    if rank_by_zscore:
+        movers = get_unusual_movers(selected_window)
     else:
-        query = """
-        SELECT DISTINCT league, home_team, away_team, bookmaker
-        FROM odds
-        WHERE timestamp >= %s
-          AND commence_time IS NOT NULL 
-          AND commence_time > %s
-        """
-        cursor.execute(query, (cutoff_time, cutoff_pre_match))
-    
-    matches = cursor.fetchall()
-    
-    movers = []
-    
-    for league, home_team, away_team, bookmaker in matches:
-        # Get commence_time for this match to verify it's still pre-match
-        commence_query = """
-        SELECT commence_time
-        FROM odds
-        WHERE league = %s 
-          AND home_team = %s 
-          AND away_team = %s
-          AND bookmaker = %s
-          AND commence_time IS NOT NULL
-        ORDER BY timestamp DESC
-        LIMIT 1
-        """
-        cursor.execute(commence_query, (league, home_team, away_team, bookmaker))
-        commence_row = cursor.fetchone()
+        movers = get_biggest_movers(selected_window, fair_probabilities)
+
+if movers:
+    with phase("movers.render"):
+        for i, mover in enumerate(movers):
+            league = mover['league']
+            home = mover['home_team']
+            away = mover['away_team']
+            outcome = mover['outcome']
+            opening_odds = mover['opening_odds']
+            latest_odds = mover['latest_odds']
+            prob_pct_change = mover.get('prob_pct_change', None)
+            minutes_ago = mover['minutes_ago']
         
-        if commence_row:
-            commence_time = commence_row[0]
-            # Double-check pre-match status (in case database query didn't catch it)
-            if not is_pre_match(commence_time):
-                continue
+            # Get league flag
+            league_flag_html = get_league_flag_html(league)
+            league_name = "Premier League" if league == 'EPL' else league.replace('Italy ', '').replace('Spain ', '').replace('Germany ', '').replace('France ', '')
         
-        # Get opening odds (first within the window, or earliest if "Since Open")
-        if time_window is None:
-            opening_query = """
-            SELECT home_odds, away_odds, draw_odds, timestamp
-            FROM odds
-            WHERE league = %s 
-              AND home_team = %s 
-              AND away_team = %s
-              AND bookmaker = %s
-            ORDER BY timestamp ASC
-            LIMIT 1
-            """
-            cursor.execute(opening_query, (league, home_team, away_team, bookmaker))
-        else:
-            opening_query = """
-            SELECT home_odds, away_odds, draw_odds, timestamp
-            FROM odds
-            WHERE league = %s 
-              AND home_team = %s 
-              AND away_team = %s
-              AND bookmaker = %s
-              AND timestamp >= %s
-            ORDER BY timestamp ASC
-            LIMIT 1
-            """
-            cursor.execute(opening_query, (league, home_team, away_team, bookmaker, cutoff_time))
+            # Determine if odds shortened or drifted
+            if latest_odds < opening_odds:
+                movement_text = "shortened"
+                movement_color = "#44ff44"  # Green
+            else:
+                movement_text = "drifted"
+                movement_color = "#ff4444"  # Red
         
-        opening_row = cursor.fetchone()
+            # Implied (or no-vig) probabilities, precomputed with the ranking
+            start_prob = mover['opening_prob']
+            current_prob = mover['latest_prob']
         
-        # Get latest odds (must be within the window)
-        if time_window is None:
-            latest_query = """
-            SELECT home_odds, away_odds, draw_odds, timestamp
-            FROM odds
-            WHERE league = %s 
-              AND home_team = %s 
-              AND away_team = %s
-              AND bookmaker = %s
-              AND timestamp >= NOW() - INTERVAL '7 days'
-            ORDER BY timestamp DESC
-            LIMIT 1
-            """
-            cursor.execute(latest_query, (league, home_team, away_team, bookmaker))
-        else:
-            latest_query = """
-            SELECT home_odds, away_odds, draw_odds, timestamp
-            FROM odds
-            WHERE league = %s 
-              AND home_team = %s 
-              AND away_team = %s
-              AND bookmaker = %s
-              AND timestamp >= %s
-            ORDER BY timestamp DESC
-            LIMIT 1
-            """
-            cursor.execute(latest_query, (league, home_team, away_team, bookmaker, cutoff_time))
+            # Calculate delta (percentage point change) for strength label
+            abs_delta_pp = None
+            if start_prob is not None and current_prob is not None:
+                delta = (current_prob - start_prob) * 100
+                abs_delta_pp = abs(delta)
+                start_prob_pct = start_prob * 100
+                current_prob_pct = current_prob * 100
+                delta_formatted = f"{delta:+.1f}%"
+            else:
+                delta = None
+                start_prob_pct = None
+                current_prob_pct = None
+                delta_formatted = ""
         
-        latest_row = cursor.fetchone()
+            # Determine strength badge (by |z| when ranking by z-score)
+            strength_badge = ""
+            if rank_by_zscore:
+                if mover['abs_zscore'] >= 3:
+                    strength_badge = '<span class="strength-badge strong">Strong</span>'
+                elif mover['abs_zscore'] >= 2:
+                    strength_badge = '<span class="strength-badge medium">Medium</span>'
+            elif abs_delta_pp is not None:
+                if abs_delta_pp >= 5:
+                    strength_badge = '<span class="strength-badge strong">Strong</span>'
+                elif abs_delta_pp >= 3:
+                    strength_badge = '<span class="strength-badge medium">Medium</span>'
         
-        if opening_row and latest_row:
-            opening_home, opening_away, opening_draw, opening_time = opening_row
-            latest_home, latest_away, latest_draw, latest_time = latest_row
-            
-            # Calculate implied probability deltas (Δpp) for each outcome
-            home_delta_pp = delta_pp(opening_home, latest_home)
-            draw_delta_pp = delta_pp(opening_draw, latest_draw)
-            away_delta_pp = delta_pp(opening_away, latest_away)
-            
-            if all([home_delta_pp is not None, draw_delta_pp is not None, away_delta_pp is not None]):
-                # Find the largest absolute delta_pp (for ranking - internal calculation)
-                deltas = [
-                    (abs(home_delta_pp), home_delta_pp, 'Home', opening_home, latest_home),
-                    (abs(draw_delta_pp), draw_delta_pp, 'Draw', opening_draw, latest_draw),
-                    (abs(away_delta_pp), away_delta_pp, 'Away', opening_away, latest_away)
-                ]
-                max_abs_delta_pp, signed_delta_pp, outcome, opening_odds, latest_odds = max(deltas, key=lambda x: x[0])
-                
-                # Calculate implied probability percentage change for display (not percentage points)
-                prob_pct_change = implied_prob_pct_change(opening_odds, latest_odds)
-                
-                # Calculate minutes ago (using UTC)
-                now_utc = datetime.now(timezone.utc)
-                if latest_time.tzinfo is None:
-                    latest_time_utc = latest_time.replace(tzinfo=timezone.utc)
-                else:
-                    latest_time_utc = latest_time.astimezone(timezone.utc)
-                minutes_ago = int((now_utc - latest_time_utc).total_seconds() / 60)
-                
-                movers.append({
-                    'league': league,
-                    'home_team': home_team,
-                    'away_team': away_team,
-                    'outcome': outcome,
-                    'delta_pp': signed_delta_pp,  # Keep for internal ranking
-                    'abs_delta_pp': max_abs_delta_pp,  # Keep for internal ranking
-                    'prob_pct_change': prob_pct_change,  # For display
-                    'opening_odds': opening_odds,
-                    'latest_odds': latest_odds,
-                    'minutes_ago': minutes_ago
-                })
-    
-    conn.close()
-    
-    # Sort by absolute delta_pp descending and return top 10
-    movers.sort(key=lambda x: x['abs_delta_pp'], reverse=True)
-    return movers[:10]
+            # Format time display
+            if minutes_ago < 1:
+                time_display = "just now"
+            else:
+                time_display = f"{minutes_ago}m ago"
+        
+            # Line 1 (primary): "{Side} — shortened/drifted ({start_odds} → {current_odds})"
+            line1 = f'{outcome} — <span style="color: {movement_color}; font-weight: 600;">{movement_text}</span> ({opening_odds:.2f} → {latest_odds:.2f}){strength_badge}'
+        
+            # Line 2 (secondary, muted): "Implied chance: {start%} → {current%} ({delta%}) · Updated {time}"
+            if start_prob_pct is not None and current_prob_pct is not None:
+                chance_label = "Fair chance" if fair_probabilities and not rank_by_zscore else "Implied chance"
+                line2 = f"{chance_label}: {start_prob_pct:.1f}% → {current_prob_pct:.1f}% ({delta_formatted}) · Updated {time_display}"
+            else:
+                line2 = f"Updated {time_display}"
+            if rank_by_zscore:
+                line2 += f" · z {mover['zscore']:+.1f} (usual move {mover['sigma_pp']:.2f}pp per update, {mover['ticks']} updates)"
+        
+            # Create modern card row with new formatting
+            row_html = f"""
+            <div class="mover-card">
+                <div class="mover-match">{home} vs {away} ({league_flag_html} {league_name})</div>
+                <div class="mover-line-primary">{line1}</div>
+                <div class="mover-line-secondary">{line2}</div>
+            </div>
+            """
+            st.markdown(row_html, unsafe_allow_html=True)
+elif rank_by_zscore:
+    st.info("No volatility data yet: fixtures need a few updates of history, and the ranking is published by the data collector.")
+else:
+    st.info("No movement data available yet.")
 
-# Display Biggest Movers
-movers = get_biggest_movers(window_timedelta)
+# Rapid moves flagged by the collector as the snapshots came in
+st.markdown(f'<p class="sub-header">⚡ Steam moves (last {RECENT_EVENTS_HOURS}h)</p>', unsafe_allow_html=True)
 
-if movers:
-    for i, mover in enumerate(movers):
-        league = mover['league']
-        home = mover['home_team']
-        away = mover['away_team']
-        outcome = mover['outcome']
-        opening_odds = mover['opening_odds']
-        latest_odds = mover['latest_odds']
-        prob_pct_change = mover.get('prob_pct_change', None)
-        minutes_ago = mover['minutes_ago']
-        
-        # Get league flag
-        league_flag_html = get_league_flag_html(league)
+with phase("movers.steam"):
+    move_events = get_recent_move_events(current_cycle_id())
+
+if move_events:
+    now = datetime.utcnow()
+    for event in move_events:
+        league = event['league']
         league_name = "Premier League" if league == 'EPL' else league.replace('Italy ', '').replace('Spain ', '').replace('Germany ', '').replace('France ', '')
         
-        # Determine if odds shortened or drifted
-        if latest_odds < opening_odds:
+        if event['to_odds'] < event['from_odds']:
             movement_text = "shortened"
             movement_color = "#44ff44"  # Green
         else:
             movement_text = "drifted"
             movement_color = "#ff4444"  # Red
         
-        # Calculate implied probabilities
-        start_prob = implied_prob(opening_odds)
-        current_prob = implied_prob(latest_odds)
-        
-        # Calculate delta (percentage point change) for strength label
-        abs_delta_pp = None
-        if start_prob is not None and current_prob is not None:
-            delta = (current_prob - start_prob) * 100
-            abs_delta_pp = abs(delta)
-            start_prob_pct = start_prob * 100
-            current_prob_pct = current_prob * 100
-            delta_formatted = f"{delta:+.1f}%"
-        else:
-            delta = None
-            start_prob_pct = None
-            current_prob_pct = None
-            delta_formatted = ""
-        
-        # Determine strength badge
-        strength_badge = ""
-        if abs_delta_pp is not None:
-            if abs_delta_pp >= 5:
-                strength_badge = '<span class="strength-badge strong">Strong</span>'
-            elif abs_delta_pp >= 3:
-                strength_badge = '<span class="strength-badge medium">Medium</span>'
-        
-        # Format time display
-        if minutes_ago < 1:
-            time_display = "just now"
+        move_minutes = int((event['detected_at'] - event['started_at']).total_seconds() / 60)
+        if event['kind'] == 'streak':
+            how = f"{event['ticks']} updates in a row, {move_minutes} min"
         else:
-            time_display = f"{minutes_ago}m ago"
+            how = f"within {move_minutes} min"
+        minutes_ago = int((now - event['detected_at']).total_seconds() / 60)
+        time_display = "just now" if minutes_ago < 1 else f"{minutes_ago}m ago"
         
-        # Line 1 (primary): "{Side} — shortened/drifted ({start_odds} → {current_odds})"
-        line1 = f'{outcome} — <span style="color: {movement_color}; font-weight: 600;">{movement_text}</span> ({opening_odds:.2f} → {latest_odds:.2f}){strength_badge}'
+        line1 = f'{event["outcome"]} — <span style="color: {movement_color}; font-weight: 600;">{movement_text}</span> ({event["from_odds"]:.2f} → {event["to_odds"]:.2f}) {how}'
+        line2 = f"Implied chance {event['delta_pp']:+.1f}pp · Flagged {time_display}"
         
-        # Line 2 (secondary, muted): "Implied chance: {start%} → {current%} ({delta%}) · Updated {time}"
-        if start_prob_pct is not None and current_prob_pct is not None:
-            line2 = f"Implied chance: {start_prob_pct:.1f}% → {current_prob_pct:.1f}% ({delta_formatted}) · Updated {time_display}"
-        else:
-            line2 = f"Updated {time_display}"
-        
-        # Create modern card row with new formatting
-        row_html = f"""
+        st.markdown(f"""
         <div class="mover-card">
-            <div class="mover-match">{home} vs {away} ({league_flag_html} {league_name})</div>
+            <div class="mover-match">{event['home_team']} vs {event['away_team']} ({get_league_flag_html(league)} {league_name})</div>
             <div class="mover-line-primary">{line1}</div>
             <div class="mover-line-secondary">{line2}</div>
         </div>
-        """
-        st.markdown(row_html, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
 else:
-    st.info("No movement data available yet.")
+    st.caption("No rapid moves flagged recently.")
+
+profiler.record("movers.rerun", (time.perf_counter() - rerun_started) * 1000)
+
+# Query and phase timings (only with ADMIN_PANEL=1)
+render_query_panel()
+render_profile_panel()
@@ -1,4 +1,10 @@
 import streamlit as st
+import os
+import numpy as np
+import pandas as pd
+from hedging import (OUTCOMES, POSITION_COLUMNS, fill_hedge_odds, hedge_positions, latest_prices, scenario_grid,
+                     three_way_hedge)
+from page_assets import use_stylesheets
 
 # Page configuration
 st.set_page_config(
@@ -8,121 +14,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for consistent styling with compact layout
-st.markdown("""
-    <style>
-    /* Modern typography system */
-    .stApp {
-        font-size: 16px;
-    }
-    
-    .main-header {
-        font-size: 3rem;
-        font-weight: 700;
-        color: #ffffff;
-        margin-bottom: 0.5rem;
-        letter-spacing: -0.02em;
-    }
-    .sub-header {
-        font-size: 1.3rem;
-        color: rgba(255, 255, 255, 0.7);
-        margin-bottom: 1.5rem;
-        font-weight: 400;
-        letter-spacing: -0.01em;
-    }
-    
-    /* Compact spacing */
-    .element-container {
-        margin-bottom: 0.75rem !important;
-    }
-    
-    .stNumberInput > label {
-        margin-bottom: 0.25rem !important;
-        font-size: 0.9rem !important;
-    }
-    
-    /* Outcome breakdown card styling */
-    .outcome-card {
-        padding: 16px 20px;
-        margin-top: 1rem;
-        border-radius: 12px;
-        border: 1px solid rgba(255, 255, 255, 0.08);
-        background-color: rgba(0, 0, 0, 0.25);
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.15), 0 1px 3px rgba(0, 0, 0, 0.1);
-        backdrop-filter: blur(10px);
-    }
-    
-    .outcome-card h4 {
-        color: #ffffff;
-        margin-top: 0;
-        margin-bottom: 12px;
-        font-size: 1.1rem;
-        font-weight: 600;
-    }
-    
-    .outcome-row {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        padding: 8px 0;
-        border-bottom: 1px solid rgba(255, 255, 255, 0.05);
-    }
-    
-    .outcome-row:last-child {
-        border-bottom: none;
-        font-weight: 600;
-        padding-top: 12px;
-        margin-top: 4px;
-        border-top: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    .outcome-label {
-        color: rgba(255, 255, 255, 0.7);
-        font-size: 0.95rem;
-        font-weight: 500;
-    }
-    
-    .outcome-value {
-        font-size: 1.05rem;
-        font-weight: 600;
-    }
-    
-    .outcome-value.positive {
-        color: #44ff44;
-    }
-    
-    .outcome-value.negative {
-        color: #ff4444;
-    }
-    
-    .outcome-value.zero {
-        color: rgba(255, 255, 255, 0.9);
-    }
-    
-    /* Info line styling */
-    .info-line {
-        color: rgba(255, 255, 255, 0.6);
-        font-size: 0.85rem;
-        margin-top: 0.5rem;
-        margin-bottom: 1rem;
-    }
-    
-    /* Constrain main content column width and center it */
-    .main .block-container {
-        max-width: 700px !important;
-        margin-left: auto !important;
-        margin-right: auto !important;
-        padding-top: 1rem !important;
-    }
-    
-    /* Remove heavy dividers */
-    hr {
-        border: none;
-        border-top: 1px solid rgba(255, 255, 255, 0.05);
-        margin: 2.5rem 0;
-    }
-    </style>
-""", unsafe_allow_html=True)
+# Page styles (static/css), sent to the browser once per session
+use_stylesheets('hedge_calculator', 'navigation')
 
 # Header
 st.markdown('<p class="main-header">💰 Hedge Calculator</p>', unsafe_allow_html=True)
@@ -131,6 +24,189 @@ st.markdown('<p class="sub-header">Calculate optimal hedge stakes and guaranteed
 # Short info line
 st.markdown('<p class="info-line">💡 Calculates hedge stake for equal guaranteed profit.</p>', unsafe_allow_html=True)
 
+def get_profit_class(value):
+    """CSS class for a profit value"""
+    if value > 0:
+        return "positive"
+    elif value < 0:
+        return "negative"
+    else:
+        return "zero"
+
+# One bet, one bet against the other two 1X2 outcomes, or a whole list of open positions
+mode = st.radio("Mode", ["Single bet", "Three-way (1X2)", "Bulk"], horizontal=True, key="hedge_mode")
+
+if mode == "Bulk":
+    st.markdown(
+        '<p class="info-line">Upload a CSV or edit the table: league, home_team, away_team, outcome '
+        '(Home/Draw/Away or a team name), odds, stake and hedge_odds.</p>',
+        unsafe_allow_html=True
+    )
+
+    uploaded = st.file_uploader("Positions CSV", type="csv", key="hedge_positions_csv")
+    if uploaded is not None:
+        positions = pd.read_csv(uploaded)
+        missing = [column for column in ('odds', 'stake') if column not in positions]
+        if missing:
+            st.error(f"CSV is missing column(s): {', '.join(missing)}")
+            st.stop()
+    else:
+        positions = pd.DataFrame([[None] * len(POSITION_COLUMNS)], columns=POSITION_COLUMNS)
+    for column in POSITION_COLUMNS:
+        if column not in positions:
+            positions[column] = None
+    for column in ('odds', 'stake', 'hedge_odds'):
+        positions[column] = pd.to_numeric(positions[column], errors='coerce')
+
+    positions = st.data_editor(
+        positions[POSITION_COLUMNS],
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"hedge_positions_{uploaded.file_id if uploaded is not None else 'manual'}"
+    )
+
+    fill_latest = st.checkbox(
+        "Fill missing hedge odds from the latest prices",
+        value=True,
+        key="hedge_fill_latest",
+        help="Uses the other two outcomes of the fixture backed together (1 / (1/o_a + 1/o_b)), "
+             "with the hedge stake split between them"
+    )
+    if fill_latest and positions['hedge_odds'].isna().any():
+        if not os.environ.get('DATABASE_URL'):
+            st.warning("Database connection not configured: latest prices unavailable")
+        else:
+            # Only needed here, so the single-bet calculator works without a database
+            from dashboard_snapshot import get_dashboard_snapshot
+            from live_refresh import current_cycle_id
+
+            prices = latest_prices(get_dashboard_snapshot(current_cycle_id()).latest_odds())
+            positions = fill_hedge_odds(positions, prices)
+
+    result = hedge_positions(positions)
+    hedged = result.dropna(subset=['guaranteed_profit'])
+
+    if hedged.empty:
+        st.info("Enter odds, stake and hedge odds (or a fixture with latest prices) to see the hedges.")
+    else:
+        total_hedge = hedged['hedge_stake'].sum()
+        total_guaranteed = hedged['guaranteed_profit'].sum()
+        st.markdown(f"""
+        <div class="outcome-card">
+            <h4>Book Summary</h4>
+            <div class="outcome-row">
+                <span class="outcome-label">Positions hedged</span>
+                <span class="outcome-value">{len(hedged)} of {len(result)}</span>
+            </div>
+            <div class="outcome-row">
+                <span class="outcome-label">Total hedge stake</span>
+                <span class="outcome-value">${total_hedge:.2f}</span>
+            </div>
+            <div class="outcome-row">
+                <span class="outcome-label">Total guaranteed profit</span>
+                <span class="outcome-value {get_profit_class(total_guaranteed)}">${total_guaranteed:.2f}</span>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.dataframe(result.round(2), hide_index=True, use_container_width=True)
+        st.download_button(
+            "Download hedges (CSV)",
+            result.to_csv(index=False),
+            file_name="hedges.csv",
+            mime="text/csv",
+            key="hedge_download"
+        )
+
+    st.markdown("---")
+    st.caption("OddsEdge - Professional Odds Tracking")
+    st.stop()
+
+if mode == "Three-way (1X2)":
+    st.markdown(
+        '<p class="info-line">Stakes on the other two outcomes that equalize profit across Home, Draw and Away, '
+        'or that hold them at a minimum profit and leave the upside on your bet.</p>',
+        unsafe_allow_html=True
+    )
+
+    position_col, odds_col, stake_col = st.columns(3)
+    with position_col:
+        position_outcome = st.selectbox("My Bet", OUTCOMES, key="three_way_outcome")
+    with odds_col:
+        position_odds = st.number_input("My Odds", min_value=1.01, value=2.50, step=0.01, format="%.2f",
+                                        key="three_way_odds")
+    with stake_col:
+        position_stake = st.number_input("Bet Amount", min_value=0.01, value=100.0, step=1.0, format="%.2f",
+                                         key="three_way_stake")
+
+    other_outcomes = [name for name in OUTCOMES if name != position_outcome]
+    price_cols = st.columns(2)
+    prices = {}
+    for col, name in zip(price_cols, other_outcomes):
+        with col:
+            prices[name] = st.number_input(f"Current {name} Odds", min_value=1.01, value=3.00, step=0.01,
+                                           format="%.2f", key=f"three_way_price_{name.lower()}")
+
+    floor_col, floor_value_col = st.columns(2)
+    with floor_col:
+        use_floor = st.checkbox("Floor profit instead of equalizing", key="three_way_use_floor")
+    with floor_value_col:
+        floor = st.number_input("Minimum profit on the other outcomes", value=0.0, step=1.0, format="%.2f",
+                                key="three_way_floor", disabled=not use_floor)
+    floor = floor if use_floor else None
+
+    solution = three_way_hedge(position_outcome, position_odds, position_stake, prices, floor)
+    if np.isnan(solution['guaranteed_profit']):
+        st.warning("No hedge reaches that floor at these prices: the two outcomes are priced at 100% or more "
+                   "together.")
+    else:
+        rows = "".join(f"""
+            <div class="outcome-row">
+                <span class="outcome-label">{name}: stake ${solution[name]['stake']:.2f}</span>
+                <span class="outcome-value {get_profit_class(solution[name]['profit'])}">${solution[name]['profit']:.2f}</span>
+            </div>""" for name in OUTCOMES)
+        guaranteed = solution['guaranteed_profit']
+        st.markdown(f"""
+        <div class="outcome-card">
+            <h4>Outcome Breakdown (profit if each outcome wins)</h4>{rows}
+            <div class="outcome-row">
+                <span class="outcome-label">Guaranteed profit</span>
+                <span class="outcome-value {get_profit_class(guaranteed)}">${guaranteed:.2f}</span>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # Sensitivity: guaranteed profit if the other two prices move before you place the hedge
+        st.markdown("### Sensitivity to the hedge prices")
+        others, grid = scenario_grid(position_outcome, position_odds, position_stake, prices,
+                                     np.linspace(-0.2, 0.2, 21), floor)
+
+        # Imported on first chart so other pages don't pay for it
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Heatmap(
+            z=grid.to_numpy(),
+            x=grid.columns,
+            y=grid.index,
+            colorscale='RdYlGn',
+            zmid=0,
+            colorbar=dict(title="Guaranteed ($)"),
+            hovertemplate=f"{others[0]} %{{y:.2f}}, {others[1]} %{{x:.2f}}: %{{z:.2f}}<extra></extra>"
+        ))
+        fig.update_layout(
+            height=450,
+            xaxis_title=f"{others[1]} odds",
+            yaxis_title=f"{others[0]} odds",
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white')
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("---")
+    st.caption("OddsEdge - Professional Odds Tracking")
+    st.stop()
+
 # Initialize session state for inputs
 if 'my_odds' not in st.session_state:
     st.session_state.my_odds = None
@@ -229,14 +305,6 @@ if (my_odds is not None and my_odds > 0 and
     guaranteed_profit = min(profit_original_win, profit_hedge_win)
     
     # Determine color classes for profit values
-    def get_profit_class(value):
-        if value > 0:
-            return "positive"
-        elif value < 0:
-            return "negative"
-        else:
-            return "zero"
-    
     profit_original_class = get_profit_class(profit_original_win)
     profit_hedge_class = get_profit_class(profit_hedge_win)
     guaranteed_profit_class = get_profit_class(guaranteed_profit)
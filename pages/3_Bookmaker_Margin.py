@@ -0,0 +1,117 @@
+import streamlit as st
+import os
+import time
+from live_refresh import current_cycle_id
+from margin_rollups import IN_PLAY, KICKOFF_BANDS, band_label, get_margin_rollups
+from page_assets import use_stylesheets
+from query_stats import query_stats
+from diagnostics import render_profile_panel, render_query_panel
+from profiler import phase, profiler
+
+# Page configuration
+st.set_page_config(
+    page_title="Bookmaker Margin - OddsEdge",
+    page_icon="📐",
+    layout="wide"
+)
+
+# Collect this rerun's queries for the admin panel
+query_stats.start_run()
+rerun_started = time.perf_counter()
+
+# Page styles (static/css), sent to the browser once per session
+use_stylesheets('bookmaker_margin', 'navigation')
+
+# Hero Header Section
+st.markdown('<p class="main-header">📐 Bookmaker Margin</p>', unsafe_allow_html=True)
+st.markdown('<p class="sub-header">Pinnacle 1X2 overround by league, over time and by time to kickoff</p>', unsafe_allow_html=True)
+
+# Period and resolution of the margin series
+PERIOD_OPTIONS = {"7 days": 7, "30 days": 30, "90 days": 90, "1 year": 365}
+RESOLUTION_OPTIONS = {"Hourly": 'hour', "Daily": 'day'}
+
+period_col, resolution_col = st.columns(2)
+with period_col:
+    period = st.selectbox("Period", list(PERIOD_OPTIONS), index=1, key="margin_period")
+with resolution_col:
+    resolution = st.selectbox("Resolution", list(RESOLUTION_OPTIONS), index=1, key="margin_resolution")
+
+# Database connection
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+if not DATABASE_URL:
+    st.error("Database connection not configured")
+    st.stop()
+
+def load_margins(granularity, days):
+    """Margin series, time-to-kickoff profile and league summary
+
+    Read from the collector's rollups (never the odds table), once per cycle.
+    """
+    return get_margin_rollups(current_cycle_id(), granularity, days)
+
+def margin_chart(frame, x, x_title, mode, categories=None):
+    """One line per league, margin in % on the y axis (categories: x axis order, if categorical)"""
+    # Imported on first chart so other pages don't pay for it
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for league, league_frame in frame.groupby('league'):
+        fig.add_trace(go.Scatter(
+            x=league_frame[x],
+            y=league_frame['margin_pct'],
+            mode=mode,
+            name=league,
+            customdata=league_frame[['snapshots', 'margin_min_pct', 'margin_max_pct']],
+            hovertemplate="%{y:.2f}% (min %{customdata[1]:.2f}%, max %{customdata[2]:.2f}%, "
+                          "%{customdata[0]} snapshots)"
+        ))
+    fig.update_layout(
+        height=400,
+        xaxis_title=x_title,
+        yaxis_title="Margin (%)",
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    if categories:
+        fig.update_xaxes(categoryorder='array', categoryarray=categories)
+    return fig
+
+with phase("margin.load"):
+    series, by_kickoff, by_league = load_margins(RESOLUTION_OPTIONS[resolution], PERIOD_OPTIONS[period])
+
+if by_league.empty:
+    st.info("No margin data for this period yet. The data collector builds it as odds come in.")
+else:
+    with phase("margin.render"):
+        st.markdown("### Margin by league")
+        st.dataframe(
+            by_league.rename(columns={
+                'league': 'League',
+                'snapshots': 'Snapshots',
+                'margin_pct': 'Mean margin (%)',
+                'margin_std_pp': 'Std dev (pp)',
+                'margin_min_pct': 'Min (%)',
+                'margin_max_pct': 'Max (%)'
+            }).round(2),
+            hide_index=True,
+            use_container_width=True
+        )
+
+        st.markdown(f"### Margin over time ({resolution.lower()})")
+        st.plotly_chart(margin_chart(series, 'bucket', "Time (UTC)", 'lines'), use_container_width=True)
+
+        # Bands in kickoff order: furthest out first, in play last
+        st.markdown("### Margin by time to kickoff")
+        profile = by_kickoff.sort_values('hours_before', ascending=False)
+        bands = [band_label(hours) for hours in KICKOFF_BANDS + (IN_PLAY,)]
+        st.plotly_chart(margin_chart(profile, 'band', "Time to kickoff", 'lines+markers', bands),
+                        use_container_width=True)
+
+profiler.record("margin.rerun", (time.perf_counter() - rerun_started) * 1000)
+
+# Query and phase timings (only with ADMIN_PANEL=1)
+render_query_panel()
+render_profile_panel()
@@ -0,0 +1,105 @@
+import streamlit as st
+import os
+import time
+from live_refresh import current_cycle_id
+from movement_heatmap import PERIODS, get_movement, heatmap_matrix, period_buckets
+from page_assets import use_stylesheets
+from query_stats import query_stats
+from diagnostics import render_profile_panel, render_query_panel
+from profiler import phase, profiler
+
+# Page configuration
+st.set_page_config(
+    page_title="Movement Heatmap - OddsEdge",
+    page_icon="🗺️",
+    layout="wide"
+)
+
+# Collect this rerun's queries for the admin panel
+query_stats.start_run()
+rerun_started = time.perf_counter()
+
+# Page styles (static/css), sent to the browser once per session
+use_stylesheets('movement_heatmap', 'navigation')
+
+# Hero Header Section
+st.markdown('<p class="main-header">🗺️ Movement Heatmap</p>', unsafe_allow_html=True)
+st.markdown('<p class="sub-header">Where pre-match prices are moving: no-vig probability change by league or fixture over time</p>', unsafe_allow_html=True)
+
+# Rows, period and what each cell shows
+ROW_OPTIONS = {"Leagues": 'league', "Fixtures": 'fixture'}
+METRIC_OPTIONS = {"Total movement (Σ Δpp)": 'total', "Largest single move (Δpp)": 'max'}
+
+# Fixtures shown at most, most movement first
+FIXTURE_LIMIT = 30
+
+rows_col, period_col, metric_col = st.columns(3)
+with rows_col:
+    rows_label = st.selectbox("Rows", list(ROW_OPTIONS), key="heatmap_rows")
+with period_col:
+    period = st.selectbox("Period", list(PERIODS), index=1, key="heatmap_period")
+with metric_col:
+    metric_label = st.selectbox("Cell value", list(METRIC_OPTIONS), key="heatmap_metric")
+
+# Database connection
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+if not DATABASE_URL:
+    st.error("Database connection not configured")
+    st.stop()
+
+def load_heatmap(period):
+    """Movement per league and per fixture, from one aggregation query per collection cycle"""
+    return get_movement(current_cycle_id(), period)
+
+def heatmap_chart(matrix, metric_label):
+    """Rows × time buckets, colored by movement"""
+    # Imported on first chart so other pages don't pay for it
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(),
+        x=matrix.columns,
+        y=matrix.index,
+        colorscale='YlOrRd',
+        zmin=0,
+        colorbar=dict(title="Δpp"),
+        hovertemplate="%{y}<br>%{x|%d %b %H:%M} UTC<br>%{z:.1f}pp<extra></extra>"
+    ))
+    fig.update_layout(
+        height=max(300, 28 * len(matrix) + 120),
+        xaxis_title="Time (UTC)",
+        yaxis=dict(autorange='reversed'),
+        title=metric_label,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig
+
+with phase("heatmap.load"):
+    by_league, by_fixture = load_heatmap(period)
+
+rows = ROW_OPTIONS[rows_label]
+frame = by_league if rows == 'league' else by_fixture
+if rows == 'fixture' and not frame.empty:
+    leagues = ["All Leagues"] + sorted(frame['league'].unique())
+    league = st.selectbox("League", leagues, key="heatmap_league")
+    if league != "All Leagues":
+        frame = frame[frame['league'] == league]
+
+if frame.empty:
+    st.info("No pre-match movement in this period yet. The data collector adds it as odds come in.")
+else:
+    with phase("heatmap.render"):
+        matrix = heatmap_matrix(frame, rows, METRIC_OPTIONS[metric_label], period_buckets(period),
+                                FIXTURE_LIMIT if rows == 'fixture' else None)
+        if rows == 'fixture':
+            st.caption(f"{len(matrix)} fixtures, most movement first")
+        st.plotly_chart(heatmap_chart(matrix, metric_label), use_container_width=True)
+
+profiler.record("heatmap.rerun", (time.perf_counter() - rerun_started) * 1000)
+
+# Query and phase timings (only with ADMIN_PANEL=1)
+render_query_panel()
+render_profile_panel()
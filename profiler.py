@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Durations kept per phase for percentiles (older samples drop off)
+SAMPLES_PER_PHASE = 1000
+
+# Set PROFILE_DUMP_PATH to also write the summary as JSON, at most this often (seconds)
+PROFILE_DUMP_PATH = os.environ.get('PROFILE_DUMP_PATH')
+DUMP_INTERVAL_SECONDS = 60
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PhaseProfiler:
+    """Process-wide timings of named phases of a script run, across all sessions
+
+    Each phase keeps its last SAMPLES_PER_PHASE durations, so p50/p95 reflect
+    recent reruns while the per-phase cost stays a perf_counter call and a
+    deque append.
+    """
+
+    def __init__(self, dump_path=PROFILE_DUMP_PATH):
+        self.dump_path = dump_path
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+        self._last_dump = time.monotonic()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, elapsed_ms):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=SAMPLES_PER_PHASE)
+            samples.append(elapsed_ms)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+        if self.dump_path and time.monotonic() - self._last_dump >= DUMP_INTERVAL_SECONDS:
+            self._last_dump = time.monotonic()
+            try:
+                self.dump(self.dump_path)
+            except OSError as e:
+                print(f"Profile dump error: {e}")
+
+    def summary(self):
+        """{phase: {count, p50_ms, p95_ms, max_ms, total_ms}} over the kept samples, slowest p95 first"""
+        with self._lock:
+            snapshot = {name: (sorted(samples), self._counts[name]) for name, samples in self._samples.items()}
+
+        phases = {}
+        for name, (values, count) in sorted(snapshot.items(), key=lambda x: percentile(x[1][0], 95), reverse=True):
+            phases[name] = {
+                'count': count,
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'max_ms': round(values[-1], 2),
+                'total_ms': round(sum(values), 2)
+            }
+        return phases
+
+    def to_json(self):
+        return json.dumps({'generated_at': time.time(), 'phases': self.summary()}, indent=2)
+
+    def dump(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_json())
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+profiler = PhaseProfiler()
+phase = profiler.phase
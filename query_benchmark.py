@@ -0,0 +1,218 @@
+"""
+Benchmark of the dashboard's data paths at several data scales
+
+Usage:
+    python query_benchmark.py [--scales small,medium] [--repeat 5] [--output FILE] [--compare FILE]
+
+For every scale, a scratch schema (BENCHMARK_SCHEMA, default odds_benchmark)
+is filled by synthetic_data.py and then each case is timed --repeat times:
+
+    state.initial_sync     cold OddsState load (first rerun after a restart)
+    snapshot.build         per-cycle precompute of openings and movers
+    snapshot.publish       encode and store the snapshot row
+    load_latest_odds       read the snapshot and list the latest odds
+    load_odds_history      24h chart history, every fixture
+    get_opening_odds       opening odds for every fixture ("6h" window)
+    get_biggest_movers     top 10 for every window (Biggest Movers page)
+    collector.save_odds    insert one collection cycle through data_collector.save_odds
+    state.incremental_sync merge that cycle into a warm OddsState
+
+The live tables are never touched. The report is written as JSON named after
+the current commit, so two runs can be diffed with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+
+import synthetic_data
+from dashboard_snapshot import DashboardSnapshot, TIME_WINDOWS, build_snapshot, load_latest_snapshot, publish_snapshot
+from data_collector import save_odds
+from odds_state import OddsState
+from profiler import percentile
+
+SCALES = {
+    # leagues, fixtures per league, snapshots per fixture
+    'small': (3, 10, 48),
+    'medium': (5, 40, 96),
+    'large': (5, 100, 288),
+}
+
+BENCHMARK_SCHEMA = os.environ.get('BENCHMARK_SCHEMA', 'odds_benchmark')
+
+RESULTS_DIR = 'benchmark_results'
+
+
+def current_commit():
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True)
+    return result.stdout.strip() or 'unknown'
+
+
+def timed(fn, repeat):
+    """Run fn repeat times; returns (durations in ms, last result)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations, result
+
+
+def summarize(durations, calls=1):
+    values = sorted(durations)
+    return {
+        'median_ms': round(statistics.median(values), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'min_ms': round(values[0], 3),
+        'calls': calls
+    }
+
+
+def run_scale(leagues, fixtures_per_league, snapshots, repeat, seed):
+    """Load one scale into the scratch schema and time every case against it"""
+    synthetic_data.reset_schema(BENCHMARK_SCHEMA)
+    synthetic_data.use_schema(BENCHMARK_SCHEMA)
+    fixtures, rows = synthetic_data.generate(leagues, fixtures_per_league, snapshots, seed)
+    conn = psycopg2.connect(synthetic_data.DATABASE_URL)
+    cursor = conn.cursor()
+    synthetic_data.insert_rows(cursor, rows)
+    cursor.execute("ANALYZE odds")
+    conn.commit()
+    conn.close()
+
+    cases = {}
+
+    durations, state = timed(synced_state, repeat)
+    cases['state.initial_sync'] = summarize(durations)
+
+    durations, snapshot_data = timed(lambda: build_snapshot(state, state.watermark), repeat)
+    cases['snapshot.build'] = summarize(durations)
+
+    durations, _ = timed(lambda: publish_snapshot(state), repeat)
+    cases['snapshot.publish'] = summarize(durations)
+
+    durations, latest = timed(lambda: DashboardSnapshot(load_latest_snapshot()).latest_odds(), repeat)
+    cases['load_latest_odds'] = summarize(durations)
+
+    snapshot = DashboardSnapshot(snapshot_data)
+    keys = [(fixture['league'], fixture['home_team'], fixture['away_team']) for fixture in fixtures]
+    since = datetime.now() - timedelta(hours=24)
+
+    durations, _ = timed(lambda: [state.history(*key, since) for key in keys], repeat)
+    cases['load_odds_history'] = summarize(durations, calls=len(keys))
+
+    durations, _ = timed(lambda: [snapshot.opening_odds(*key, synthetic_data.BOOKMAKER, "6h") for key in keys], repeat)
+    cases['get_opening_odds'] = summarize(durations, calls=len(keys))
+
+    durations, _ = timed(lambda: [snapshot.top_movers(window) for window in TIME_WINDOWS], repeat)
+    cases['get_biggest_movers'] = summarize(durations, calls=len(TIME_WINDOWS))
+
+    # Each save/sync pair adds a cycle, so the incremental sync always has exactly one to merge
+    rng = random.Random(seed)
+    save_durations = []
+    sync_durations = []
+    for _ in range(repeat):
+        events = synthetic_data.api_events(rng, fixtures)
+        start = time.perf_counter()
+        for league, league_events in events.items():
+            save_odds(league_events, league)
+        save_durations.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        state.sync()
+        sync_durations.append((time.perf_counter() - start) * 1000)
+    cases['collector.save_odds'] = summarize(save_durations, calls=len(fixtures))
+    cases['state.incremental_sync'] = summarize(sync_durations)
+
+    return {
+        'leagues': leagues,
+        'fixtures_per_league': fixtures_per_league,
+        'snapshots': snapshots,
+        'rows': len(rows),
+        'latest_odds_rows': len(latest),
+        'cases': cases
+    }
+
+
+def synced_state():
+    state = OddsState()
+    state.sync()
+    return state
+
+
+def print_report(report, baseline=None):
+    for scale, result in report['scales'].items():
+        print(f"\n{scale}: {result['leagues']} leagues × {result['fixtures_per_league']} fixtures × "
+              f"{result['snapshots']} snapshots = {result['rows']} rows")
+        header = f"  {'case':<24}{'median ms':>12}{'p95 ms':>10}{'calls':>7}"
+        base_cases = (baseline or {}).get('scales', {}).get(scale, {}).get('cases', {})
+        if base_cases:
+            header += f"{'vs ' + baseline['commit']:>16}"
+        print(header)
+        for case, stats in result['cases'].items():
+            line = f"  {case:<24}{stats['median_ms']:>12.2f}{stats['p95_ms']:>10.2f}{stats['calls']:>7}"
+            base = base_cases.get(case)
+            if base and base['median_ms'] > 0:
+                line += f"{stats['median_ms'] / base['median_ms']:>15.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the dashboard's data paths on synthetic data")
+    parser.add_argument('--scales', default='small,medium', help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help=f"report path (default {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument('--compare', help="earlier report to show ratios against")
+    args = parser.parse_args()
+
+    if not synthetic_data.DATABASE_URL:
+        print("ERROR: DATABASE_URL not found in environment variables")
+        return 1
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    report = {
+        'commit': current_commit(),
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'scales': {}
+    }
+    try:
+        for scale in scales:
+            report['scales'][scale] = run_scale(*SCALES[scale], args.repeat, args.seed)
+    finally:
+        conn = psycopg2.connect(synthetic_data.DATABASE_URL)
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA IF EXISTS "{BENCHMARK_SCHEMA}" CASCADE')
+        conn.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Query-plan checks for the hot SQL on the odds table
+
+Usage:
+    python query_plans.py [--verbose]
+
+Loads a sizeable synthetic dataset (PLAN_DATASET: weeks of finished matches
+plus the coming week) into a scratch schema, runs EXPLAIN (ANALYZE, BUFFERS)
+on every query in HOT_QUERIES and fails when a plan scans odds sequentially
+or touches more shared buffers than the query's budget. The scratch schema
+is dropped afterwards; the live tables are never touched.
+
+Budgets are for PLAN_DATASET, with headroom over what the current indexes
+need. A new hot query gets an entry here, with its SQL imported from the
+module that runs it so the check can't drift from the code.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import psycopg2
+
+import synthetic_data
+from closing_lines import BACKFILL_PERIOD, BACKFILL_QUERY
+from margin_rollups import FOLD_QUERY
+from movement_heatmap import HEATMAP_QUERY, heatmap_params
+from odds_state import INITIAL_LOAD_QUERY, LATEST_CYCLE_QUERY, NEW_ROWS_QUERY
+from team_search import NEW_FIXTURES_QUERY
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+PLAN_SCHEMA = os.environ.get('PLAN_CHECK_SCHEMA', 'odds_plan_check')
+
+# 5 leagues × 300 fixtures × 96 snapshots = 144k rows, about 1 in 8 fixtures upcoming
+PLAN_DATASET = {'leagues': 5, 'fixtures_per_league': 300, 'snapshots': 96, 'days_back': 56}
+
+# Rows behind the watermark for incremental queries (a bit more than one cycle)
+NEW_ROWS_BEHIND = 1500
+
+# name -> sql, params (given the table's max id) and shared-buffer budget
+# (statements that write are rolled back)
+HOT_QUERIES = {
+    'odds_state.latest_cycle_id': {
+        'sql': LATEST_CYCLE_QUERY,
+        'params': None,
+        'max_buffers': 10
+    },
+    'odds_state.new_rows': {
+        'sql': NEW_ROWS_QUERY,
+        'params': lambda max_id: (max_id - NEW_ROWS_BEHIND,),
+        'max_buffers': 100
+    },
+    'team_index.new_fixtures': {
+        'sql': NEW_FIXTURES_QUERY,
+        'params': lambda max_id: (max_id - NEW_ROWS_BEHIND,),
+        'max_buffers': 100
+    },
+    'closing_lines.backfill': {
+        'sql': BACKFILL_QUERY,
+        'params': lambda max_id: {'kickoff_from': datetime.utcnow() - BACKFILL_PERIOD, 'kickoff_to': datetime.utcnow(),
+                                  'source': 'last_snapshot'},
+        'max_buffers': 2000
+    },
+    # Reads the new rows by id; most buffers go to the upserts, a few per rollup row
+    'margin_rollups.fold': {
+        'sql': FOLD_QUERY,
+        'params': lambda max_id: {'after_id': max_id - NEW_ROWS_BEHIND, 'up_to_id': max_id},
+        'max_buffers': 1500
+    },
+    # Once per cycle per dashboard process: the last day's pre-match rows, by timestamp
+    'movement_heatmap.24h': {
+        'sql': HEATMAP_QUERY,
+        'params': lambda max_id: heatmap_params("24h"),
+        'max_buffers': 3000
+    },
+    # Once per process start: upcoming fixtures are spread all over the
+    # table, so this touches about one heap page per row
+    'odds_state.initial_load': {
+        'sql': INITIAL_LOAD_QUERY,
+        'params': None,
+        'max_buffers': 8500
+    },
+}
+
+
+def plan_nodes(node):
+    """Every node of an EXPLAIN (FORMAT JSON) plan tree, depth first"""
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def check_plan(cursor, name, max_id):
+    """EXPLAIN ANALYZE one hot query
+
+    Returns:
+        dict: buffers used, problems found (empty if fine) and the plan as text
+    """
+    query = HOT_QUERIES[name]
+    params = query['params'](max_id) if query['params'] else None
+
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query['sql']}", params)
+    plan = cursor.fetchone()[0][0]['Plan']
+    buffers = plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0)
+
+    problems = []
+    for node in plan_nodes(plan):
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == 'odds':
+            problems.append("sequential scan on odds")
+    if buffers > query['max_buffers']:
+        problems.append(f"{buffers} shared buffers, budget {query['max_buffers']}")
+
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query['sql']}", params)
+    return {
+        'buffers': buffers,
+        'problems': problems,
+        'plan': '\n'.join(row[0] for row in cursor.fetchall())
+    }
+
+
+def check_all(dsn=None, seed=0):
+    """Load PLAN_DATASET into the scratch schema and check every hot query
+
+    Returns:
+        dict: name -> check_plan result
+    """
+    dsn = dsn or DATABASE_URL
+    synthetic_data.reset_schema(PLAN_SCHEMA, dsn)
+    conn = psycopg2.connect(dsn)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'SET search_path TO "{PLAN_SCHEMA}"')
+        _, rows = synthetic_data.generate(seed=seed, **PLAN_DATASET)
+        synthetic_data.insert_rows(cursor, rows)
+        cursor.execute("ANALYZE odds")
+        conn.commit()
+
+        cursor.execute("SELECT MAX(id) FROM odds")
+        max_id = cursor.fetchone()[0]
+        results = {name: check_plan(cursor, name, max_id) for name in HOT_QUERIES}
+        conn.rollback()
+    finally:
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA IF EXISTS "{PLAN_SCHEMA}" CASCADE')
+        conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the plans of the hot queries on synthetic data")
+    parser.add_argument('--verbose', action='store_true', help="print every plan, not just failing ones")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args()
+
+    if not DATABASE_URL:
+        print("ERROR: DATABASE_URL not found in environment variables")
+        return 1
+
+    results = check_all()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            status = "FAIL" if result['problems'] else "ok"
+            budget = HOT_QUERIES[name]['max_buffers']
+            print(f"{status:<6}{name:<30}{result['buffers']:>7} / {budget} buffers"
+                  + (f"  ({'; '.join(result['problems'])})" if result['problems'] else ""))
+            if result['problems'] or args.verbose:
+                print('      ' + result['plan'].replace('\n', '\n      '))
+    return 1 if any(result['problems'] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
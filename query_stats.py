@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import psycopg2
+import psycopg2.extensions
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+# Queries slower than this are printed to the log (milliseconds)
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+
+# Queries kept per rerun; anything past this is only counted in the totals
+RUN_LOG_SIZE = 500
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Normalized query text: literals replaced by ?, whitespace collapsed
+
+    Queries that differ only in inlined constants share a fingerprint.
+    """
+    return _WHITESPACE.sub(' ', _LITERALS.sub('?', sql)).strip()
+
+def params_shape(params):
+    """Parameter types without the values, e.g. (int, str)"""
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(f"{key}:{type(value).__name__}" for key, value in sorted(params.items()))
+    return tuple(type(value).__name__ for value in params)
+
+
+class QueryStats:
+    """Process-wide totals per query fingerprint, plus a per-thread log of the current rerun
+
+    Streamlit runs each script execution on its own thread, so the per-thread
+    log holds exactly the queries of one rerun once start_run() has been
+    called at the top of the script.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._local = threading.local()
+
+    def record(self, sql, params, rows, elapsed_ms):
+        key = fingerprint(sql)
+        shape = params_shape(params)
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = {
+                    'fingerprint': key, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0
+                }
+            totals['calls'] += 1
+            totals['total_ms'] += elapsed_ms
+            totals['max_ms'] = max(totals['max_ms'], elapsed_ms)
+            totals['rows'] += max(rows, 0)
+            # Latest concrete statement, for EXPLAIN on demand
+            totals['sample'] = (sql, params)
+
+        run_log = getattr(self._local, 'queries', None)
+        if run_log is not None and len(run_log) < RUN_LOG_SIZE:
+            run_log.append({'fingerprint': key, 'params': shape, 'rows': rows, 'ms': elapsed_ms})
+
+        if elapsed_ms >= SLOW_QUERY_MS:
+            print(f"Slow query ({elapsed_ms:.0f} ms, {rows} rows, params {shape}): {key}")
+
+    def start_run(self):
+        """Start collecting this thread's queries (call at the top of a script run)"""
+        self._local.queries = []
+
+    def run_queries(self):
+        """Queries recorded on this thread since start_run(), in execution order"""
+        return list(getattr(self._local, 'queries', None) or [])
+
+    def top(self, limit=10, order_by='total_ms'):
+        """Fingerprints with the highest total (or max) time, as dicts without the sample"""
+        with self._lock:
+            rows = [{k: v for k, v in totals.items() if k != 'sample'} for totals in self._totals.values()]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        for row in rows:
+            row['avg_ms'] = row['total_ms'] / row['calls']
+        return rows[:limit]
+
+    def sample(self, key):
+        with self._lock:
+            totals = self._totals.get(key)
+            return totals['sample'] if totals else None
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+
+query_stats = QueryStats()
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that reports every execute() to query_stats"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            sql = query if isinstance(query, str) else str(query)
+            query_stats.record(sql, vars, self.rowcount, elapsed_ms)
+
+
+class TimedConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', TimedCursor)
+        return super().cursor(*args, **kwargs)
+
+
+def connect(dsn=None):
+    """psycopg2.connect whose cursors are timed (see query_stats)"""
+    return psycopg2.connect(dsn or DATABASE_URL, connection_factory=TimedConnection)
+
+
+def explain(key, analyze=False):
+    """EXPLAIN the latest statement recorded for a fingerprint
+
+    Only SELECT statements can be explained; with analyze=True the query is
+    actually run (EXPLAIN ANALYZE, BUFFERS).
+
+    Returns:
+        list of plan lines, or None if there is nothing to explain
+    """
+    sample = query_stats.sample(key)
+    if sample is None:
+        return None
+    sql, params = sample
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+
+    options = "(ANALYZE, BUFFERS)" if analyze else ""
+    # Plain connection: the EXPLAIN itself shouldn't show up in the stats
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {options} {sql}", params)
+            return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.rollback()
+        conn.close()
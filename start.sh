@@ -16,6 +16,10 @@ python init_db.py || echo "⚠️ Database initialization warning (may already e
 echo "🔄 Starting data collector in background..."
 nohup python data_collector.py > collector.log 2>&1 &
 
+# Start read-only JSON API in background (internal services)
+echo "🔌 Starting JSON API in background on port ${API_PORT:-8081}..."
+nohup python api_server.py > api.log 2>&1 &
+
 # Wait a moment for collector to start
 sleep 3
 
@@ -0,0 +1,112 @@
+"""
+Import-time benchmark for the Streamlit app (dashboard.py and pages/)
+
+Usage:
+    python startup_benchmark.py [--budget-ms 60] [--repeat 5] [--top 15]
+
+Collects the top-level imports of every app script and times them with
+`python -X importtime` in a fresh interpreter. Streamlit itself is imported
+first and excluded: the server has already loaded it before any session
+starts, so what's left is what the first script run pays for on a cold
+process (e.g. right after a redeploy).
+
+Exits with status 1 when the median app import time is over budget, so CI
+catches a heavy module creeping back into module scope.
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+APP_SCRIPTS = ['dashboard.py'] + sorted(glob.glob('pages/*.py'))
+
+# Median import time allowed for the app's own top-level imports (milliseconds)
+DEFAULT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', '60'))
+
+# Modules the server has loaded before a script runs
+PRELOADED = ['streamlit']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def script_imports(paths):
+    """Top-level modules imported by the given scripts, in first-seen order"""
+    modules = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                if name not in modules and name.split('.')[0] not in PRELOADED:
+                    modules.append(name)
+    return modules
+
+
+def measure(modules):
+    """One cold-interpreter run; returns {top-level module: cumulative microseconds}"""
+    code = '; '.join(f'import {name}' for name in PRELOADED + modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    preloaded_done = False
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # Only modules imported directly by the -c code (no nesting) are summed
+        if len(indent) > 1:
+            continue
+        if name in PRELOADED:
+            preloaded_done = True
+            continue
+        if preloaded_done:
+            timings[name] = cumulative
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the app's import time against a budget")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="allowed median import time")
+    parser.add_argument('--repeat', type=int, default=5, help="cold interpreter runs")
+    parser.add_argument('--top', type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    modules = script_imports(APP_SCRIPTS)
+    runs = [measure(modules) for _ in range(args.repeat)]
+    totals = sorted(sum(run.values()) / 1000 for run in runs)
+    median_ms = statistics.median(totals)
+
+    print(f"App imports:  {', '.join(modules)}")
+    print(f"Import time:  median {median_ms:.1f} ms, min {totals[0]:.1f} ms, max {totals[-1]:.1f} ms "
+          f"({args.repeat} runs, {', '.join(PRELOADED)} excluded)")
+    print(f"Budget:       {args.budget_ms:.0f} ms")
+    print()
+    print("Slowest (median cumulative ms):")
+    names = set().union(*runs)
+    per_module = {name: statistics.median(run.get(name, 0) for run in runs) / 1000 for name in names}
+    for name, ms in sorted(per_module.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f}  {name}")
+
+    if median_ms > args.budget_ms:
+        print(f"\nFAIL: app imports take {median_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        return 1
+    print("\nOK: within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
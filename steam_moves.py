@@ -0,0 +1,206 @@
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from odds_math import implied_prob
+from odds_state import KEEP_AFTER_KICKOFF
+from query_stats import connect
+
+# A "steam" move: implied probability moving at least this much within the window
+STEAM_WINDOW = timedelta(minutes=30)
+STEAM_MOVE_PP = 3.0
+
+# A streak: at least this many consecutive ticks moving the same way, adding up to at least STREAK_MIN_PP
+STREAK_TICKS = 3
+STREAK_MIN_PP = 1.0
+
+# Move events shown by the pages
+RECENT_EVENTS_HOURS = 6
+RECENT_EVENTS_LIMIT = 50
+
+OUTCOMES = (('Home', 5), ('Away', 6), ('Draw', 7))
+
+
+class OutcomeTracker:
+    """Rolling state of one outcome's implied probability at one bookmaker
+
+    The window keeps its minimum and maximum in monotonic deques, so each tick
+    costs amortized O(1) however many ticks the window holds.
+    """
+
+    __slots__ = ('window_min', 'window_max', 'last_time', 'last_prob', 'last_odds',
+                 'streak', 'streak_start_prob', 'streak_start_odds', 'streak_start_time')
+
+    def __init__(self):
+        # (timestamp, probability, odds), oldest first
+        self.window_min = deque()
+        self.window_max = deque()
+        self.last_time = None
+        self.last_prob = None
+        self.last_odds = None
+        self.streak = 0
+        self.streak_start_prob = None
+        self.streak_start_odds = None
+        self.streak_start_time = None
+
+    def update(self, timestamp, odds):
+        """Add a tick; returns a list of (kind, delta_pp, from_odds, started_at, ticks)"""
+        prob = implied_prob(odds)
+        if prob is None or (self.last_time is not None and timestamp <= self.last_time):
+            return []
+
+        detections = []
+        point = (timestamp, prob, odds)
+
+        # The level just before the window still counts: it held until the next tick
+        cutoff = timestamp - STEAM_WINDOW
+        while len(self.window_min) > 1 and self.window_min[1][0] <= cutoff:
+            self.window_min.popleft()
+        while len(self.window_max) > 1 and self.window_max[1][0] <= cutoff:
+            self.window_max.popleft()
+        while self.window_min and self.window_min[-1][1] >= prob:
+            self.window_min.pop()
+        while self.window_max and self.window_max[-1][1] <= prob:
+            self.window_max.pop()
+
+        low = self.window_min[0] if self.window_min else None
+        high = self.window_max[0] if self.window_max else None
+        if low is not None and (prob - low[1]) * 100 >= STEAM_MOVE_PP:
+            detections.append(('steam', (prob - low[1]) * 100, low[2], low[0], None))
+        elif high is not None and (high[1] - prob) * 100 >= STEAM_MOVE_PP:
+            detections.append(('steam', (prob - high[1]) * 100, high[2], high[0], None))
+
+        if detections:
+            # Start over from this tick, so one move is reported once
+            self.window_min.clear()
+            self.window_max.clear()
+        self.window_min.append(point)
+        self.window_max.append(point)
+
+        if self.last_prob is not None and prob != self.last_prob:
+            direction = 1 if prob > self.last_prob else -1
+            previous_direction = 0 if self.streak == 0 else (1 if self.last_prob > self.streak_start_prob else -1)
+            if direction != previous_direction:
+                self.streak = 0
+                self.streak_start_prob = self.last_prob
+                self.streak_start_odds = self.last_odds
+                self.streak_start_time = self.last_time
+            self.streak += 1
+            streak_pp = (prob - self.streak_start_prob) * 100
+            if self.streak >= STREAK_TICKS and abs(streak_pp) >= STREAK_MIN_PP:
+                detections.append(('streak', streak_pp, self.streak_start_odds, self.streak_start_time, self.streak))
+                self.streak = 0
+        elif self.last_prob is not None:
+            # An unchanged price breaks the streak
+            self.streak = 0
+
+        self.last_time = timestamp
+        self.last_prob = prob
+        self.last_odds = odds
+        return detections
+
+
+class SteamDetector:
+    """Flags rapid pre-match moves as snapshots arrive, with constant work per tick
+
+    Feed it the collector's new odds rows (see OddsState.add_listener); the
+    detections wait in pending_events until drained and saved.
+    """
+
+    def __init__(self):
+        # (league, home_team, away_team, bookmaker, outcome) -> OutcomeTracker
+        self._trackers = {}
+        # (league, home_team, away_team) -> commence_time, for pruning
+        self._kickoffs = {}
+        self.pending_events = []
+
+    def consume(self, rows, initial_load=False):
+        """Process rows in SNAPSHOT_COLUMNS order; the initial load only warms up state"""
+        for row_id, league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds, timestamp, commence_time, *_ in rows:
+            # In-play prices move for other reasons
+            if commence_time is None or timestamp >= commence_time:
+                continue
+            self._kickoffs[(league, home_team, away_team)] = commence_time
+            row = (row_id, league, home_team, away_team, bookmaker, home_odds, away_odds, draw_odds)
+            for outcome, index in OUTCOMES:
+                key = (league, home_team, away_team, bookmaker, outcome)
+                tracker = self._trackers.get(key)
+                if tracker is None:
+                    tracker = self._trackers[key] = OutcomeTracker()
+                for kind, delta_pp, from_odds, started_at, ticks in tracker.update(timestamp, row[index]):
+                    if initial_load:
+                        continue
+                    self.pending_events.append({
+                        'odds_id': row_id,
+                        'league': league,
+                        'home_team': home_team,
+                        'away_team': away_team,
+                        'bookmaker': bookmaker,
+                        'outcome': outcome,
+                        'kind': kind,
+                        'delta_pp': delta_pp,
+                        'from_odds': from_odds,
+                        'to_odds': row[index],
+                        'ticks': ticks,
+                        'started_at': started_at,
+                        'detected_at': timestamp,
+                        'commence_time': commence_time
+                    })
+        self._prune()
+
+    def _prune(self):
+        cutoff = datetime.now() - KEEP_AFTER_KICKOFF
+        finished = {fixture for fixture, commence_time in self._kickoffs.items() if commence_time < cutoff}
+        if finished:
+            self._trackers = {key: tracker for key, tracker in self._trackers.items() if key[:3] not in finished}
+            for fixture in finished:
+                del self._kickoffs[fixture]
+
+    def drain(self):
+        events, self.pending_events = self.pending_events, []
+        return events
+
+
+def save_move_events(cursor, events):
+    """Insert detections into move_events (a re-run over the same rows adds nothing)"""
+    for event in events:
+        cursor.execute("""
+            INSERT INTO move_events (odds_id, league, home_team, away_team, bookmaker, outcome, kind,
+                                     delta_pp, from_odds, to_odds, ticks, started_at, detected_at, commence_time)
+            VALUES (%(odds_id)s, %(league)s, %(home_team)s, %(away_team)s, %(bookmaker)s, %(outcome)s, %(kind)s,
+                    %(delta_pp)s, %(from_odds)s, %(to_odds)s, %(ticks)s, %(started_at)s, %(detected_at)s,
+                    %(commence_time)s)
+            ON CONFLICT (odds_id, outcome, kind) DO NOTHING
+        """, event)
+
+
+def load_recent_move_events():
+    """Pre-match move events detected in the last RECENT_EVENTS_HOURS, newest first"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT league, home_team, away_team, outcome, kind, delta_pp, from_odds, to_odds,
+               ticks, started_at, detected_at
+        FROM move_events
+        WHERE detected_at >= NOW() - %s * INTERVAL '1 hour'
+          AND commence_time > NOW()
+        ORDER BY detected_at DESC, id DESC
+        LIMIT %s
+    """, (RECENT_EVENTS_HOURS, RECENT_EVENTS_LIMIT))
+    columns = [column[0] for column in cursor.description]
+    events = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    conn.close()
+    return events
+
+
+_recent = None
+_recent_lock = threading.Lock()
+
+
+def get_recent_move_events(cycle_id):
+    """Recent move events, read at most once per collection cycle per process"""
+    global _recent
+    with _recent_lock:
+        if _recent is None or _recent[0] != cycle_id:
+            _recent = (cycle_id, load_recent_move_events())
+        return _recent[1]
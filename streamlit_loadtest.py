@@ -0,0 +1,421 @@
+"""
+Load test for the Streamlit app: N concurrent viewers against a real server
+
+Usage:
+    python streamlit_loadtest.py [--sessions 20] [--duration 60] [--think 2] [--ramp 10]
+                                 [--url http://localhost:8501 --server-pid PID]
+
+Without --url, `streamlit run dashboard.py` is started on a free port for the
+test (with this environment, so the same DATABASE_URL) and stopped afterwards.
+
+Every viewer speaks the browser's websocket protocol, so reruns go through the
+server's real session and script-runner machinery and queue the way they do
+in production. After a random think time each viewer does one of:
+
+    league         click a league button in the sidebar
+    search         search for a team seen on the page (or clear the search)
+    open_match     switch the Home/Draw/Away chart of one fixture
+    time_window    change the time window (on whichever page it is on)
+    biggest_movers visit the Biggest Movers page (the next action returns)
+
+Reported: rerun latency percentiles overall and per interaction (from sending
+the rerun to the script finishing), Postgres connections open at once and
+opened in total, and the server's memory per connected session.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import aiohttp
+import psycopg2
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from profiler import percentile
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+# Relative frequency of each interaction
+INTERACTIONS = {
+    'league': 3,
+    'search': 2,
+    'open_match': 4,
+    'time_window': 2,
+    'biggest_movers': 1,
+}
+
+WIDGET_TYPES = ('button', 'selectbox', 'radio', 'text_input', 'checkbox')
+# Widget ids end in the user key: $$WIDGET_ID-<md5>-<key>
+WIDGET_KEY = re.compile(r'^\$\$\w+-[0-9a-f]{32}-(.*)$', re.DOTALL)
+
+# How often the server's memory and Postgres connections are sampled (seconds)
+SAMPLE_INTERVAL_SECONDS = 0.5
+
+
+class Viewer:
+    """One browser tab: a websocket session plus the widget state the frontend would keep"""
+
+    def __init__(self, http, base_url, rng, timeout):
+        self.http = http
+        self.base_url = base_url
+        self.rng = rng
+        self.timeout = timeout
+        self.ws = None
+        self.pages = {}
+        self.main_page_hash = None
+        self.page_hash = None
+        self.widgets = {}
+        self.widget_states = {}
+        self.expanders = []
+        self.exceptions = 0
+        self._message_cache = {}
+        self._finished = asyncio.Event()
+        self._reader = None
+
+    async def connect(self):
+        ws_url = self.base_url.replace('http', 'ws', 1) + '/_stcore/stream'
+        self.ws = await self.http.ws_connect(ws_url, protocols=('streamlit',), max_msg_size=0)
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def _read(self):
+        async for message in self.ws:
+            if message.type != aiohttp.WSMsgType.BINARY:
+                continue
+            msg = ForwardMsg()
+            msg.ParseFromString(message.data)
+            if msg.ref_hash:
+                msg = await self._cached_message(msg.ref_hash, msg)
+            elif msg.hash:
+                self._message_cache[msg.hash] = message.data
+            self._handle(msg)
+
+    async def _cached_message(self, ref_hash, ref):
+        """Large messages the server has sent before come as a reference to its message cache"""
+        data = self._message_cache.get(ref_hash)
+        if data is None:
+            async with self.http.get(f'{self.base_url}/_stcore/message', params={'hash': ref_hash}) as response:
+                data = await response.read()
+            self._message_cache[ref_hash] = data
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        msg.metadata.CopyFrom(ref.metadata)
+        return msg
+
+    def _handle(self, msg):
+        kind = msg.WhichOneof('type')
+        if kind == 'new_session':
+            # Sent at the start of every script run
+            self.widgets = {}
+            self.expanders = []
+            self.page_hash = msg.new_session.page_script_hash
+            for page in msg.new_session.app_pages:
+                self.pages[page.page_name] = page.page_script_hash
+            self.main_page_hash = self.main_page_hash or msg.new_session.app_pages[0].page_script_hash
+        elif kind == 'delta':
+            delta = msg.delta
+            if delta.WhichOneof('type') == 'new_element':
+                element = delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type in WIDGET_TYPES:
+                    widget = getattr(element, element_type)
+                    match = WIDGET_KEY.match(widget.id)
+                    self.widgets[match.group(1) if match else widget.id] = (element_type, widget)
+                elif element_type == 'exception':
+                    self.exceptions += 1
+            elif delta.WhichOneof('type') == 'add_block' and delta.add_block.WhichOneof('type') == 'expandable':
+                self.expanders.append(delta.add_block.expandable.label)
+        elif kind == 'script_finished':
+            # st.rerun() ends a run early and starts another; only the last one counts
+            if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                self._finished.set()
+
+    async def rerun(self, page_hash=None, trigger=None):
+        """Send a rerun with the current widget state and wait for the script to finish
+
+        Returns:
+            float: seconds from sending the rerun to the script finishing
+        """
+        back_msg = BackMsg()
+        client_state = back_msg.rerun_script
+        client_state.page_script_hash = page_hash or self.page_hash or ''
+        client_state.widget_states.widgets.extend(self.widget_states.values())
+        if trigger is not None:
+            client_state.widget_states.widgets.add(id=trigger, trigger_value=True)
+
+        self._finished.clear()
+        start = time.perf_counter()
+        await self.ws.send_bytes(back_msg.SerializeToString())
+        await asyncio.wait_for(self._finished.wait(), self.timeout)
+        return time.perf_counter() - start
+
+    def _set_widget(self, widget, **value):
+        state = BackMsg().rerun_script.widget_states.widgets.add(id=widget.id, **value)
+        self.widget_states[widget.id] = state
+
+    def _widgets(self, element_type, match):
+        return [widget for key, (kind, widget) in self.widgets.items() if kind == element_type and match(key)]
+
+    def available_interactions(self):
+        if self.page_hash != self.main_page_hash:
+            # Biggest Movers: change its window, otherwise go back to the dashboard
+            return ['time_window', 'dashboard']
+        available = ['biggest_movers', 'search']
+        if self._widgets('button', lambda key: key.startswith('league_')):
+            available.append('league')
+        if self._widgets('radio', lambda key: key.endswith('_detail_tab')):
+            available.append('open_match')
+        if self._widgets('selectbox', lambda key: key == 'time_window_selector'):
+            available.append('time_window')
+        return available
+
+    async def interact(self, name):
+        if name == 'league':
+            button = self.rng.choice(self._widgets('button', lambda key: key.startswith('league_')))
+            return await self.rerun(trigger=button.id)
+
+        if name == 'search':
+            words = [word for label in self.expanders for word in label.split() if len(word) > 3 and word.isalpha()]
+            query = self.rng.choice(words)[:self.rng.randint(3, 6)] if words and self.rng.random() < 0.7 else ''
+            text_input = self._widgets('text_input', lambda key: key == 'match_search')[0]
+            self._set_widget(text_input, string_value=query)
+            return await self.rerun()
+
+        if name == 'open_match':
+            radio = self.rng.choice(self._widgets('radio', lambda key: key.endswith('_detail_tab')))
+            self._set_widget(radio, int_value=self.rng.randrange(len(radio.options)))
+            return await self.rerun()
+
+        if name == 'time_window':
+            selectbox = self._widgets('selectbox', lambda key: key.endswith('time_window_selector') or key.endswith('time_window'))[0]
+            self._set_widget(selectbox, int_value=self.rng.randrange(len(selectbox.options)))
+            return await self.rerun()
+
+        if name == 'biggest_movers':
+            page_hash = next(page_hash for page_name, page_hash in self.pages.items() if 'Biggest' in page_name)
+            return await self.rerun(page_hash=page_hash)
+
+        if name == 'dashboard':
+            return await self.rerun(page_hash=self.main_page_hash)
+
+        raise ValueError(f"Unknown interaction: {name}")
+
+
+async def viewer_loop(http, base_url, seed, start_delay, deadline, think, timeout, results):
+    rng = random.Random(seed)
+    await asyncio.sleep(start_delay)
+    viewer = Viewer(http, base_url, rng, timeout)
+    try:
+        await viewer.connect()
+        results['connected'] += 1
+        latency = await viewer.rerun()
+        results['latencies'].setdefault('initial_load', []).append(latency)
+
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(rng.expovariate(1 / think) if think > 0 else 0)
+            if time.perf_counter() >= deadline:
+                break
+            available = viewer.available_interactions()
+            name = rng.choices(available, [INTERACTIONS.get(option, 1) for option in available])[0]
+            try:
+                latency = await viewer.interact(name)
+            except asyncio.TimeoutError:
+                results['timeouts'] += 1
+                continue
+            results['latencies'].setdefault(name, []).append(latency)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        results['errors'].append(f"{type(e).__name__}: {e}")
+    finally:
+        results['exceptions'] += viewer.exceptions
+        await viewer.close()
+
+
+def server_rss_kb(pid):
+    """Resident memory of a process in kB (Linux /proc), None if unknown"""
+    if not pid:
+        return None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class DatabaseSampler:
+    """Postgres client connections open right now, and sessions opened so far (PG 14+)"""
+
+    def __init__(self, dsn):
+        self.conn = psycopg2.connect(dsn)
+        self.conn.autocommit = True
+
+    def open_connections(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT count(*) FROM pg_stat_activity
+                WHERE datname = current_database()
+                  AND backend_type = 'client backend'
+                  AND pid <> pg_backend_pid()
+            """)
+            return cursor.fetchone()[0]
+
+    def sessions_opened(self):
+        with self.conn.cursor() as cursor:
+            try:
+                cursor.execute("SELECT sessions FROM pg_stat_database WHERE datname = current_database()")
+            except psycopg2.errors.UndefinedColumn:
+                return None
+            return cursor.fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+async def sample_server(pid, sampler, stop, samples):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        rss = server_rss_kb(pid)
+        if rss is not None:
+            samples['rss_kb'].append(rss)
+        if sampler is not None:
+            samples['db_connections'].append(await loop.run_in_executor(None, sampler.open_connections))
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(base_url, server_pid, sessions, duration, think, ramp, timeout, seed):
+    sampler = DatabaseSampler(DATABASE_URL) if DATABASE_URL else None
+    results = {'latencies': {}, 'connected': 0, 'timeouts': 0, 'exceptions': 0, 'errors': []}
+    samples = {'rss_kb': [], 'db_connections': []}
+
+    async with aiohttp.ClientSession() as http:
+        # One viewer first, so module-level caches are warm before the baseline
+        warmup = Viewer(http, base_url, random.Random(seed), timeout)
+        await warmup.connect()
+        await warmup.rerun()
+        await warmup.close()
+        await asyncio.sleep(1)
+        baseline_rss = server_rss_kb(server_pid)
+        sessions_before = sampler.sessions_opened() if sampler else None
+
+        stop = asyncio.Event()
+        sampler_task = asyncio.create_task(sample_server(server_pid, sampler, stop, samples))
+        start = time.perf_counter()
+        deadline = start + ramp + duration
+        await asyncio.gather(*[
+            viewer_loop(http, base_url, seed + i + 1, ramp * i / sessions, deadline, think, timeout, results)
+            for i in range(sessions)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await sampler_task
+
+    await asyncio.sleep(1)
+    final_rss = server_rss_kb(server_pid)
+    sessions_after = sampler.sessions_opened() if sampler else None
+    if sampler:
+        sampler.close()
+
+    all_latencies = sorted(latency for latencies in results['latencies'].values() for latency in latencies)
+    print(f"Viewers:      {results['connected']}/{sessions} connected, {elapsed:.1f}s "
+          f"(ramp {ramp:.0f}s, think {think:.1f}s mean)")
+    print(f"Reruns:       {len(all_latencies)} ({len(all_latencies) / elapsed:.1f}/sec), "
+          f"{results['timeouts']} timed out, {results['exceptions']} script exceptions")
+    print(f"Latency p50:  {percentile(all_latencies, 50) * 1000:.0f} ms")
+    print(f"Latency p95:  {percentile(all_latencies, 95) * 1000:.0f} ms")
+    print(f"Latency p99:  {percentile(all_latencies, 99) * 1000:.0f} ms")
+    print()
+    print(f"  {'interaction':<16}{'reruns':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, latencies in sorted(results['latencies'].items()):
+        latencies.sort()
+        print(f"  {name:<16}{len(latencies):>8}{percentile(latencies, 50) * 1000:>10.0f}"
+              f"{percentile(latencies, 95) * 1000:>10.0f}{latencies[-1] * 1000:>10.0f}")
+    print()
+
+    if samples['db_connections']:
+        connections = samples['db_connections']
+        print(f"DB connections open:   peak {max(connections)}, mean {sum(connections) / len(connections):.1f}")
+    if sessions_before is not None and sessions_after is not None:
+        opened = sessions_after - sessions_before
+        per_rerun = f", {opened / len(all_latencies):.2f} per rerun" if all_latencies else ""
+        print(f"DB connections opened: {opened}{per_rerun}")
+    if baseline_rss is not None and samples['rss_kb']:
+        peak_rss = max(samples['rss_kb'])
+        print(f"Server memory:         {baseline_rss / 1024:.0f} MB idle, {peak_rss / 1024:.0f} MB peak, "
+              f"{final_rss / 1024:.0f} MB after disconnect")
+        print(f"Memory per session:    {(peak_rss - baseline_rss) / max(results['connected'], 1):.0f} kB")
+    for error in results['errors'][:5]:
+        print(f"Error: {error}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    """streamlit run dashboard.py in a subprocess; returns it once /_stcore/health answers"""
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'dashboard.py', '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}/_stcore/health'
+    for _ in range(100):
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            pass
+        if server.poll() is not None:
+            raise RuntimeError("Streamlit server exited during startup")
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Streamlit server didn't start within 20s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the OddsEdge Streamlit app")
+    parser.add_argument('--url', help="running app to test (default: start one)")
+    parser.add_argument('--server-pid', type=int, help="pid of the server at --url, for memory numbers")
+    parser.add_argument('--sessions', type=int, default=20, help="concurrent viewers")
+    parser.add_argument('--duration', type=float, default=60, help="seconds every viewer stays after the ramp")
+    parser.add_argument('--think', type=float, default=2, help="mean think time between interactions (s)")
+    parser.add_argument('--ramp', type=float, default=10, help="seconds over which viewers join")
+    parser.add_argument('--timeout', type=float, default=60, help="give up on a rerun after this long (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url, server_pid = args.url.rstrip('/'), args.server_pid
+    else:
+        port = free_port()
+        server = start_server(port)
+        base_url, server_pid = f'http://127.0.0.1:{port}', server.pid
+    try:
+        asyncio.run(run(base_url, server_pid, args.sessions, args.duration, args.think,
+                        args.ramp, args.timeout, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
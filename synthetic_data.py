@@ -0,0 +1,262 @@
+"""
+Synthetic odds history for benchmarks and local development
+
+Usage:
+    python synthetic_data.py [--leagues 5] [--fixtures 40] [--snapshots 96] [--days-back 0] [--seed 1]
+                             [--schema odds_synthetic]
+
+Fills the odds table with leagues × fixtures × snapshots rows shaped like the
+collector's: one Pinnacle 1X2 price per fixture per collection cycle, taken
+every COLLECTION_INTERVAL_SECONDS and ending now (or at kickoff for matches
+that already started). Kickoffs fall on the usual slots over the next week
+(and the past --days-back days, for a table with finished matches in it),
+weekends weighted heavier; prices follow a random walk of the home/away
+strength with an occasional jump, and carry a 2-3.5% margin.
+
+With --schema the rows go into that Postgres schema (created with the same
+tables as init_db.py) instead of the live tables.
+"""
+import argparse
+import csv
+import io
+import math
+import os
+import random
+import subprocess
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from odds_math import no_vig_probabilities
+from odds_state import COLLECTION_INTERVAL_SECONDS
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+# League names used by the collector first, then made-up ones
+LEAGUE_NAMES = ['EPL', 'Spain La Liga', 'Germany Bundesliga', 'Italy Serie A', 'France Ligue One']
+
+BOOKMAKER = 'pinnacle'
+
+# Kickoff times (UTC hour, minute) and how much likelier a weekend day is than a weekday
+KICKOFF_SLOTS = [(11, 30), (14, 0), (16, 30), (19, 0), (19, 45)]
+WEEKEND_WEIGHT = 3
+KICKOFF_DAYS = 7
+
+# Bookmaker margin (overround - 1)
+MARGIN_RANGE = (0.02, 0.035)
+
+# Random walk of the home-vs-away strength (log-odds) per collection cycle
+STEP_SIGMA = 0.02
+JUMP_PROBABILITY = 0.01
+JUMP_SIGMA = 0.25
+
+ODDS_COLUMNS = ('league', 'home_team', 'away_team', 'bookmaker',
+                'home_odds', 'away_odds', 'draw_odds', 'commence_time', 'timestamp',
+                'home_fair', 'away_fair', 'draw_fair', 'overround')
+
+
+def league_names(count):
+    return LEAGUE_NAMES[:count] + [f'Synthetic League {i + 1}' for i in range(len(LEAGUE_NAMES), count)]
+
+
+def kickoff_time(rng, now, days_back=0):
+    """A kickoff on one of the past days_back or next KICKOFF_DAYS days, weekends weighted heavier"""
+    days = list(range(-days_back, KICKOFF_DAYS))
+    weights = [WEEKEND_WEIGHT if (now + timedelta(days=day)).weekday() >= 5 else 1 for day in days]
+    day = rng.choices(days, weights)[0]
+    hour, minute = rng.choice(KICKOFF_SLOTS)
+    return (now + timedelta(days=day)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def generate_fixtures(rng, league, count, now, days_back=0):
+    """Fixtures for one league; each dict also carries the state of its price walk"""
+    fixtures = []
+    for i in range(count):
+        fixtures.append({
+            'league': league,
+            'home_team': f'{league} Club {2 * i + 1:03d}',
+            'away_team': f'{league} Club {2 * i + 2:03d}',
+            'commence_time': kickoff_time(rng, now, days_back),
+            # Home-vs-away strength in log-odds; home advantage included
+            'strength': rng.gauss(0.25, 0.7),
+            'margin': rng.uniform(*MARGIN_RANGE)
+        })
+    return fixtures
+
+
+def fixture_odds(fixture):
+    """Current (home, draw, away) decimal odds of a fixture"""
+    strength = fixture['strength']
+    # Draws are likeliest between evenly matched teams
+    draw = max(0.12, 0.29 - 0.05 * abs(strength))
+    home = (1 - draw) / (1 + math.exp(-strength))
+    away = 1 - draw - home
+    overround = 1 + fixture['margin']
+    return tuple(round(1 / (probability * overround), 3) for probability in (home, draw, away))
+
+
+def step(rng, fixture):
+    """Advance a fixture's price walk by one collection cycle"""
+    fixture['strength'] += rng.gauss(0, STEP_SIGMA)
+    if rng.random() < JUMP_PROBABILITY:
+        fixture['strength'] += rng.gauss(0, JUMP_SIGMA)
+
+
+def generate(leagues=5, fixtures_per_league=40, snapshots=96, seed=0, now=None, days_back=0):
+    """Fixtures and odds rows for leagues × fixtures_per_league × snapshots
+
+    Returns:
+        tuple: (fixtures, rows) with rows in ODDS_COLUMNS order, sorted by
+        timestamp the way the collector would have inserted them
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow().replace(microsecond=0)
+    interval = timedelta(seconds=COLLECTION_INTERVAL_SECONDS)
+
+    fixtures = []
+    rows = []
+    for league in league_names(leagues):
+        for fixture in generate_fixtures(rng, league, fixtures_per_league, now, days_back):
+            last_snapshot = min(now, fixture['commence_time'])
+            for k in range(snapshots):
+                if k:
+                    step(rng, fixture)
+                home_odds, draw_odds, away_odds = fixture_odds(fixture)
+                rows.append((fixture['league'], fixture['home_team'], fixture['away_team'], BOOKMAKER,
+                             home_odds, away_odds, draw_odds, fixture['commence_time'],
+                             last_snapshot - (snapshots - 1 - k) * interval))
+            fixtures.append(fixture)
+
+    # No-vig probabilities and overround, as the collector stores them
+    fair = no_vig_probabilities([row[4] for row in rows], [row[5] for row in rows], [row[6] for row in rows])
+    rows = [row + values for row, values in zip(rows, zip(*(column.tolist() for column in fair)))]
+
+    rows.sort(key=lambda row: row[8])
+    return fixtures, rows
+
+
+def api_events(rng, fixtures):
+    """Advance every fixture one cycle and return The Odds API responses per league
+
+    Returns:
+        dict: league name -> list of events, the input data_collector.save_odds expects
+    """
+    events = {}
+    for fixture in fixtures:
+        step(rng, fixture)
+        home_odds, draw_odds, away_odds = fixture_odds(fixture)
+        events.setdefault(fixture['league'], []).append({
+            'home_team': fixture['home_team'],
+            'away_team': fixture['away_team'],
+            'commence_time': fixture['commence_time'].isoformat() + 'Z',
+            'bookmakers': [{
+                'key': BOOKMAKER,
+                'markets': [{
+                    'key': 'h2h',
+                    'outcomes': [
+                        {'name': fixture['home_team'], 'price': home_odds},
+                        {'name': fixture['away_team'], 'price': away_odds},
+                        {'name': 'Draw', 'price': draw_odds}
+                    ]
+                }]
+            }]
+        })
+    return events
+
+
+def insert_rows(cursor, rows):
+    """Bulk-load odds rows with COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY odds ({', '.join(ODDS_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def reset_schema(schema, dsn=None):
+    """Drop and recreate a schema with the init_db.py tables in it
+
+    Connections opened afterwards only see it if PGOPTIONS sets the
+    search_path (see use_schema).
+    """
+    conn = psycopg2.connect(dsn or DATABASE_URL)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+    cursor.execute(f'CREATE SCHEMA "{schema}"')
+    conn.close()
+
+    env = dict(os.environ, PGOPTIONS=f'-c search_path={schema}')
+    if dsn:
+        env['DATABASE_URL'] = dsn
+    subprocess.run([sys.executable, 'init_db.py'], env=env, check=True, capture_output=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_schema(schema):
+    """Point every libpq connection this process opens from now on at a schema"""
+    os.environ['PGOPTIONS'] = f'-c search_path={schema}'
+
+
+@contextmanager
+def scratch_schema(schema, dsn=None):
+    """A cursor on a freshly reset schema, dropped again on exit
+
+    Connections the process opens meanwhile use the schema too (see
+    use_schema); the previous PGOPTIONS is put back afterwards. Nothing is
+    committed unless the caller commits.
+    """
+    dsn = dsn or DATABASE_URL
+    reset_schema(schema, dsn)
+    pgoptions = os.environ.get('PGOPTIONS')
+    use_schema(schema)
+    conn = psycopg2.connect(dsn)
+    try:
+        yield conn.cursor()
+    finally:
+        if pgoptions is None:
+            os.environ.pop('PGOPTIONS', None)
+        else:
+            os.environ['PGOPTIONS'] = pgoptions
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the odds table with synthetic data")
+    parser.add_argument('--leagues', type=int, default=5)
+    parser.add_argument('--fixtures', type=int, default=40, help="fixtures per league")
+    parser.add_argument('--snapshots', type=int, default=96, help="collection cycles per fixture")
+    parser.add_argument('--days-back', type=int, default=0, help="also spread kickoffs over this many past days")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--schema', help="load into this (recreated) schema instead of the live tables")
+    args = parser.parse_args()
+
+    if not DATABASE_URL:
+        print("ERROR: DATABASE_URL not found in environment variables")
+        return 1
+
+    if args.schema:
+        reset_schema(args.schema)
+        use_schema(args.schema)
+
+    fixtures, rows = generate(args.leagues, args.fixtures, args.snapshots, args.seed,
+                             days_back=args.days_back)
+    conn = psycopg2.connect(DATABASE_URL)
+    cursor = conn.cursor()
+    insert_rows(cursor, rows)
+    conn.commit()
+    conn.close()
+
+    print(f"Inserted {len(rows)} rows for {len(fixtures)} fixtures"
+          + (f" into schema {args.schema}" if args.schema else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
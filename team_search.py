@@ -0,0 +1,182 @@
+import re
+import threading
+import unicodedata
+
+from query_stats import connect
+
+# Letters NFKD doesn't decompose into a base letter plus accent
+SPECIAL_LETTERS = str.maketrans({'ß': 'ss', 'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ł': 'l', 'đ': 'd', 'ı': 'i'})
+
+# Fixtures first seen after the watermark (plan checked by query_plans.py)
+NEW_FIXTURES_QUERY = """
+SELECT league, home_team, away_team, MAX(id)
+FROM odds
+WHERE id > %s
+GROUP BY league, home_team, away_team
+"""
+
+# Common names for teams the API lists under their full (or local) name
+# alias -> team name as stored in the odds table
+TEAM_ALIASES = {
+    'man utd': 'Manchester United',
+    'man united': 'Manchester United',
+    'man city': 'Manchester City',
+    'spurs': 'Tottenham Hotspur',
+    'wolves': 'Wolverhampton Wanderers',
+    'forest': 'Nottingham Forest',
+    'villa': 'Aston Villa',
+    'atleti': 'Atlético Madrid',
+    'barca': 'Barcelona',
+    'betis': 'Real Betis',
+    'sociedad': 'Real Sociedad',
+    'bayern münchen': 'Bayern Munich',
+    'bayern munich': 'Bayern München',
+    'gladbach': 'Borussia Monchengladbach',
+    'bvb': 'Borussia Dortmund',
+    'leverkusen': 'Bayer Leverkusen',
+    'inter': 'Inter Milan',
+    'internazionale': 'Inter Milan',
+    'juve': 'Juventus',
+    'psg': 'Paris Saint Germain',
+}
+
+# Shortest query that is looked up through the trigram index
+NGRAM = 3
+
+
+def normalize_team_name(name):
+    """Lowercase, strip accents and punctuation: "Atlético Madrid" -> "atletico madrid" """
+    name = name.lower().translate(SPECIAL_LETTERS)
+    name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class TeamIndex:
+    """In-memory search index over every team name the collector has stored
+
+    Each team is indexed under its normalized name and any aliases, by
+    trigram (for substring queries) and by word prefix (for 1-2 character
+    queries), so a lookup touches only the candidate names instead of every
+    row. Refreshes are incremental: only rows above the id watermark are read.
+    """
+
+    def __init__(self, aliases=TEAM_ALIASES):
+        self.watermark = 0
+        self.cycle_id = None
+        # team name -> set of (league, home_team, away_team) across the full history
+        self.fixtures = {}
+        # normalized team name -> its normalized aliases (applied once that team is in the index)
+        self._aliases = {}
+        for alias, team in aliases.items():
+            self._aliases.setdefault(normalize_team_name(team), []).append(normalize_team_name(alias))
+        # normalized search text -> set of team names
+        self._texts = {}
+        self._ngrams = {}
+        self._prefixes = {}
+        self._lock = threading.Lock()
+        # One refresh at a time: the index is shared by every session
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self, cycle_id=None):
+        """Index teams from rows committed since the last refresh
+
+        Args:
+            cycle_id: latest known collection cycle id; nothing is read if it
+                matches the last refresh
+
+        Returns:
+            int: number of new fixtures indexed
+        """
+        with self._refresh_lock:
+            if cycle_id is not None and cycle_id == self.cycle_id:
+                return 0
+
+            conn = connect()
+            cursor = conn.cursor()
+            cursor.execute(NEW_FIXTURES_QUERY, (self.watermark,))
+            rows = cursor.fetchall()
+            conn.close()
+
+            new_fixtures = self.add_fixtures(row[:3] for row in rows)
+            self.watermark = max([self.watermark] + [row[3] for row in rows])
+            self.cycle_id = cycle_id
+            return new_fixtures
+
+    def add_fixtures(self, fixtures):
+        """Index (league, home_team, away_team) tuples; returns how many were new"""
+        new_fixtures = 0
+        with self._lock:
+            for league, home_team, away_team in fixtures:
+                for team in (home_team, away_team):
+                    if team not in self.fixtures:
+                        self.fixtures[team] = set()
+                        self._add_team(team)
+                    if (league, home_team, away_team) not in self.fixtures[team]:
+                        self.fixtures[team].add((league, home_team, away_team))
+                        new_fixtures += 1
+        return new_fixtures
+
+    def _add_team(self, team):
+        normalized = normalize_team_name(team)
+        texts = [normalized] + self._aliases.get(normalized, [])
+        for text in texts:
+            self._texts.setdefault(text, set()).add(team)
+            for gram in _ngrams(text):
+                self._ngrams.setdefault(gram, set()).add(text)
+            for word in text.split():
+                for length in range(1, NGRAM):
+                    self._prefixes.setdefault(word[:length], set()).add(text)
+
+    def search(self, query):
+        """Team names matching a free-text query
+
+        Every word of the query must appear in the team's name or one of its
+        aliases, ignoring case, accents and punctuation.
+
+        Returns:
+            set of team names (empty if the query has no letters or digits)
+        """
+        words = normalize_team_name(query).split()
+        if not words:
+            return set()
+
+        with self._lock:
+            matches = None
+            for word in words:
+                texts = self._candidate_texts(word)
+                teams = set()
+                for text in texts:
+                    teams |= self._texts[text]
+                matches = teams if matches is None else matches & teams
+                if not matches:
+                    break
+            return matches
+
+    def _candidate_texts(self, word):
+        if len(word) < NGRAM:
+            return self._prefixes.get(word, set())
+        grams = sorted(_ngrams(word), key=lambda gram: len(self._ngrams.get(gram, ())))
+        candidates = set(self._ngrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._ngrams.get(gram, set())
+        # Trigrams can all be present without the word being a substring
+        return {text for text in candidates if word in text}
+
+
+_team_index = None
+_team_index_lock = threading.Lock()
+
+
+def get_team_index():
+    """Process-wide TeamIndex shared by every session"""
+    global _team_index
+    with _team_index_lock:
+        if _team_index is None:
+            _team_index = TeamIndex()
+        return _team_index
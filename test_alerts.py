@@ -0,0 +1,153 @@
+"""
+Tests for the alert rules engine (the alerts table test needs DATABASE_URL and uses a scratch schema)
+"""
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+import synthetic_data
+from alerts import (AlertEngine, AlertRule, FileSink, deliver, load_last_fired, load_rules, make_sinks, parse_window,
+                    save_alerts)
+from odds_math import no_vig_probabilities
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+SCHEMA = 'odds_alerts_test'
+
+NOW = datetime.now().replace(microsecond=0)
+KICKOFF = NOW + timedelta(days=1)
+TICK = timedelta(minutes=15)
+
+
+def row(row_id, home_odds, timestamp, home_team='Arsenal', away_odds=4.0, draw_odds=3.5):
+    fair = [column[0] for column in no_vig_probabilities([home_odds], [away_odds], [draw_odds])]
+    return (row_id, 'EPL', home_team, 'Chelsea', 'pinnacle', home_odds, away_odds, draw_odds, timestamp, KICKOFF,
+            *fair)
+
+
+def ticks(prices, start=NOW - 10 * TICK, first_id=1, **kwargs):
+    return [row(first_id + i, price, start + i * TICK, **kwargs) for i, price in enumerate(prices)]
+
+
+def test_parse_window():
+    assert parse_window("15m") == timedelta(minutes=15)
+    assert parse_window("1h") == timedelta(hours=1)
+    assert parse_window("1d") == timedelta(days=1)
+    with pytest.raises(ValueError):
+        parse_window("1 week")
+
+
+def test_move_within_window():
+    engine = AlertEngine([AlertRule({'id': 'steam', 'kind': 'move', 'min_pp': 4, 'window': '1h', 'outcome': 'Home'})])
+    # 2.0 -> 1.8 is +5.6pp, but spread over 2.5h it never moves 4pp within an hour
+    engine.consume(ticks([round(2.0 - 0.02 * i, 2) for i in range(11)], start=NOW - 14 * TICK))
+    assert engine.drain() == []
+    # Then a drop to 1.7 makes it +5.1pp within the hour; the next tick is in the cooldown
+    engine.consume(ticks([1.7, 1.6], start=NOW - 3 * TICK, first_id=12))
+    alerts = engine.drain()
+    assert [alert['odds_id'] for alert in alerts] == [12]
+    assert alerts[0]['value'] > 4 and 'within 1h' in alerts[0]['message']
+
+
+def test_crosses_with_direction_and_cooldown():
+    rule = AlertRule({'id': 'evens', 'kind': 'crosses', 'price': 2.0, 'direction': 'below', 'team': 'Arsenal',
+                      'outcome': 'Home', 'cooldown_minutes': 60})
+    engine = AlertEngine([rule])
+    engine.consume(ticks([2.1, 1.95, 2.05, 1.98, 2.02, 2.02, 2.02, 1.9]))
+    fired = [alert['odds_id'] for alert in engine.drain()]
+    # Below at ids 2 and 4, but 4 is within the hour; above never counts; 8 is past the cooldown
+    assert fired == [2, 8]
+
+    # Other fixtures don't match the team filter
+    engine.consume(ticks([2.1, 1.9], first_id=20, home_team='Spurs'))
+    assert engine.drain() == []
+
+
+def test_fair_move_since_open_and_initial_load():
+    rule = AlertRule({'id': 'fair', 'kind': 'fair_move', 'min_pp': 3, 'direction': 'shorten'})
+    engine = AlertEngine([rule])
+    # History loaded at startup only warms up state (the open is still taken from it)
+    engine.consume(ticks([2.0, 1.95]), initial_load=True)
+    assert engine.drain() == []
+    engine.consume(ticks([1.75], start=NOW, first_id=3))
+    alerts = engine.drain()
+    assert [(alert['outcome'], alert['odds_id']) for alert in alerts] == [('Home', 3)]
+    assert 'since open' in alerts[0]['message']
+
+
+def test_fair_move_fires_once_per_crossing():
+    rule = {'id': 'fair', 'kind': 'fair_move', 'min_pp': 3, 'outcome': 'Home'}
+    prices = [2.0, 1.75, 1.74, 1.75, 1.73, 1.75, 1.75, 2.0, 1.75]
+    engine = AlertEngine([AlertRule(rule)])
+    engine.consume(ticks(prices))
+    # Still over 3pp long past the cooldown, but only a drop back below re-arms it
+    assert [alert['odds_id'] for alert in engine.drain()] == [2, 9]
+
+    # A restart replays the history and learns from the alerts table that 2 already fired
+    history = ticks(prices)
+    fired_key = ('fair', 'EPL', 'Arsenal', 'Chelsea', 'pinnacle', 'Home')
+    engine = AlertEngine([AlertRule(rule)], {fired_key: history[1][8]})
+    engine.consume(history[:6], initial_load=True)
+    engine.consume(history[6:])
+    assert [alert['odds_id'] for alert in engine.drain()] == [9]
+
+
+def test_rules_file_and_file_sink():
+    with tempfile.TemporaryDirectory() as directory:
+        assert load_rules(os.path.join(directory, 'missing.json')) == []
+
+        rules_path = os.path.join(directory, 'rules.json')
+        with open(rules_path, 'w') as f:
+            json.dump([{'id': 'a', 'kind': 'move', 'min_pp': 4}, {'id': 'a', 'kind': 'fair_move', 'min_pp': 3}], f)
+        with pytest.raises(ValueError):
+            load_rules(rules_path)
+        with pytest.raises(ValueError):
+            AlertRule({'id': 'b', 'kind': 'volume'})
+        with pytest.raises(ValueError):
+            make_sinks('db,email:me')
+
+        alerts_path = os.path.join(directory, 'alerts.jsonl')
+        sinks = make_sinks(f'file:{alerts_path}')
+        assert isinstance(sinks[0], FileSink)
+
+        class Broken:
+            name = 'broken'
+
+            def send(self, alerts):
+                raise OSError("down")
+
+        alert = {'rule_id': 'a', 'message': 'm', 'fired_at': NOW}
+        failures = deliver([alert], [Broken()] + sinks)
+        assert [name for name, _ in failures] == ['broken']
+        with open(alerts_path) as f:
+            assert json.loads(f.readline())['fired_at'] == str(NOW)
+
+
+def test_alerts_table_dedupes_reruns(scratch_cursor):
+    engine = AlertEngine([AlertRule({'id': 'steam', 'kind': 'move', 'min_pp': 4, 'window': '1h'})])
+    engine.consume(ticks([2.0, 1.7]))
+    alerts = engine.drain()
+    assert alerts
+    save_alerts(scratch_cursor, alerts)
+    save_alerts(scratch_cursor, alerts)
+    scratch_cursor.execute("SELECT COUNT(*) FROM alerts")
+    assert scratch_cursor.fetchone()[0] == len(alerts)
+    assert load_last_fired(scratch_cursor) == {
+        (alert['rule_id'], 'EPL', 'Arsenal', 'Chelsea', 'pinnacle', alert['outcome']): alert['fired_at']
+        for alert in alerts}
+
+
+if __name__ == "__main__":
+    print("Running alert tests...")
+    test_parse_window()
+    test_move_within_window()
+    test_crosses_with_direction_and_cooldown()
+    test_fair_move_since_open_and_initial_load()
+    test_fair_move_fires_once_per_crossing()
+    test_rules_file_and_file_sink()
+    if DATABASE_URL:
+        with synthetic_data.scratch_schema(SCHEMA, DATABASE_URL) as cursor:
+            test_alerts_table_dedupes_reruns(cursor)
+    print("[PASS] All alert tests passed")
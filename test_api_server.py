@@ -0,0 +1,155 @@
+"""
+Tests for the JSON API's caching, compression and validation (no database needed)
+"""
+import asyncio
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import api_server
+from api_server import GZIP_MIN_BYTES, accepts_gzip, cycle_json, etag_matches
+
+
+class FakeListener:
+    def __init__(self, cycle_id):
+        self.cycle_id = cycle_id
+        self.cycle_seen_at = None
+
+
+def make_app(cycle_id=5):
+    """The API's routes over a fixed cycle, plus /api/test serving `size` bytes of JSON"""
+    builds = []
+
+    def build(cycle_id, size):
+        builds.append(cycle_id)
+        return {'cycle_id': cycle_id, 'padding': 'x' * size}
+
+    async def handle_test(request):
+        return await cycle_json(request, build, int(request.query.get('size', '10')))
+
+    app = web.Application()
+    app['cycle_listener'] = FakeListener(cycle_id)
+    app['responses'] = {'cycle_id': None, 'bodies': {}}
+    app.router.add_get('/api/test', handle_test)
+    app.router.add_get('/api/history', api_server.handle_history)
+    app.router.add_get('/api/movers', api_server.handle_movers)
+    return app, builds
+
+
+def run(test, app):
+    async def main():
+        async with TestClient(TestServer(app)) as client:
+            await test(client)
+    asyncio.run(main())
+
+
+def test_etag_matches():
+    assert etag_matches('W/"5"', 'W/"5"')
+    assert etag_matches('"5"', 'W/"5"')
+    assert etag_matches('"4", W/"5"', 'W/"5"')
+    assert etag_matches('*', 'W/"5"')
+    assert not etag_matches('W/"4"', 'W/"5"')
+    assert not etag_matches(None, 'W/"5"')
+
+
+def test_accepts_gzip():
+    assert accepts_gzip('gzip')
+    assert accepts_gzip('gzip, deflate, br')
+    assert accepts_gzip('br;q=1.0, gzip;q=0.5')
+    assert accepts_gzip('*')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('gzip; q=0.0, deflate')
+    assert not accepts_gzip('*, gzip;q=0')
+    assert not accepts_gzip('*;q=0')
+    assert not accepts_gzip('identity')
+    assert not accepts_gzip(None)
+
+
+def test_not_modified_for_weak_strong_and_any():
+    app, builds = make_app()
+
+    async def test(client):
+        response = await client.get('/api/test')
+        assert response.status == 200 and response.headers['ETag'] == 'W/"5"'
+        for if_none_match in ('W/"5"', '"5"', '*'):
+            response = await client.get('/api/test', headers={'If-None-Match': if_none_match})
+            assert response.status == 304
+            assert response.headers['ETag'] == 'W/"5"'
+        response = await client.get('/api/test', headers={'If-None-Match': 'W/"4"'})
+        assert response.status == 200
+
+    run(test, app)
+    assert builds == [5]
+
+
+def test_new_cycle_clears_body_cache():
+    app, builds = make_app()
+
+    async def test(client):
+        first = await (await client.get('/api/test')).json()
+        await client.get('/api/test')
+        assert builds == [5]
+        # Another URL has its own entry
+        await client.get('/api/test?size=20')
+        assert builds == [5, 5]
+
+        app['cycle_listener'].cycle_id = 6
+        second = await (await client.get('/api/test')).json()
+        assert builds == [5, 5, 6]
+        assert (first['cycle_id'], second['cycle_id']) == (5, 6)
+        assert list(app['responses']['bodies']) == ['/api/test']
+
+    run(test, app)
+
+
+def test_gzip_needs_size_and_accept_encoding():
+    app, _ = make_app()
+    large = f'/api/test?size={GZIP_MIN_BYTES}'
+
+    async def test(client):
+        response = await client.get(large, headers={'Accept-Encoding': 'gzip'})
+        assert response.headers.get('Content-Encoding') == 'gzip'
+        assert len((await response.json())['padding']) == GZIP_MIN_BYTES
+
+        response = await client.get(large, skip_auto_headers=['Accept-Encoding'])
+        assert 'Content-Encoding' not in response.headers
+        assert len(await response.read()) >= GZIP_MIN_BYTES
+
+        response = await client.get(large, headers={'Accept-Encoding': 'gzip;q=0, deflate'})
+        assert 'Content-Encoding' not in response.headers
+
+        response = await client.get('/api/test?size=10', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['Vary'] == 'Accept-Encoding'
+
+    run(test, app)
+
+
+def test_bad_parameters():
+    app, _ = make_app()
+    fixture = 'league=EPL&home_team=Arsenal&away_team=Chelsea'
+
+    async def test(client):
+        for url in ('/api/movers?window=2h', '/api/movers?limit=ten', '/api/movers?limit=0',
+                    f'/api/history?{fixture}&hours=abc', f'/api/history?{fixture}&hours=0',
+                    '/api/history?league=EPL&home_team=Arsenal', '/api/history?home_team=Arsenal&away_team=Chelsea'):
+            response = await client.get(url)
+            assert response.status == 400, url
+            assert 'error' in await response.json()
+
+    with mock.patch.object(api_server, 'build_history') as build_history, \
+            mock.patch.object(api_server, 'build_movers') as build_movers:
+        run(test, app)
+    assert not build_history.called and not build_movers.called
+
+
+if __name__ == "__main__":
+    print("Running API server tests...")
+    test_etag_matches()
+    test_accepts_gzip()
+    test_not_modified_for_weak_strong_and_any()
+    test_new_cycle_clears_body_cache()
+    test_gzip_needs_size_and_accept_encoding()
+    test_bad_parameters()
+    print("[PASS] All API server tests passed")
@@ -0,0 +1,173 @@
+"""
+Tests for the backtesting engine (the database and Parquet tests need DATABASE_URL and use a scratch schema)
+"""
+import math
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_data
+from backtest import (BackFavourite, Book, FollowSteamAndHedge, Strategy, Tick, run_shard, settle_fixtures,
+                      shard_fixtures, summarize)
+from odds_math import no_vig_probabilities
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+SCHEMA = 'odds_backtest_test'
+
+NOW = datetime.now().replace(microsecond=0)
+KICKOFF = NOW - timedelta(hours=1)
+TICK = timedelta(minutes=15)
+
+
+def tick(row_id, home_odds, draw_odds, away_odds, timestamp, home_team='Arsenal', kickoff=KICKOFF):
+    home_fair, away_fair, draw_fair, overround = (float(column[0]) for column in
+                                                  no_vig_probabilities([home_odds], [away_odds], [draw_odds]))
+    return Tick(row_id, 'EPL', home_team, 'Chelsea', 'pinnacle', home_odds, away_odds, draw_odds, timestamp, kickoff,
+                home_fair, away_fair, draw_fair, overround)
+
+
+class ListSource:
+    """Ticks from memory, in the order given"""
+
+    def __init__(self, ticks):
+        self._ticks = ticks
+
+    def ticks(self, fixtures):
+        wanted = set(fixtures)
+        return (row for row in self._ticks if (row.league, row.home_team, row.away_team, row.commence_time) in wanted)
+
+
+def test_book_back_and_hedge():
+    book = Book(('EPL', 'Arsenal', 'Chelsea', KICKOFF))
+    book.tick = tick(1, 2.5, 3.4, 3.0, NOW)
+    book.back('Home', 10)
+    assert list(book.pnl) == [15.0, -10.0, -10.0]
+    assert book.back('Draw', 0) is None
+
+    book.tick = tick(2, 1.8, 3.8, 4.6, NOW + TICK)
+    hedges = book.hedge()
+    assert [bet['outcome'] for bet in hedges] == ['Draw', 'Away']
+    assert np.allclose(book.pnl, book.pnl[0]) and book.pnl[0] > 0
+    # Level already: nothing left to hedge
+    assert book.hedge() == []
+
+
+def test_shards_cover_every_fixture_and_balance():
+    counts = {('L', f'H{i}', f'A{i}', KICKOFF): 10 + i for i in range(20)}
+    shards = shard_fixtures(counts, 4)
+    assert sorted(fixture for shard in shards for fixture in shard) == sorted(counts)
+    loads = [sum(counts[fixture] for fixture in shard) for shard in shards]
+    assert max(loads) - min(loads) <= max(counts.values())
+    assert len(shard_fixtures(counts, 50)) == 20
+    assert shard_fixtures({}, 4) == []
+
+
+class Recorder(Strategy):
+    """Remembers the ticks it was given"""
+
+    seen = []
+
+    def on_tick(self, tick, book):
+        Recorder.seen.append(tick.id)
+
+
+def test_replay_skips_in_play_and_settles():
+    start = KICKOFF - 4 * TICK
+    ticks = [tick(i + 1, price, 3.4, 3.2, start + i * TICK) for i, price in enumerate([2.3, 2.2, 2.1, 2.0])]
+    ticks.append(tick(5, 1.5, 4.5, 6.0, KICKOFF + TICK))
+    fixture = ('EPL', 'Arsenal', 'Chelsea', KICKOFF)
+
+    Recorder.seen = []
+    run_shard(ListSource(ticks), [fixture], Recorder, {}, 'pinnacle')
+    assert Recorder.seen == [1, 2, 3, 4]
+
+    bets, fixture_rows, closing_rows = run_shard(ListSource(ticks), [fixture], BackFavourite, {'stake': 10},
+                                                 'pinnacle')
+    assert [(bet['outcome'], bet['odds']) for bet in bets] == [('Home', 2.3)]
+    # Closing line: the last pre-kickoff tick
+    assert closing_rows[0]['closing_home'] == 2.0
+
+    results = pd.DataFrame([fixture[:3] + ('Home',)], columns=['league', 'home_team', 'away_team', 'result'])
+    fixtures = settle_fixtures(pd.DataFrame(fixture_rows), pd.DataFrame(closing_rows), results)
+    assert math.isclose(fixtures['settled_pnl'][0], 13.0)
+    fair_home = ticks[3].home_fair
+    assert math.isclose(fixtures['expected_pnl'][0], 13.0 * fair_home - 10 * (1 - fair_home))
+
+
+def test_follow_steam_then_hedge():
+    start = KICKOFF - 10 * TICK
+    prices = [2.5, 2.4, 2.2, 2.1, 1.9, 1.85]
+    ticks = [tick(i + 1, price, 3.4, 3.0, start + i * TICK) for i, price in enumerate(prices)]
+    bets, fixture_rows, _ = run_shard(ListSource(ticks), [('EPL', 'Arsenal', 'Chelsea', KICKOFF)],
+                                      FollowSteamAndHedge, {'move_pp': 4, 'hedge_pct': 10}, 'pinnacle')
+    # 2.5 -> 2.2 is +5.5pp: back at 2.2; 2.2 / 1.1 = 2.0, so hedge at 1.9
+    assert [(bet['kind'], bet['odds_id']) for bet in bets] == [('back', 3), ('hedge', 5), ('hedge', 5)]
+    pnl = [fixture_rows[0][f'pnl_{outcome}'] for outcome in ('home', 'draw', 'away')]
+    assert np.allclose(pnl, pnl[0])
+
+
+def test_repeated_pairing_is_its_own_fixture():
+    first_leg = KICKOFF - timedelta(days=60)
+    ticks = [tick(1, 2.5, 3.4, 3.0, first_leg - 2 * TICK, kickoff=first_leg),
+             tick(2, 2.2, 3.4, 3.3, first_leg - TICK, kickoff=first_leg),
+             tick(3, 1.9, 3.6, 4.2, KICKOFF - 2 * TICK),
+             tick(4, 2.0, 3.5, 4.0, KICKOFF - TICK)]
+    matches = [('EPL', 'Arsenal', 'Chelsea', first_leg), ('EPL', 'Arsenal', 'Chelsea', KICKOFF)]
+    bets, fixture_rows, closing_rows = run_shard(ListSource(ticks), matches, BackFavourite, {'stake': 10},
+                                                 'pinnacle')
+    # The second meeting gets a fresh book, not the first one's bets
+    assert [(bet['odds'], bet['commence_time']) for bet in bets] == [(2.5, first_leg), (1.9, KICKOFF)]
+    assert [(row['commence_time'], row['closing_home']) for row in closing_rows] == [(first_leg, 2.2),
+                                                                                      (KICKOFF, 2.0)]
+
+    results = pd.DataFrame([('EPL', 'Arsenal', 'Chelsea', str(first_leg), 'Away'),
+                            ('EPL', 'Arsenal', 'Chelsea', str(KICKOFF), 'Home')],
+                           columns=['league', 'home_team', 'away_team', 'commence_time', 'result'])
+    fixtures = settle_fixtures(pd.DataFrame(fixture_rows), pd.DataFrame(closing_rows), results)
+    assert list(fixtures['result']) == ['Away', 'Home']
+    assert np.allclose(fixtures['settled_pnl'], [-10.0, 9.0])
+
+    # Only the shard's meeting is replayed
+    Recorder.seen = []
+    run_shard(ListSource(ticks), matches[1:], Recorder, {}, 'pinnacle')
+    assert Recorder.seen == [3, 4]
+
+
+def test_database_and_parquet_sources_agree_across_workers(scratch_cursor):
+    from backtest import export_parquet, run_backtest
+
+    _, rows = synthetic_data.generate(leagues=2, fixtures_per_league=10, snapshots=48, seed=4, days_back=4)
+    synthetic_data.insert_rows(scratch_cursor, rows)
+    # The workers read through connections of their own
+    scratch_cursor.connection.commit()
+
+    params = {'move_pp': 2}
+    single, _ = run_backtest(FollowSteamAndHedge, params, workers=1)
+    sharded, fixtures = run_backtest(FollowSteamAndHedge, params, workers=3)
+    assert len(single) and single.equals(sharded)
+    assert summarize(sharded, fixtures)['bets'] == len(sharded)
+
+    pytest.importorskip('pyarrow')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'odds.parquet')
+        assert export_parquet(path) == len(rows)
+        from_file, _ = run_backtest(FollowSteamAndHedge, params, source=path, workers=2)
+    pd.testing.assert_frame_equal(from_file.drop(columns='odds_id'), single.drop(columns='odds_id'),
+                                  check_dtype=False)
+
+
+if __name__ == "__main__":
+    print("Running backtest tests...")
+    test_book_back_and_hedge()
+    test_shards_cover_every_fixture_and_balance()
+    test_replay_skips_in_play_and_settles()
+    test_follow_steam_then_hedge()
+    test_repeated_pairing_is_its_own_fixture()
+    if DATABASE_URL:
+        with synthetic_data.scratch_schema(SCHEMA, DATABASE_URL) as cursor:
+            test_database_and_parquet_sources_agree_across_workers(cursor)
+    print("[PASS] All backtest tests passed")
@@ -0,0 +1,207 @@
+"""
+Tests for the closing-line schedule and CLV maths (the table test needs DATABASE_URL and uses a scratch schema)
+"""
+import math
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pandas as pd
+import psycopg2
+import pytest
+
+import data_collector
+import synthetic_data
+from closing_lines import ClosingLineSchedule, backfill_closing_lines, compute_clv, store_closing_lines
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+SCHEMA = 'odds_closing_lines_test'
+
+NOW = datetime(2024, 3, 16, 14, 50)
+ARSENAL = ('EPL', 'Arsenal', 'Chelsea')
+LIVERPOOL = ('EPL', 'Liverpool', 'Everton')
+SEVILLA = ('Spain La Liga', 'Sevilla', 'Getafe')
+
+
+def test_schedule():
+    kickoffs = {ARSENAL: NOW + timedelta(minutes=1), LIVERPOOL: NOW + timedelta(hours=2),
+                SEVILLA: NOW - timedelta(minutes=30)}
+    schedule = ClosingLineSchedule(lead=timedelta(minutes=2))
+
+    assert schedule.due(kickoffs, NOW) == {'EPL': [ARSENAL]}
+    assert schedule.next_capture_time(kickoffs, NOW) == NOW - timedelta(minutes=1)
+
+    schedule.mark_captured([ARSENAL], kickoffs, NOW)
+    assert schedule.due(kickoffs, NOW) == {}
+    assert schedule.next_capture_time(kickoffs, NOW) == NOW + timedelta(hours=2) - timedelta(minutes=2)
+
+    # The same pairing again (e.g. a cup tie) is a new match
+    rematch = {ARSENAL: NOW + timedelta(hours=20, minutes=1)}
+    assert schedule.due(rematch, NOW + timedelta(hours=20)) == {'EPL': [ARSENAL]}
+
+    later = NOW + timedelta(days=2)
+    schedule.mark_captured([], kickoffs, later)
+    assert schedule.captured == {}
+    assert schedule.next_capture_time(kickoffs, later) is None
+
+
+class FakeState:
+    def __init__(self, kickoffs):
+        self._kickoffs = kickoffs
+
+    def kickoffs(self):
+        return dict(self._kickoffs)
+
+
+def test_failed_capture_is_not_retried_in_a_loop():
+    """A database error during capture waits for the next cycle instead of refetching straight away"""
+    kickoff = datetime.utcnow() + timedelta(minutes=1)
+    state = FakeState({ARSENAL: kickoff})
+    schedule = ClosingLineSchedule(lead=timedelta(minutes=2))
+
+    fetches = []
+    clock = [0.0]
+
+    def save_odds(odds_data, league_name):
+        raise psycopg2.OperationalError("connection refused")
+
+    def sleep(seconds):
+        assert len(fetches) < 5, "capture retried in a loop"
+        clock[0] += seconds
+
+    with mock.patch.object(data_collector, 'fetch_odds', lambda league_key: fetches.append(league_key) or []), \
+            mock.patch.object(data_collector, 'save_odds', save_odds), \
+            mock.patch.object(data_collector.time, 'sleep', sleep), \
+            mock.patch.object(data_collector.time, 'monotonic', lambda: clock[0]):
+        data_collector.wait_for_next_cycle(state, schedule, 60)
+    assert fetches == ['soccer_epl']
+    # Left to backfill_closing_lines after kickoff
+    assert ARSENAL in schedule.captured
+    assert clock[0] == 60
+
+
+class FakeConnection:
+    closed = False
+
+    def cursor(self):
+        return None
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_capture_publishes_a_cycle():
+    """The capture's rows are published with the collector's volatility and announced"""
+    state = FakeState({ARSENAL: datetime.utcnow() + timedelta(minutes=1)})
+    schedule = ClosingLineSchedule(lead=timedelta(minutes=2))
+    volatility = object()
+    conn = FakeConnection()
+    with mock.patch.object(data_collector, 'fetch_odds', lambda league_key: []), \
+            mock.patch.object(data_collector, 'save_odds', lambda odds_data, league_name: [ARSENAL[1:]]), \
+            mock.patch.object(data_collector, 'get_db_connection', lambda: conn), \
+            mock.patch.object(data_collector, 'store_closing_lines') as store, \
+            mock.patch.object(data_collector, 'publish_snapshot') as publish, \
+            mock.patch.object(data_collector, 'notify_cycle_complete') as notify:
+        data_collector.capture_closing_lines(state, schedule, volatility)
+    store.assert_called_once()
+    publish.assert_called_once_with(state, volatility)
+    notify.assert_called_once_with({'EPL': [('Arsenal', 'Chelsea')]})
+    assert conn.closed
+
+    # A failed store still closes its connection
+    schedule = ClosingLineSchedule(lead=timedelta(minutes=2))
+    conn = FakeConnection()
+    with mock.patch.object(data_collector, 'fetch_odds', lambda league_key: []), \
+            mock.patch.object(data_collector, 'save_odds', lambda odds_data, league_name: []), \
+            mock.patch.object(data_collector, 'get_db_connection', lambda: conn), \
+            mock.patch.object(data_collector, 'store_closing_lines', side_effect=psycopg2.OperationalError), \
+            mock.patch.object(data_collector, 'publish_snapshot') as publish:
+        with pytest.raises(psycopg2.OperationalError):
+            data_collector.capture_closing_lines(state, schedule)
+    assert conn.closed and not publish.called
+
+
+def test_compute_clv():
+    closing = pd.DataFrame([
+        {'league': 'EPL', 'home_team': 'Arsenal', 'away_team': 'Chelsea',
+         'closing_home': 1.90, 'closing_draw': 3.60, 'closing_away': 4.20,
+         'commence_time': NOW, 'closing_source': 'kickoff'},
+    ])
+    entries = pd.DataFrame([
+        {'league': 'EPL', 'home_team': 'Arsenal', 'away_team': 'Chelsea', 'commence_time': NOW,
+         'outcome': 'Home', 'odds': 2.00},
+        {'league': 'EPL', 'home_team': 'Arsenal', 'away_team': 'Chelsea', 'commence_time': NOW,
+         'outcome': 'Away', 'odds': 4.00},
+        {'league': 'EPL', 'home_team': 'Liverpool', 'away_team': 'Everton', 'commence_time': NOW,
+         'outcome': 'Home', 'odds': 1.50},
+    ])
+    result = compute_clv(entries, closing)
+
+    home, away, missing = result.iloc[0], result.iloc[1], result.iloc[2]
+    assert home['closing_odds'] == 1.90
+    assert abs(home['clv_pct'] - (2.00 / 1.90 - 1) * 100) < 1e-9
+    assert abs(home['clv_pp'] - (1 / 1.90 - 1 / 2.00) * 100) < 1e-9
+    overround = 1 / 1.90 + 1 / 3.60 + 1 / 4.20
+    assert abs(home['fair_close_prob'] - (1 / 1.90) / overround) < 1e-9
+    assert home['ev_pct'] > 0
+
+    # Took a worse price than the close
+    assert away['clv_pct'] < 0 and away['ev_pct'] < 0
+
+    # No closing line: NaN, not an error
+    assert math.isnan(missing['closing_odds']) and math.isnan(missing['clv_pct'])
+
+
+def test_repeated_pairing_gets_its_own_closing_line(scratch_cursor):
+    # A table from before commence_time was part of the key; init_db.py migrates it
+    scratch_cursor.execute("""
+        ALTER TABLE closing_lines
+            DROP CONSTRAINT closing_lines_pkey,
+            ADD PRIMARY KEY (league, home_team, away_team, bookmaker)
+    """)
+    scratch_cursor.connection.commit()
+    # scratch_schema points PGOPTIONS at the schema for the subprocess too
+    subprocess.run([sys.executable, 'init_db.py'], check=True, capture_output=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    now = datetime.utcnow().replace(microsecond=0)
+    first, second = now - timedelta(hours=20), now - timedelta(hours=2)
+    rows = [(*ARSENAL, 'pinnacle', home_odds, 4.0, 3.5, kickoff, kickoff - timedelta(minutes=minutes),
+             None, None, None, None)
+            for kickoff, prices in ((first, (2.2, 2.1)), (second, (1.9, 1.8)))
+            for home_odds, minutes in zip(prices, (30, 10))]
+    synthetic_data.insert_rows(scratch_cursor, rows)
+
+    assert backfill_closing_lines(scratch_cursor, now) == 2
+    store_closing_lines(scratch_cursor, [ARSENAL + (second,)])
+    scratch_cursor.execute("""
+        SELECT league, home_team, away_team, commence_time, home_odds, draw_odds, away_odds, source
+        FROM closing_lines ORDER BY commence_time
+    """)
+    closing = pd.DataFrame(scratch_cursor.fetchall(),
+                           columns=['league', 'home_team', 'away_team', 'commence_time', 'closing_home',
+                                    'closing_draw', 'closing_away', 'closing_source'])
+    assert list(closing['closing_home'].round(2)) == [2.1, 1.8]
+    assert list(closing['closing_source']) == ['last_snapshot', 'kickoff']
+
+    # Each bet is measured against its own match's close
+    entries = pd.DataFrame([dict(zip(['league', 'home_team', 'away_team'], ARSENAL), commence_time=kickoff,
+                                 outcome='Home', odds=2.0) for kickoff in (first, second)])
+    assert list(compute_clv(entries, closing)['closing_odds'].round(2)) == [2.1, 1.8]
+
+
+if __name__ == "__main__":
+    print("Running closing line tests...")
+    test_schedule()
+    test_failed_capture_is_not_retried_in_a_loop()
+    test_capture_publishes_a_cycle()
+    test_compute_clv()
+    if DATABASE_URL:
+        with synthetic_data.scratch_schema(SCHEMA, DATABASE_URL) as cursor:
+            test_repeated_pairing_gets_its_own_closing_line(cursor)
+    print("[PASS] All closing line tests passed")
@@ -0,0 +1,72 @@
+"""
+Tests for the no-vig probabilities stored at ingest and the fair movers ranking (no database needed)
+"""
+import math
+from datetime import datetime, timedelta
+
+from dashboard_snapshot import DashboardSnapshot, build_snapshot
+from odds_math import biggest_fair_delta, no_vig_probabilities
+from odds_state import OddsState
+
+NOW = datetime.now().replace(microsecond=0)
+KICKOFF = NOW + timedelta(days=1)
+
+
+def row(row_id, home_team, away_team, home_odds, away_odds, draw_odds, timestamp):
+    home_fair, away_fair, draw_fair, overround = (column[0] for column in
+                                                  no_vig_probabilities([home_odds], [away_odds], [draw_odds]))
+    return (row_id, 'EPL', home_team, away_team, 'pinnacle', home_odds, away_odds, draw_odds, timestamp, KICKOFF,
+            home_fair, away_fair, draw_fair, overround)
+
+
+def test_no_vig_probabilities():
+    home_fair, away_fair, draw_fair, overround = no_vig_probabilities([2.0, 1.5], [4.0, 7.0], [3.5, 4.2])
+    assert abs(overround[0] - (1 / 2.0 + 1 / 4.0 + 1 / 3.5)) < 1e-12
+    for i in range(2):
+        assert abs(home_fair[i] + away_fair[i] + draw_fair[i] - 1) < 1e-12
+    assert abs(home_fair[0] - 0.5 / overround[0]) < 1e-12
+
+
+def test_missing_price_is_nan():
+    home_fair, away_fair, draw_fair, overround = no_vig_probabilities([2.0, 2.0], [4.0, None], [3.5, 1.0])
+    assert not math.isnan(overround[0])
+    assert math.isnan(overround[1]) and math.isnan(home_fair[1]) and math.isnan(draw_fair[1])
+
+
+def test_biggest_fair_delta():
+    outcome, delta_pp, opening, current = biggest_fair_delta((0.5, 0.3, 0.2), (0.45, 0.3, 0.25))
+    assert outcome in ('Home', 'Away') and abs(abs(delta_pp) - 5) < 1e-9
+    assert biggest_fair_delta((0.5, None, 0.2), (0.45, 0.3, 0.25)) is None
+
+
+def test_margin_change_is_not_a_fair_move():
+    state = OddsState()
+    state._merge([
+        # Margin cut from ~5% to ~2% with the same fair probabilities: every price lengthens
+        row(1, 'Arsenal', 'Chelsea', 1.90, 4.00, 3.40, NOW - timedelta(hours=2)),
+        row(2, 'Arsenal', 'Chelsea', 1.90 * 1.03, 4.00 * 1.03, 3.40 * 1.03, NOW - timedelta(minutes=5)),
+        # A real move towards the home side
+        row(3, 'Leeds', 'Everton', 2.50, 3.00, 3.30, NOW - timedelta(hours=2)),
+        row(4, 'Leeds', 'Everton', 2.30, 3.30, 3.30, NOW - timedelta(minutes=5)),
+    ])
+    snapshot = DashboardSnapshot(build_snapshot(state, 4))
+
+    fair = snapshot.top_movers("6h", fair=True)
+    assert fair[0]['home_team'] == 'Leeds'
+    margin_only = next(mover for mover in fair if mover['home_team'] == 'Arsenal')
+    assert abs(margin_only['delta_pp']) < 1e-6
+    assert 0 < fair[0]['opening_prob'] < 1 and fair[0]['opening_odds'] == 2.50
+
+    # Raw implied probabilities count the margin cut as a move on every outcome
+    price = snapshot.top_movers("6h")
+    arsenal = next(mover for mover in price if mover['home_team'] == 'Arsenal')
+    assert abs(arsenal['delta_pp']) > 1
+
+
+if __name__ == "__main__":
+    print("Running fair probability tests...")
+    test_no_vig_probabilities()
+    test_missing_price_is_nan()
+    test_biggest_fair_delta()
+    test_margin_change_is_not_a_fair_move()
+    print("[PASS] All fair probability tests passed")
@@ -0,0 +1,150 @@
+"""
+Tests for the bulk hedge calculator (no database needed)
+"""
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hedging import (POSITION_COLUMNS, fill_hedge_odds, hedge_positions, hedge_stakes, latest_prices, scenario_grid,
+                     solve_three_way, three_way_hedge)
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+def single_hedge(o1, s1, o2):
+    """The Hedge Calculator page's single-bet formulas"""
+    s2 = (s1 * o1) / o2
+    return s2, s1 * (o1 - 1) - s2, s2 * (o2 - 1) - s1
+
+
+def positions(rows):
+    return pd.DataFrame(rows, columns=POSITION_COLUMNS)
+
+
+def test_matches_single_bet_formula():
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        'odds': rng.uniform(1.2, 8, 500).round(2),
+        'stake': rng.uniform(1, 200, 500).round(2),
+        'hedge_odds': rng.uniform(1.2, 8, 500).round(2)
+    })
+    result = hedge_positions(frame)
+    for row in result.itertuples():
+        s2, profit_original, profit_hedge = single_hedge(row.odds, row.stake, row.hedge_odds)
+        assert math.isclose(row.hedge_stake, s2)
+        assert math.isclose(row.profit_if_original_wins, profit_original)
+        assert math.isclose(row.profit_if_hedge_wins, profit_hedge)
+        assert math.isclose(row.guaranteed_profit, min(profit_original, profit_hedge))
+    # Equal profit either way
+    assert np.allclose(result['profit_if_original_wins'], result['profit_if_hedge_wins'])
+
+
+def test_invalid_rows_are_nan():
+    frame = pd.DataFrame({'odds': [2.5, 1.0, 'x', 3.0], 'stake': [10, 10, 10, -5],
+                          'hedge_odds': [1.8, 2.0, 2.0, 2.0]})
+    result = hedge_positions(frame)
+    assert not math.isnan(result['guaranteed_profit'][0])
+    assert result['guaranteed_profit'][1:].isna().all()
+
+
+def test_fill_from_latest_prices_dutches_other_outcomes():
+    prices = latest_prices([
+        ('EPL', 'Arsenal', 'Chelsea', 'pinnacle', 2.0, 4.0, 3.5, NOW, NOW),
+    ])
+    frame = positions([
+        ('EPL', 'Arsenal', 'Chelsea', 'Away', 5.0, 10.0, None),
+        ('EPL', 'Arsenal', 'Chelsea', 'arsenal', 1.9, 10.0, None),
+        ('EPL', 'Arsenal', 'Chelsea', 'Draw', 3.6, 10.0, 1.5),
+        ('EPL', 'Spurs', 'Everton', 'Home', 2.2, 10.0, None),
+    ])
+    result = hedge_positions(fill_hedge_odds(frame, prices))
+
+    # Against Away: Home and Draw together
+    away = result.iloc[0]
+    assert away['hedge_source'] == 'latest'
+    assert math.isclose(away['hedge_odds'], 1 / (1 / 2.0 + 1 / 3.5))
+    assert math.isclose(away['hedge_stake_home'] + away['hedge_stake_draw'], away['hedge_stake'])
+    assert away['hedge_stake_away'] == 0
+    # Either hedge leg returns the same
+    assert math.isclose(away['hedge_stake_home'] * 2.0, away['hedge_stake_draw'] * 3.5)
+    assert math.isclose(away['pnl_home'], away['pnl_draw'])
+    assert math.isclose(away['pnl_away'], away['profit_if_original_wins'])
+
+    # Team names count as outcomes
+    assert result.iloc[1]['outcome'] == 'Home'
+    assert math.isclose(result.iloc[1]['hedge_odds'], 1 / (1 / 4.0 + 1 / 3.5))
+
+    # Given hedge odds are kept, unknown fixtures stay unhedged
+    assert result.iloc[2]['hedge_source'] == 'input' and result.iloc[2]['hedge_odds'] == 1.5
+    assert math.isnan(result.iloc[2]['hedge_split_home'])
+    assert result.iloc[3]['hedge_source'] is None
+    assert math.isnan(result.iloc[3]['guaranteed_profit'])
+
+
+def test_three_way_equalizes_all_outcomes():
+    prices = {'Home': 2.0, 'Draw': 3.5, 'Away': 4.0}
+    solution = three_way_hedge('Away', 5.0, 10.0, prices)
+    profits = [solution[name]['profit'] for name in ('Home', 'Draw', 'Away')]
+    assert np.allclose(profits, solution['guaranteed_profit'])
+    assert solution['Away']['stake'] == 10.0
+
+    # Same as the bulk hedge at the combined price, split over Home and Draw
+    frame = positions([('EPL', 'Arsenal', 'Chelsea', 'Away', 5.0, 10.0, None)])
+    filled = hedge_positions(fill_hedge_odds(frame, latest_prices([
+        ('EPL', 'Arsenal', 'Chelsea', 'pinnacle', 2.0, 4.0, 3.5, NOW, NOW)])))
+    assert math.isclose(filled['hedge_stake_home'][0], solution['Home']['stake'])
+    assert math.isclose(filled['hedge_stake_draw'][0], solution['Draw']['stake'])
+    assert math.isclose(filled['guaranteed_profit'][0], solution['guaranteed_profit'])
+
+
+def test_three_way_floor():
+    prices = {'Home': 2.0, 'Draw': 3.5, 'Away': 4.0}
+    solution = three_way_hedge('Away', 5.0, 10.0, prices, floor=0.0)
+    # The other outcomes break even, the position keeps the rest
+    assert abs(solution['Home']['profit']) < 1e-9 and abs(solution['Draw']['profit']) < 1e-9
+    assert solution['Away']['profit'] > three_way_hedge('Away', 5.0, 10.0, prices)['Away']['profit']
+    # Two prices together at 100% or more: no floor is reachable
+    assert math.isnan(three_way_hedge('Away', 5.0, 10.0, {'Home': 1.5, 'Draw': 2.5}, floor=0.0)['guaranteed_profit'])
+
+
+def test_scenario_grid_matches_pointwise_solves():
+    prices = {'Home': 2.2, 'Draw': 3.4, 'Away': 3.6}
+    shifts = np.linspace(-0.2, 0.2, 9)
+    others, grid = scenario_grid('Home', 2.5, 50.0, prices, shifts, floor=5.0)
+    assert others == ['Draw', 'Away'] and grid.shape == (9, 9)
+    for i, draw_odds in enumerate(prices['Draw'] * (1 + shifts)):
+        for j, away_odds in enumerate(prices['Away'] * (1 + shifts)):
+            expected = solve_three_way(2.5, 50.0, draw_odds, away_odds, 5.0)['guaranteed_profit']
+            assert np.allclose(grid.iloc[i, j], expected, equal_nan=True)
+
+
+def test_book_hedge_matches_single_position_solver():
+    prices = np.array([2.2, 3.4, 3.6])
+    # 20 on Draw at 4.0: profit 60 if Draw, -20 otherwise
+    pnl = np.array([-20.0, 60.0, -20.0])
+    for floor in (None, 0.0):
+        solved = solve_three_way(4.0, 20.0, prices[0], prices[2], floor)
+        stakes = hedge_stakes(pnl, prices, floor)
+        assert stakes[1] == 0
+        assert math.isclose(stakes[0], solved['stake_a']) and math.isclose(stakes[2], solved['stake_b'])
+
+    # A book on two outcomes ends up level too, and many books solve at once
+    pnl = np.array([15.0, -10.0, 5.0])
+    stakes = hedge_stakes(pnl, prices)
+    final = pnl + stakes * prices - stakes.sum()
+    assert np.allclose(final, final[0])
+    assert hedge_stakes(np.tile(pnl, (4, 1)), prices).shape == (4, 3)
+
+
+if __name__ == "__main__":
+    print("Running hedge tests...")
+    test_matches_single_bet_formula()
+    test_invalid_rows_are_nan()
+    test_fill_from_latest_prices_dutches_other_outcomes()
+    test_three_way_equalizes_all_outcomes()
+    test_three_way_floor()
+    test_scenario_grid_matches_pointwise_solves()
+    test_book_hedge_matches_single_position_solver()
+    print("[PASS] All hedge tests passed")
@@ -0,0 +1,67 @@
+"""
+Tests for the cycle watcher's fallback when Streamlit's session internals change (no database needed)
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+import live_refresh
+from live_refresh import CycleWatcher
+
+
+def make_watcher():
+    """A watcher without its background thread"""
+    with mock.patch.object(CycleWatcher, '_run', lambda self: None):
+        return CycleWatcher()
+
+
+class Session:
+    def __init__(self, page_script_hash='main'):
+        self._client_state = SimpleNamespace(page_script_hash=page_script_hash)
+        self.reruns = 0
+
+    def request_rerun(self, client_state):
+        self.reruns += 1
+
+
+def fake_runtime(sessions):
+    session_mgr = SimpleNamespace(get_active_session_info=lambda session_id: (
+        SimpleNamespace(session=sessions[session_id]) if session_id in sessions else None))
+    return SimpleNamespace(exists=lambda: True, instance=lambda: SimpleNamespace(_session_mgr=session_mgr))
+
+
+def test_reruns_subscribed_sessions():
+    sessions = {'a': Session(), 'b': Session(page_script_hash='other')}
+    watcher = make_watcher()
+    with mock.patch.object(live_refresh, 'Runtime', fake_runtime(sessions)):
+        assert watcher.check_server_reruns('a')
+        for session_id in ('a', 'b', 'gone'):
+            watcher.subscribe(session_id, 'main')
+        watcher._wake_sessions()
+    # b moved to another page; gone closed the tab
+    assert (sessions['a'].reruns, sessions['b'].reruns) == (1, 0)
+    assert set(watcher._subscribers) == {'a', 'b'}
+
+
+def test_missing_internals_turn_off_server_reruns():
+    watcher = make_watcher()
+    runtime = SimpleNamespace(exists=lambda: True, instance=lambda: SimpleNamespace())
+    with mock.patch.object(live_refresh, 'Runtime', runtime):
+        assert watcher.check_server_reruns('a') is False
+        watcher.subscribe('a', 'main')
+        watcher._wake_sessions()
+
+    # Internals that change after the check also turn reruns off instead of killing the thread
+    sessions = {'a': SimpleNamespace(_client_state=SimpleNamespace(page_script_hash='main'))}
+    watcher = make_watcher()
+    with mock.patch.object(live_refresh, 'Runtime', fake_runtime(sessions)):
+        watcher.server_reruns = True
+        watcher.subscribe('a', 'main')
+        watcher._wake_sessions()
+    assert watcher.server_reruns is False
+
+
+if __name__ == "__main__":
+    print("Running live refresh tests...")
+    test_reruns_subscribed_sessions()
+    test_missing_internals_turn_off_server_reruns()
+    print("[PASS] All live refresh tests passed")
@@ -0,0 +1,71 @@
+"""
+Tests for the margin rollups (the fold tests need DATABASE_URL and use a scratch schema)
+"""
+import os
+
+import pandas as pd
+
+import synthetic_data
+from margin_rollups import FOLD_QUERY, KICKOFF_BANDS, SUMMARY_COLUMNS, _summarize, band_label, update_margin_rollups
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+SCHEMA = 'odds_margin_test'
+
+
+def test_band_labels():
+    assert band_label(-1) == "In play"
+    assert band_label(0) == "0-1h"
+    assert band_label(6) == "6-12h"
+    assert band_label(72) == "72-168h"
+    assert band_label(168) == "7d+"
+    assert KICKOFF_BANDS == tuple(sorted(KICKOFF_BANDS, reverse=True))
+
+
+def test_summarize_matches_direct_statistics():
+    overrounds = [1.02, 1.025, 1.031, 1.027]
+    frame = pd.DataFrame([[len(overrounds), sum(overrounds), sum(o * o for o in overrounds),
+                           min(overrounds), max(overrounds)]], columns=SUMMARY_COLUMNS)
+    summary = _summarize(frame).iloc[0]
+    mean = sum(overrounds) / len(overrounds)
+    std = (sum((o - mean) ** 2 for o in overrounds) / len(overrounds)) ** 0.5
+    assert abs(summary['margin_pct'] - (mean - 1) * 100) < 1e-9
+    assert abs(summary['margin_std_pp'] - std * 100) < 1e-6
+    assert abs(summary['margin_min_pct'] - 2.0) < 1e-9 and abs(summary['margin_max_pct'] - 3.1) < 1e-9
+
+
+def rollups(cursor):
+    cursor.execute("""
+        SELECT granularity, bucket, league, hours_before, snapshots, round(overround_sum::numeric, 9),
+               round(overround_sq_sum::numeric, 9), overround_min, overround_max
+        FROM margin_rollups
+        ORDER BY 1, 2, 3, 4
+    """)
+    return cursor.fetchall()
+
+
+def test_incremental_folds_match_one_full_fold(scratch_cursor):
+    _, rows = synthetic_data.generate(leagues=2, fixtures_per_league=10, snapshots=40, seed=5, days_back=3)
+    synthetic_data.insert_rows(scratch_cursor, rows)
+
+    # Small batches, as if the rows had arrived over many cycles
+    while update_margin_rollups(scratch_cursor, batch_size=97):
+        pass
+    incremental = rollups(scratch_cursor)
+    assert update_margin_rollups(scratch_cursor) == 0
+
+    scratch_cursor.execute("DELETE FROM margin_rollups")
+    scratch_cursor.execute(FOLD_QUERY, {'after_id': 0, 'up_to_id': len(rows)})
+    assert rollups(scratch_cursor) == incremental
+
+    scratch_cursor.execute("SELECT SUM(snapshots) FROM margin_rollups WHERE granularity = 'day'")
+    assert scratch_cursor.fetchone()[0] == len(rows)
+
+
+if __name__ == "__main__":
+    print("Running margin rollup tests...")
+    test_band_labels()
+    test_summarize_matches_direct_statistics()
+    if DATABASE_URL:
+        with synthetic_data.scratch_schema(SCHEMA, DATABASE_URL) as cursor:
+            test_incremental_folds_match_one_full_fold(cursor)
+    print("[PASS] All margin rollup tests passed")
@@ -0,0 +1,97 @@
+"""
+Tests for the movement heatmap (the query test needs DATABASE_URL and uses a scratch schema)
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import synthetic_data
+from movement_heatmap import COLUMNS, HEATMAP_QUERY, heatmap_matrix, heatmap_params, period_buckets
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+SCHEMA = 'odds_heatmap_test'
+
+NOW = datetime(2026, 3, 14, 15, 40)
+
+
+def test_params_align_to_buckets():
+    params = heatmap_params("24h", NOW)
+    assert params['since'] == datetime(2026, 3, 13, 15, 0)
+    assert params['bucket_seconds'] == 3600
+    assert params['lookback_from'] < params['since']
+    buckets = period_buckets("6h", NOW)
+    assert buckets[0] == datetime(2026, 3, 14, 9, 30) and buckets[-1] == datetime(2026, 3, 14, 15, 30)
+    assert len(buckets) == 25
+
+
+def test_matrix_orders_rows_and_fills_quiet_buckets():
+    buckets = period_buckets("6h", NOW)
+    frame = pd.DataFrame([
+        ('EPL', buckets[0], 2.0, 1.5),
+        ('EPL', buckets[3], 1.0, 1.0),
+        ('Serie A', buckets[1], 5.0, 4.0),
+    ], columns=['league', 'bucket', 'total_pp', 'max_pp'])
+    matrix = heatmap_matrix(frame, 'league', 'total', buckets)
+    assert list(matrix.index) == ['Serie A', 'EPL']
+    assert matrix.shape == (2, len(buckets))
+    assert matrix.loc['EPL', buckets[3]] == 1.0 and matrix.loc['EPL', buckets[1]] == 0.0
+    assert list(heatmap_matrix(frame, 'league', 'max', limit=1).index) == ['Serie A']
+
+
+def expected_movement(rows, params):
+    """Per fixture and bucket, the same movement computed row by row"""
+    columns = synthetic_data.ODDS_COLUMNS
+    index = {name: columns.index(name) for name in columns}
+    fair_columns = [index['home_fair'], index['draw_fair'], index['away_fair']]
+    previous = {}
+    totals = defaultdict(float)
+    for row in sorted(rows, key=lambda row: row[index['timestamp']]):
+        timestamp = row[index['timestamp']]
+        if (timestamp < params['lookback_from'] or timestamp >= row[index['commence_time']]
+                or row[index['bookmaker']] != params['bookmaker']):
+            continue
+        fixture = row[:3]
+        fair = [row[i] for i in fair_columns]
+        last = previous.get(fixture)
+        previous[fixture] = fair
+        if last is None or timestamp < params['since']:
+            continue
+        seconds = int((timestamp - datetime(1970, 1, 1)).total_seconds())
+        bucket = datetime(1970, 1, 1) + timedelta(seconds=seconds - seconds % params['bucket_seconds'])
+        totals[fixture + (bucket,)] += max(abs(a - b) for a, b in zip(fair, last)) * 100
+    return totals
+
+
+def test_query_matches_row_by_row_movement(scratch_cursor):
+    _, rows = synthetic_data.generate(leagues=2, fixtures_per_league=8, snapshots=96, seed=9)
+    synthetic_data.insert_rows(scratch_cursor, rows)
+
+    params = heatmap_params("24h")
+    scratch_cursor.execute(HEATMAP_QUERY, params)
+    result = pd.DataFrame(scratch_cursor.fetchall(), columns=COLUMNS)
+    by_fixture = result[result['home_team'].notna()]
+    by_league = result[result['home_team'].isna()]
+
+    expected = expected_movement(rows, params)
+    assert expected
+    actual = {tuple(key): total for *key, total in
+              by_fixture[['league', 'home_team', 'away_team', 'bucket', 'total_pp']].itertuples(index=False)}
+    assert actual.keys() == expected.keys()
+    assert all(abs(actual[key] - expected[key]) < 1e-3 for key in expected)
+
+    # League rows are the sums of their fixtures
+    league_sums = by_fixture.groupby(['league', 'bucket'])['total_pp'].sum()
+    league_rows = by_league.set_index(['league', 'bucket'])['total_pp']
+    pd.testing.assert_series_equal(league_rows.sort_index(), league_sums.sort_index(), check_names=False)
+
+
+if __name__ == "__main__":
+    print("Running movement heatmap tests...")
+    test_params_align_to_buckets()
+    test_matrix_orders_rows_and_fills_quiet_buckets()
+    if DATABASE_URL:
+        with synthetic_data.scratch_schema(SCHEMA, DATABASE_URL) as cursor:
+            test_query_matches_row_by_row_movement(cursor)
+    print("[PASS] All movement heatmap tests passed")
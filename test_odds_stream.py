@@ -0,0 +1,163 @@
+"""
+Tests for the live price-change stream (no database needed)
+"""
+import asyncio
+import json
+from datetime import datetime
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import odds_stream
+from odds_state import OddsState, change_id
+from odds_stream import CLIENT_BUFFER_SIZE, TickBroadcaster, handle_sse
+
+NOW = datetime(2026, 3, 14, 15, 0)
+
+
+def change(change_id, league='EPL', home_team='Arsenal', away_team='Chelsea'):
+    return {'id': change_id, 'league': league, 'home_team': home_team, 'away_team': away_team,
+            'bookmaker': 'pinnacle', 'outcome': 'Home', 'old': 2.0, 'new': 1.9, 'delta_pp': 2.6,
+            'timestamp': NOW}
+
+
+class FakeState:
+    """The OddsState change log only"""
+
+    def __init__(self, changes):
+        self.changes = changes
+
+    def changes_since(self, row_id):
+        return [change for change in self.changes if change['id'] > row_id]
+
+
+def test_slow_client_is_dropped():
+    async def main():
+        broadcaster = TickBroadcaster()
+        slow = broadcaster.connect()
+        fast = broadcaster.connect()
+        for i in range(CLIENT_BUFFER_SIZE):
+            broadcaster.publish(change(i + 1))
+            fast.queue.get_nowait()
+        assert not slow.dropped
+
+        broadcaster.publish(change(CLIENT_BUFFER_SIZE + 1))
+        assert slow.dropped and not fast.dropped
+        assert broadcaster.clients == {fast} and broadcaster.dropped_clients == 1
+        # The writer finds the marker last, after what it was already sent
+        assert slow.queue.qsize() == CLIENT_BUFFER_SIZE
+        items = [slow.queue.get_nowait() for _ in range(CLIENT_BUFFER_SIZE)]
+        assert items[-1] is odds_stream._DROPPED
+        assert fast.queue.get_nowait()['id'] == CLIENT_BUFFER_SIZE + 1
+
+    asyncio.run(main())
+
+
+def test_subscription_filter():
+    async def main():
+        broadcaster = TickBroadcaster()
+        everything = broadcaster.connect()
+        by_league = broadcaster.connect(leagues=['Spain La Liga'])
+        by_fixture = broadcaster.connect(fixtures=['Arsenal vs Chelsea'])
+
+        broadcaster.publish(change(1))
+        broadcaster.publish(change(2, league='Spain La Liga', home_team='Sevilla', away_team='Getafe'))
+        broadcaster.publish(change(3, home_team='Liverpool', away_team='Everton'))
+        assert everything.queue.qsize() == 3
+        assert by_league.queue.get_nowait()['id'] == 2 and by_league.queue.empty()
+        assert by_fixture.queue.get_nowait()['id'] == 1 and by_fixture.queue.empty()
+
+        by_fixture.subscribe(leagues=['EPL'])
+        broadcaster.publish(change(4, home_team='Liverpool', away_team='Everton'))
+        assert by_fixture.queue.get_nowait()['id'] == 4
+
+    asyncio.run(main())
+
+
+async def read_events(response, count):
+    """(event, id) of the next `count` SSE events"""
+    events = []
+    event = event_id = None
+    while len(events) < count:
+        line = (await asyncio.wait_for(response.content.readline(), 5)).decode().rstrip('\n')
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('id: '):
+            event_id = int(line[len('id: '):])
+        elif line.startswith('data: '):
+            json.loads(line[len('data: '):])
+        elif not line and event:
+            events.append((event, event_id))
+            event = event_id = None
+    return events
+
+
+def test_last_event_id_replay_without_duplicates():
+    state = FakeState([change(i) for i in range(1, 6)])
+    broadcaster = TickBroadcaster()
+    broadcaster.last_id = 3
+    connect = broadcaster.connect
+
+    def connect_then_publish(*args):
+        # Change 4 lands after the client subscribed, before its replay
+        client = connect(*args)
+        broadcaster.last_id = 4
+        broadcaster.publish(state.changes[3])
+        return client
+
+    app = web.Application()
+    app['ticks'] = broadcaster
+    app.router.add_get('/api/stream', handle_sse)
+
+    async def main():
+        async with TestClient(TestServer(app)) as client:
+            with mock.patch.object(broadcaster, 'connect', connect_then_publish):
+                response = await client.get('/api/stream', headers={'Last-Event-ID': '1'})
+            assert await read_events(response, 3) == [('tick', 2), ('tick', 3), ('tick', 4)]
+
+            broadcaster.last_id = 5
+            broadcaster.publish(state.changes[4])
+            assert await read_events(response, 1) == [('tick', 5)]
+            response.close()
+
+    with mock.patch.object(odds_stream, 'get_odds_state', lambda: state):
+        asyncio.run(main())
+
+
+def test_resume_inside_a_snapshot():
+    kickoff = datetime(2026, 3, 15, 15, 0)
+    state = OddsState()
+    rows = [(row_id, 'EPL', 'Arsenal', 'Chelsea', 'pinnacle', home, away, draw, NOW.replace(minute=row_id), kickoff,
+             None, None, None, None)
+            for row_id, home, away, draw in ((1, 2.0, 4.0, 3.5), (2, 1.9, 4.2, 3.6), (3, 1.8, 4.2, 3.7))]
+    state._merge(rows, record_changes=True)
+    # Snapshot 2 moved all three prices, snapshot 3 two of them: five changes with ids of their own
+    ids = [change['id'] for change in state.changes_since(0)]
+    assert ids == sorted(set(ids)) and len(ids) == 5
+    assert ids[0] == change_id(2, 'Home') and ids[-1] == change_id(3, 'Draw')
+
+    broadcaster = TickBroadcaster()
+    broadcaster.last_id = change_id(3)
+    app = web.Application()
+    app['ticks'] = broadcaster
+    app.router.add_get('/api/stream', handle_sse)
+
+    async def main():
+        async with TestClient(TestServer(app)) as client:
+            # Disconnected after the first of snapshot 2's changes
+            response = await client.get('/api/stream', headers={'Last-Event-ID': str(ids[0])})
+            assert await read_events(response, 4) == [('tick', event_id) for event_id in ids[1:]]
+            response.close()
+
+    with mock.patch.object(odds_stream, 'get_odds_state', lambda: state):
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    print("Running odds stream tests...")
+    test_slow_client_is_dropped()
+    test_subscription_filter()
+    test_last_event_id_replay_without_duplicates()
+    test_resume_inside_a_snapshot()
+    print("[PASS] All odds stream tests passed")
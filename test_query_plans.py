@@ -0,0 +1,31 @@
+"""
+Plan regression tests for the hot SQL (needs DATABASE_URL; see query_plans.py)
+"""
+import os
+
+import pytest
+
+from query_plans import HOT_QUERIES, check_all
+
+pytestmark = pytest.mark.skipif(not os.environ.get('DATABASE_URL'), reason="DATABASE_URL not set")
+
+_results = {}
+
+
+def results():
+    if not _results:
+        _results.update(check_all())
+    return _results
+
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_plan(name):
+    result = results()[name]
+    assert not result['problems'], f"{name}: {'; '.join(result['problems'])}\n{result['plan']}"
+
+
+if __name__ == "__main__":
+    print("Running query plan tests...")
+    for name in HOT_QUERIES:
+        test_hot_query_plan(name)
+        print(f"[PASS] {name} ({results()[name]['buffers']} buffers)")
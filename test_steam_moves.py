@@ -0,0 +1,93 @@
+"""
+Tests for the streaming steam-move detector (no database needed)
+"""
+from datetime import datetime, timedelta
+
+from steam_moves import OutcomeTracker, SteamDetector
+
+START = datetime.now().replace(second=0, microsecond=0)
+KICKOFF = START + timedelta(days=1)
+TICK = timedelta(minutes=15)
+
+
+def feed(tracker, prices, start=START):
+    detections = []
+    for i, price in enumerate(prices):
+        detections.extend(tracker.update(start + i * TICK, price))
+    return detections
+
+
+def test_steam_within_window():
+    # 2.00 (50%) -> 1.80 (55.6%) in 15 minutes
+    detections = feed(OutcomeTracker(), [2.0, 1.8])
+    assert len(detections) == 1
+    kind, delta_pp, from_odds, started_at, _ = detections[0]
+    assert kind == 'steam' and from_odds == 2.0 and started_at == START
+    assert abs(delta_pp - 5.56) < 0.01
+
+
+def test_slow_move_is_not_steam():
+    # ~1.1pp every 15 minutes never reaches 3pp inside 30 minutes... but it is a streak
+    detections = feed(OutcomeTracker(), [2.0, 1.96, 1.92, 1.88])
+    assert [d[0] for d in detections] == ['streak']
+    assert detections[0][4] == 3
+
+
+def test_streak_crossing_threshold_late():
+    # +0.3pp a tick: still under STREAK_MIN_PP after three ticks, over it on the fourth
+    prices = [round(1 / (0.5 + 0.003 * i), 3) for i in range(7)]
+    detections = feed(OutcomeTracker(), prices)
+    assert [(d[0], d[4]) for d in detections] == [('streak', 4)]
+    assert detections[0][1] >= 1.0 and detections[0][2] == 2.0
+
+
+def test_level_before_window_counts():
+    # Price unchanged for an hour, then moves: the window starts at the held level
+    detections = feed(OutcomeTracker(), [2.0, 2.0, 2.0, 2.0, 2.0, 1.85])
+    assert [d[0] for d in detections] == ['steam']
+    assert detections[0][2] == 2.0
+
+
+def test_move_reported_once():
+    detections = feed(OutcomeTracker(), [2.0, 1.8, 1.8, 1.8])
+    assert len(detections) == 1
+
+
+def test_drift_is_negative():
+    detections = feed(OutcomeTracker(), [1.8, 2.0])
+    assert detections[0][0] == 'steam' and detections[0][1] < -3
+
+
+def test_zigzag_is_not_a_streak():
+    assert feed(OutcomeTracker(), [2.0, 1.97, 2.0, 1.97, 2.0, 1.97]) == []
+
+
+def test_detector_events_and_warmup():
+    detector = SteamDetector()
+    row = lambda row_id, home_odds, timestamp: (row_id, 'EPL', 'Arsenal', 'Chelsea', 'pinnacle',
+                                                home_odds, 4.0, 3.5, timestamp, KICKOFF)
+    detector.consume([row(1, 2.0, START)], initial_load=True)
+    assert detector.drain() == []
+
+    detector.consume([row(2, 1.8, START + TICK)])
+    events = detector.drain()
+    assert len(events) == 1
+    assert events[0]['outcome'] == 'Home' and events[0]['odds_id'] == 2
+    assert events[0]['from_odds'] == 2.0 and events[0]['to_odds'] == 1.8
+
+    # In-play ticks are ignored
+    detector.consume([row(3, 1.3, KICKOFF + TICK)])
+    assert detector.drain() == []
+
+
+if __name__ == "__main__":
+    print("Running steam move tests...")
+    test_steam_within_window()
+    test_slow_move_is_not_steam()
+    test_streak_crossing_threshold_late()
+    test_level_before_window_counts()
+    test_move_reported_once()
+    test_drift_is_negative()
+    test_zigzag_is_not_a_streak()
+    test_detector_events_and_warmup()
+    print("[PASS] All steam move tests passed")
@@ -0,0 +1,61 @@
+"""
+Tests for the synthetic odds generator (no database needed)
+"""
+import random
+from datetime import datetime, timedelta
+
+from synthetic_data import api_events, generate
+
+NOW = datetime(2024, 3, 15, 12, 0)
+
+
+def test_shape():
+    fixtures, rows = generate(leagues=3, fixtures_per_league=4, snapshots=10, seed=1, now=NOW)
+    assert len(fixtures) == 12
+    assert len(rows) == 3 * 4 * 10
+    assert len({fixture['league'] for fixture in fixtures}) == 3
+    # Collector order: oldest snapshots first, none from the future
+    timestamps = [row[8] for row in rows]
+    assert timestamps == sorted(timestamps)
+    assert max(timestamps) <= NOW
+
+
+def test_kickoffs_within_a_week():
+    fixtures, _ = generate(leagues=2, fixtures_per_league=50, snapshots=1, seed=2, now=NOW)
+    for fixture in fixtures:
+        kickoff = fixture['commence_time']
+        assert NOW.replace(hour=0, minute=0) <= kickoff < NOW + timedelta(days=7)
+        assert kickoff.minute in (0, 30, 45)
+
+
+def test_prices_carry_a_margin():
+    _, rows = generate(leagues=1, fixtures_per_league=20, snapshots=20, seed=3, now=NOW)
+    for row in rows:
+        home_odds, away_odds, draw_odds = row[4], row[5], row[6]
+        assert min(home_odds, away_odds, draw_odds) > 1.0
+        overround = 1 / home_odds + 1 / away_odds + 1 / draw_odds
+        assert 1.015 < overround < 1.04, overround
+
+
+def test_same_seed_same_data():
+    assert generate(2, 3, 5, seed=7, now=NOW)[1] == generate(2, 3, 5, seed=7, now=NOW)[1]
+
+
+def test_api_events_match_save_odds_input():
+    fixtures, _ = generate(leagues=2, fixtures_per_league=3, snapshots=2, seed=4, now=NOW)
+    events = api_events(random.Random(0), fixtures)
+    assert sorted(events) == sorted({fixture['league'] for fixture in fixtures})
+    event = events[fixtures[0]['league']][0]
+    outcomes = {outcome['name'] for outcome in event['bookmakers'][0]['markets'][0]['outcomes']}
+    assert outcomes == {event['home_team'], event['away_team'], 'Draw'}
+    assert event['commence_time'].endswith('Z')
+
+
+if __name__ == "__main__":
+    print("Running synthetic data tests...")
+    test_shape()
+    test_kickoffs_within_a_week()
+    test_prices_carry_a_margin()
+    test_same_seed_same_data()
+    test_api_events_match_save_odds_input()
+    print("[PASS] All synthetic data tests passed")
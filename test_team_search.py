@@ -0,0 +1,117 @@
+"""
+Unit tests for the team search index
+"""
+import threading
+import time
+from unittest import mock
+
+import team_search
+from team_search import TeamIndex, normalize_team_name
+
+FIXTURES = [
+    ('Spain La Liga', 'Atlético Madrid', 'Real Madrid'),
+    ('Spain La Liga', 'Sevilla', 'Getafe'),
+    ('Germany Bundesliga', 'Bayern München', '1. FC Köln'),
+    ('EPL', 'Manchester United', 'Tottenham Hotspur'),
+    ('EPL', 'Manchester City', 'Arsenal'),
+    ('EPL', 'Arsenal', 'Manchester United'),
+]
+
+
+def build_index():
+    index = TeamIndex()
+    index.add_fixtures(FIXTURES)
+    return index
+
+
+def test_normalize_team_name():
+    assert normalize_team_name("Atlético Madrid") == "atletico madrid"
+    assert normalize_team_name("Bayern München") == "bayern munchen"
+    assert normalize_team_name("1. FC Köln") == "1 fc koln"
+    assert normalize_team_name("  Brighton & Hove Albion ") == "brighton hove albion"
+
+
+def test_diacritics_and_case():
+    index = build_index()
+    assert index.search("Atletico") == {'Atlético Madrid'}
+    assert index.search("ATLÉTICO") == {'Atlético Madrid'}
+    assert index.search("munchen") == {'Bayern München'}
+    assert index.search("köln") == {'1. FC Köln'}
+
+
+def test_substring_prefix_and_words():
+    index = build_index()
+    assert index.search("madrid") == {'Atlético Madrid', 'Real Madrid'}
+    assert index.search("chester") == {'Manchester United', 'Manchester City'}
+    assert index.search("ma") == {'Atlético Madrid', 'Real Madrid', 'Manchester United', 'Manchester City'}
+    assert index.search("real mad") == {'Real Madrid'}
+    assert index.search("madrid sevilla") == set()
+    assert index.search("xyz") == set()
+    assert index.search("   ") == set()
+
+
+def test_aliases():
+    index = build_index()
+    assert index.search("Atleti") == {'Atlético Madrid'}
+    assert index.search("man utd") == {'Manchester United'}
+    assert index.search("spurs") == {'Tottenham Hotspur'}
+    # Either spelling finds Bayern, whichever one is stored
+    assert index.search("bayern munich") == {'Bayern München'}
+    other = TeamIndex()
+    other.add_fixtures([('Germany Bundesliga', 'Bayern Munich', 'Mainz')])
+    assert other.search("münchen") == {'Bayern Munich'}
+    # Alias for a team that isn't stored matches nothing
+    assert index.search("barca") == set()
+
+
+def test_known_fixtures_are_not_counted_again():
+    index = build_index()
+    assert index.add_fixtures(FIXTURES) == 0
+    assert index.add_fixtures([('EPL', 'Tottenham Hotspur', 'Arsenal')]) == 2
+
+
+class SlowConnection:
+    """Returns FIXTURES (ids 1..n) after a pause, counting connections"""
+
+    opened = 0
+
+    def __init__(self):
+        SlowConnection.opened += 1
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params):
+        time.sleep(0.05)
+
+    def fetchall(self):
+        return [fixture + (i + 1,) for i, fixture in enumerate(FIXTURES)]
+
+    def close(self):
+        pass
+
+
+def test_concurrent_refreshes_read_once():
+    index = TeamIndex()
+    SlowConnection.opened = 0
+    results = []
+    with mock.patch.object(team_search, 'connect', SlowConnection):
+        threads = [threading.Thread(target=lambda: results.append(index.refresh(7))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert SlowConnection.opened == 1
+    assert sorted(results) == [0, 0, 0, 2 * len(FIXTURES)]
+    assert index.watermark == len(FIXTURES) and index.search("spurs") == {'Tottenham Hotspur'}
+
+
+if __name__ == "__main__":
+    print("Running team search tests...")
+    test_normalize_team_name()
+    test_diacritics_and_case()
+    test_substring_prefix_and_words()
+    test_aliases()
+    test_known_fixtures_are_not_counted_again()
+    test_concurrent_refreshes_read_once()
+    print("[PASS] team search tests passed")
@@ -0,0 +1,94 @@
+"""
+Tests for the running volatility statistics and the z-score movers ranking (no database needed)
+"""
+import math
+import random
+import statistics
+from datetime import datetime, timedelta
+
+from dashboard_snapshot import DashboardSnapshot, build_snapshot
+from odds_math import no_vig_probabilities
+from odds_state import OddsState
+from volatility import MIN_SIGMA_PP, MIN_TICKS, RunningStats, VolatilityTracker
+
+NOW = datetime.now().replace(microsecond=0)
+KICKOFF = NOW + timedelta(days=1)
+TICK = timedelta(minutes=15)
+
+
+def test_welford_matches_batch_statistics():
+    rng = random.Random(3)
+    prices = [round(2.0 + rng.gauss(0, 0.05), 3) for _ in range(200)]
+    stats = RunningStats()
+    for i, price in enumerate(prices):
+        stats.update(NOW + i * TICK, price)
+
+    changes = [(1 / b - 1 / a) * 100 for a, b in zip(prices, prices[1:])]
+    assert stats.count == len(changes)
+    assert abs(stats.mean - statistics.fmean(changes)) < 1e-9
+    assert abs(stats.sigma_pp - statistics.stdev(changes)) < 1e-9
+
+
+def test_out_of_order_tick_ignored():
+    stats = RunningStats()
+    stats.update(NOW, 2.0)
+    stats.update(NOW + TICK, 1.9)
+    stats.update(NOW, 3.0)
+    assert stats.count == 1
+
+
+def test_zscore_needs_history_and_floors_sigma():
+    stats = RunningStats()
+    for i in range(MIN_TICKS):
+        stats.update(NOW + i * TICK, 2.0)
+    # MIN_TICKS prices give MIN_TICKS - 1 changes
+    assert stats.zscore(1.0, 1) is None
+    stats.update(NOW + MIN_TICKS * TICK, 2.0)
+    # A flat price has no noise of its own: the floor keeps z finite
+    assert stats.zscore(1.0, 4) == 1.0 / (MIN_SIGMA_PP * math.sqrt(4))
+
+
+def row(row_id, home_team, home_odds, timestamp):
+    away_odds, draw_odds = 4.0, 3.5
+    fair = [column[0] for column in no_vig_probabilities([home_odds], [away_odds], [draw_odds])]
+    return (row_id, 'EPL', home_team, 'Rivals', 'pinnacle', home_odds, away_odds, draw_odds, timestamp, KICKOFF,
+            *fair)
+
+
+def test_quiet_fixture_outranks_noisy_one():
+    rng = random.Random(1)
+    rows = []
+    start = NOW - 40 * TICK
+    for i in range(40):
+        timestamp = start + i * TICK
+        # Noisy: swings ~2pp every update; quiet: flat until a 1.5pp move at the end
+        noisy = round(2.0 + rng.choice((-0.08, 0.08)), 3)
+        quiet = 2.0 if i < 39 else 1.94
+        rows.append(row(2 * i + 1, 'Noisy', noisy, timestamp))
+        rows.append(row(2 * i + 2, 'Quiet', quiet, timestamp))
+    # ...while the noisy one ends on a bigger move, but one in line with its usual swings
+    rows[-2] = row(rows[-2][0], 'Noisy', 1.80, rows[-2][8])
+
+    state = OddsState()
+    tracker = VolatilityTracker()
+    state._merge(rows)
+    tracker.consume(rows, initial_load=True)
+    snapshot = DashboardSnapshot(build_snapshot(state, 80, tracker))
+
+    by_delta = snapshot.top_movers("1h")
+    assert by_delta[0]['home_team'] == 'Noisy'
+    by_zscore = snapshot.top_movers("1h", zscore=True)
+    assert by_zscore[0]['home_team'] == 'Quiet'
+    assert by_zscore[0]['abs_zscore'] > 3 and by_zscore[0]['ticks'] >= 1
+
+    # Without the collector's tracker the ranking is just empty
+    assert DashboardSnapshot(build_snapshot(state, 80)).top_movers("1h", zscore=True) == []
+
+
+if __name__ == "__main__":
+    print("Running volatility tests...")
+    test_welford_matches_batch_statistics()
+    test_out_of_order_tick_ignored()
+    test_zscore_needs_history_and_floors_sigma()
+    test_quiet_fixture_outranks_noisy_one()
+    print("[PASS] All volatility tests passed")
@@ -0,0 +1,105 @@
+import math
+from datetime import datetime
+
+from odds_math import implied_prob
+from odds_state import KEEP_AFTER_KICKOFF
+
+# Ticks of history an outcome needs before its z-score means anything
+MIN_TICKS = 8
+
+# Floor on the per-tick standard deviation (pp), so outcomes whose price has
+# barely ever moved don't turn the smallest move into a huge z-score
+MIN_SIGMA_PP = 0.1
+
+OUTCOMES = (('Home', 5), ('Away', 6), ('Draw', 7))
+
+
+class RunningStats:
+    """Welford running mean and variance of one outcome's per-tick Δpp"""
+
+    __slots__ = ('count', 'mean', 'm2', 'last_time', 'last_prob')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_time = None
+        self.last_prob = None
+
+    def update(self, timestamp, odds):
+        """Add a tick (the change from the previous one); out-of-order ticks are ignored"""
+        prob = implied_prob(odds)
+        if prob is None or (self.last_time is not None and timestamp <= self.last_time):
+            return
+        if self.last_prob is not None:
+            change = (prob - self.last_prob) * 100
+            self.count += 1
+            delta = change - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (change - self.mean)
+        self.last_time = timestamp
+        self.last_prob = prob
+
+    @property
+    def sigma_pp(self):
+        """Sample standard deviation of the per-tick change (None with under two ticks)"""
+        if self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def zscore(self, move_pp, ticks):
+        """How unusual a move over `ticks` ticks is, given this outcome's own noise
+
+        The ticks are treated as independent, so the expected move is
+        ticks × mean with standard deviation sigma × √ticks.
+
+        Returns:
+            float, or None when there isn't enough history (MIN_TICKS) or no tick
+        """
+        if self.count < MIN_TICKS or ticks < 1:
+            return None
+        sigma = max(self.sigma_pp, MIN_SIGMA_PP)
+        return (move_pp - ticks * self.mean) / (sigma * math.sqrt(ticks))
+
+
+class VolatilityTracker:
+    """Per fixture, bookmaker and outcome volatility, updated per tick with constant work
+
+    Feed it the collector's odds rows (see OddsState.add_listener); the
+    initial load builds the statistics from the history once, after which
+    only new ticks are added. Only pre-match ticks count.
+    """
+
+    def __init__(self):
+        # (league, home_team, away_team, bookmaker, outcome) -> RunningStats
+        self._stats = {}
+        # (league, home_team, away_team) -> commence_time, for pruning
+        self._kickoffs = {}
+
+    def consume(self, rows, initial_load=False):
+        """Process rows in SNAPSHOT_COLUMNS order"""
+        for row in rows:
+            league, home_team, away_team, bookmaker = row[1:5]
+            timestamp, commence_time = row[8], row[9]
+            if commence_time is None or timestamp >= commence_time:
+                continue
+            self._kickoffs[(league, home_team, away_team)] = commence_time
+            for outcome, index in OUTCOMES:
+                key = (league, home_team, away_team, bookmaker, outcome)
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = RunningStats()
+                stats.update(timestamp, row[index])
+        self._prune()
+
+    def _prune(self):
+        cutoff = datetime.now() - KEEP_AFTER_KICKOFF
+        finished = {fixture for fixture, commence_time in self._kickoffs.items() if commence_time < cutoff}
+        if finished:
+            self._stats = {key: stats for key, stats in self._stats.items() if key[:3] not in finished}
+            for fixture in finished:
+                del self._kickoffs[fixture]
+
+    def stats(self, league, home_team, away_team, bookmaker, outcome):
+        """RunningStats of one outcome (None if it has no ticks yet)"""
+        return self._stats.get((league, home_team, away_team, bookmaker, outcome))